@@ -355,6 +355,8 @@ class DispatcherMetrics(Metrics):
                   'Time spent processing pending tasks'),
         SetIntM('automation_dashboard_task_manager_running_processed', 'Number of running tasks processed'),
         SetIntM('automation_dashboard_task_manager_pending_processed', 'Number of pending tasks processed'),
+        SetIntM('automation_dashboard_task_manager_sync_pool_workers', 'Number of sync jobs allowed to run at once'),
+        SetIntM('automation_dashboard_task_manager_parse_pool_workers', 'Number of parse jobs allowed to run at once'),
         IntM('automation_dashboard_task_manager__schedule_calls',
              'Number of calls to _schedule, after lock is acquired'),
 
@@ -6,6 +6,7 @@ from rest_framework.viewsets import GenericViewSet
 
 from backend.api.v1.common.serializers.settings import SettingsSerializer
 from backend.api.v1.mixins import AdminOnlyViewSet
+from backend.apps.clusters.cache import report_cache
 from backend.apps.common.models import Settings, SettingsChoices
 
 
@@ -27,5 +28,6 @@ class SettingsView(AdminOnlyViewSet, mixins.ListModelMixin, mixins.CreateModelMi
         serializer = self.get_serializer(data={"type": _type, "value": value})
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        report_cache.bump_data_version()
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
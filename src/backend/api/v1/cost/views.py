@@ -6,6 +6,7 @@ from rest_framework.viewsets import GenericViewSet
 
 from backend.api.v1.cost.serializers import CostSerializer, CostCreateSerializer
 from backend.api.v1.mixins import AdminOnlyViewSet
+from backend.apps.clusters.cache import report_cache
 from backend.apps.clusters.models import SubscriptionCost
 
 
@@ -30,4 +31,5 @@ class CostView(AdminOnlyViewSet, mixins.ListModelMixin, mixins.CreateModelMixin,
         serializer = CostCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        report_cache.bump_data_version()
         return Response(data=serializer.data, status=status.HTTP_202_ACCEPTED)
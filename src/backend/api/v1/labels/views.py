@@ -6,6 +6,7 @@ from rest_framework.viewsets import GenericViewSet
 from backend.api.v1.labels.serializers import LabelSerializer
 from backend.api.v1.mixins import AdminOnlyViewSet
 from backend.apps.clusters.models import Label
+from backend.common.pagination import NameKeysetPagination
 
 
 class LabelView(
@@ -17,6 +18,7 @@ class LabelView(
     serializer_class = LabelSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
+    pagination_class = NameKeysetPagination
     search_fields = ["name"]
     ordering = ["name"]
 
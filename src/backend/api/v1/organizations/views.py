@@ -6,6 +6,7 @@ from rest_framework.viewsets import GenericViewSet
 from backend.api.v1.mixins import AdminOnlyViewSet
 from backend.api.v1.organizations.serializers import OrganizationSerializer
 from backend.apps.clusters.models import Organization
+from backend.common.pagination import NameKeysetPagination
 
 
 class OrganizationView(
@@ -17,6 +18,7 @@ class OrganizationView(
     serializer_class = OrganizationSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
+    pagination_class = NameKeysetPagination
     search_fields = ["name"]
     ordering = ["name"]
 
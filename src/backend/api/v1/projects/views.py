@@ -6,6 +6,7 @@ from rest_framework.viewsets import GenericViewSet
 from backend.api.v1.mixins import AdminOnlyViewSet
 from backend.api.v1.projects.serializers import ProjectSerializer
 from backend.apps.clusters.models import Project
+from backend.common.pagination import NameKeysetPagination
 
 
 class ProjectView(
@@ -17,6 +18,7 @@ class ProjectView(
     serializer_class = ProjectSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
+    pagination_class = NameKeysetPagination
     search_fields = ["name"]
     ordering = ["name"]
 
@@ -8,6 +8,12 @@ from backend.apps.clusters.schemas import DateRangeSchema, QueryParams
 
 
 def get_filter_options(request: Request | HttpRequest) -> QueryParams:
+    # Parsed once per request, relative date ranges then also stay the same across the report queries.
+    http_request = getattr(request, '_request', request)
+    options = getattr(http_request, '_report_filter_options', None)
+    if options is not None:
+        return options
+
     options = QueryParams()
     fields = type(options).model_fields
     date_range_fields = ["start_date", "end_date", "date_range"]
@@ -32,6 +38,7 @@ def get_filter_options(request: Request | HttpRequest) -> QueryParams:
             start=start_date,
             end=end_date,
         )
+    http_request._report_filter_options = options
     return options
 
 
@@ -43,7 +50,9 @@ class CustomReportFilter(filters.BaseFilterBackend):
         queryset = queryset.organization(options.organization)
         queryset = queryset.cluster(options.cluster)
         queryset = queryset.job_template(options.job_template)
-        queryset = queryset.label(options.label)
+        if options.label:
+            # Daily rollup rows are not labelled, ReportsView.use_rollup reads jobs when labels are filtered.
+            queryset = queryset.label(options.label)
         queryset = queryset.project(options.project)
 
         return queryset
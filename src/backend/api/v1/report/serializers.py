@@ -2,6 +2,7 @@ from dateutil.relativedelta import relativedelta
 from rest_framework import serializers
 
 from backend.apps.clusters.models import Job
+from backend.apps.common.models import PdfReport
 
 
 def sec2time(sec: int) -> str:
@@ -49,3 +50,9 @@ class JobSerializer(serializers.ModelSerializer[Job]):
 
     def get_time_savings_str(self, obj):
         return sec2time(obj["time_savings"])
+
+
+class PdfReportSerializer(serializers.ModelSerializer[PdfReport]):
+    class Meta:
+        model = PdfReport
+        fields = ("id", "status", "explanation", "finished")
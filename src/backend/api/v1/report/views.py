@@ -1,24 +1,34 @@
 import csv
 import decimal
+import hashlib
 import logging
+import threading
 from collections import OrderedDict
-from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from itertools import batched
+from typing import Any, Callable, Iterable, Iterator
+
+import weasyprint
+from dateutil.relativedelta import relativedelta
 
 from django.conf import settings
-from django.db import models
+from django.db import close_old_connections, connection, models, transaction
 from django.db.models import (
     Count,
     Sum,
     F,
     Q,
-    OuterRef,
-    Subquery,
-    Value,
     QuerySet)
-from django.db.models.functions import Trunc, Coalesce
-from django.http import HttpResponse
+from django.db.models.functions import Trunc
+from django.http import HttpRequest, HttpResponse, QueryDict, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from django_filters.rest_framework import DjangoFilterBackend
-from django_generate_series.models import generate_series
+from django_weasyprint.utils import django_url_fetcher
 from django_weasyprint.views import WeasyTemplateResponse
 from drf_spectacular.utils import extend_schema, inline_serializer, extend_schema_view, OpenApiParameter
 from rest_framework import mixins, filters, status, serializers
@@ -34,7 +44,9 @@ from backend.api.v1.report.filters import (
     get_filter_options)
 from backend.api.v1.report.serializers import (
     JobSerializer,
+    PdfReportSerializer,
     sec2time)
+from backend.apps.clusters.cache import report_cache
 from backend.apps.clusters.models import (
     Job,
     JobStatusChoices,
@@ -46,6 +58,8 @@ from backend.apps.clusters.models import (
     Cluster,
     DateRangeChoices,
     JobLabel,
+    JobDailyRollup,
+    JobDailyHostSketch,
     SubscriptionCost)
 from backend.apps.clusters.schemas import (
     ReportData,
@@ -53,7 +67,9 @@ from backend.apps.clusters.schemas import (
     ChartsData,
     ChartItem,
     QueryParams)
-from backend.apps.common.models import Settings, Currency
+from backend.apps.common.models import Settings, Currency, PdfReport
+from backend.apps.dispatch.config import setup_dispatcherd_publisher
+from backend.apps.tasks.reports import generate_pdf_report
 
 logger = logging.getLogger("automation-dashboard")
 
@@ -69,9 +85,94 @@ OPEN_API_PARAMETERS = [
 ]
 
 
+def render_pdf(template: str, contexts: Iterable[dict]) -> bytes:
+    """Render the template once per context and join all pages into one PDF document."""
+    font_config = weasyprint.text.fonts.FontConfiguration()
+    base_url = getattr(settings, "WEASYPRINT_BASEURL", "file:///")
+    documents = [
+        weasyprint.HTML(
+            string=render_to_string(template, context),
+            base_url=base_url,
+            url_fetcher=django_url_fetcher,
+        ).render(font_config=font_config)
+        for context in contexts
+    ]
+    return documents[0].copy([page for document in documents for page in document.pages]).write_pdf()
+
+
+class Echo:
+    """File-like object returning what is written, csv.writer then returns each row instead of buffering it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+_query_executor: tuple[int, ThreadPoolExecutor] | None = None
+_query_executor_lock = threading.Lock()
+
+
+def query_executor(workers: int) -> ThreadPoolExecutor:
+    """
+    Thread pool of the web process running report queries. Its threads keep their database connection
+    like request threads do, so the process opens at most REPORT_QUERY_WORKERS extra connections.
+    """
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is None or _query_executor[0] != workers:
+            if _query_executor is not None:
+                _query_executor[1].shutdown(wait=False)
+            _query_executor = (workers, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-query"))
+        return _query_executor[1]
+
+
+def run_query(query: Callable[[], Any]) -> Any:
+    # Like a request, reuse the connection of the thread until CONN_MAX_AGE and drop it when unusable.
+    close_old_connections()
+    try:
+        return query()
+    finally:
+        close_old_connections()
+
+
+def run_queries(queries: dict[str, Callable[[], Any]]) -> dict[str, Any]:
+    """
+    Evaluate independent report queries, concurrently on the connections of the report query pool when
+    REPORT_QUERY_WORKERS allows. Inside a transaction other connections can not see its rows,
+    so the queries run one after another.
+    """
+    workers = getattr(settings, "REPORT_QUERY_WORKERS", 1)
+    if min(workers, len(queries)) <= 1 or connection.in_atomic_block:
+        return {name: query() for name, query in queries.items()}
+    executor = query_executor(workers)
+    futures = {name: executor.submit(run_query, query) for name, query in queries.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+
+PDF_REQUEST = inline_serializer(
+    name="InlineFormPDFSerializer",
+    fields={
+        "job_chart": serializers.CharField(),
+        "host_chart": serializers.CharField(),
+    }
+)
+
+PDF_REPORT_ID_PARAMETER = OpenApiParameter(
+    name='report_id', description='PDF report ID', type=int, location=OpenApiParameter.PATH)
+
+PDF_CONTENT_DISPOSITION = 'attachment; filename="AAP_Automation_Dashboard_Report.pdf"'
+
+
+UNIQUE_HOSTS_PARAMETER = OpenApiParameter(
+    name='unique_hosts',
+    description='Count unique hosts exactly, or estimate them from daily host sketches (default)',
+    type=str,
+    enum=['approximate', 'exact'],
+    default='approximate')
+
+
 @extend_schema_view(
     list=extend_schema(parameters=OPEN_API_PARAMETERS),
-    details=extend_schema(parameters=OPEN_API_PARAMETERS),
+    details=extend_schema(parameters=[*OPEN_API_PARAMETERS, UNIQUE_HOSTS_PARAMETER]),
     csv=extend_schema(parameters=OPEN_API_PARAMETERS),
     pdf=extend_schema(parameters=OPEN_API_PARAMETERS),
 )
@@ -100,9 +201,10 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
         manual_cost_value_per_minute = costs.engineer_avg_hourly_rate / decimal.Decimal(60)
 
         enable_template_creation_time = Settings.enable_template_creation_time()
+        use_rollup = self.use_rollup(options)
 
         qs = (
-            Job.objects.successful_or_failed().
+            self.get_jobs_queryset(use_rollup).
             values(
                 "name",
                 "cluster",
@@ -110,9 +212,9 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
                 time_taken_manually_execute_minutes=F("job_template__time_taken_manually_execute_minutes"),
                 time_taken_create_automation_minutes=F("job_template__time_taken_create_automation_minutes"),
             ).annotate(
-                runs=Count("id"),
-                successful_runs=Count("id", filter=Q(status=JobStatusChoices.SUCCESSFUL)),
-                failed_runs=Count("id", filter=Q(status=JobStatusChoices.FAILED)),
+                runs=self.runs_aggregate(use_rollup),
+                successful_runs=self.runs_aggregate(use_rollup, filter=Q(status=JobStatusChoices.SUCCESSFUL)),
+                failed_runs=self.runs_aggregate(use_rollup, filter=Q(status=JobStatusChoices.FAILED)),
                 elapsed=Sum("elapsed"),
                 num_hosts=Sum("num_hosts"),
                 automated_costs=((F("time_taken_create_automation_minutes") * manual_cost_value_per_minute) + (
@@ -131,7 +233,60 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
     def get_queryset(self) -> QuerySet[Job]:
         return self.get_base_queryset()
 
-    def get_unique_host_count(self, options: QueryParams) -> int:
+    def get_cache_key_data(self, request: Request) -> dict:
+        """Everything a report depends on besides the job data, which is covered by the cache data version."""
+        costs = SubscriptionCost.get()
+        return {
+            "options": get_filter_options(request).model_dump(mode="json"),
+            "monthly_subscription_cost": costs.monthly_subscription_cost.normalize(),
+            "engineer_avg_hourly_rate": costs.engineer_avg_hourly_rate.normalize(),
+            "enable_template_creation_time": Settings.enable_template_creation_time(),
+            "params": {
+                param: request.query_params.getlist(param)
+                for param in ["page", "page_size", "ordering", "unique_hosts"]
+            },
+            "host": request.get_host(),
+        }
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        data = report_cache.get_or_set(
+            "list",
+            self.get_cache_key_data(request),
+            lambda: super(ReportsView, self).list(request, *args, **kwargs).data)
+        return Response(data)
+
+    @staticmethod
+    def use_rollup(options: QueryParams) -> bool:
+        """Date range reports are answered from the daily rollup, job labels are only known per job."""
+        if options.date_range is None or options.label:
+            return False
+        return JobDailyRollup.enabled_for(options.date_range.start, options.date_range.end)
+
+    @staticmethod
+    def get_jobs_queryset(use_rollup: bool) -> QuerySet[Job] | QuerySet[JobDailyRollup]:
+        if use_rollup:
+            return JobDailyRollup.objects.all()
+        return Job.objects.successful_or_failed()
+
+    @staticmethod
+    def runs_aggregate(use_rollup: bool, filter: Q | None = None) -> Count | Sum:
+        if use_rollup:
+            return Sum("job_count", filter=filter, default=0)
+        return Count("id", filter=filter)
+
+    def get_unique_host_count(self, options: QueryParams, exact: bool = False) -> int:
+        if not exact and self.use_rollup(options):
+            sketches = JobDailyHostSketch.objects.after(options.date_range.start).before(options.date_range.end)
+            sketches = (sketches
+                        .organization(options.organization)
+                        .job_template(options.job_template)
+                        .project(options.project)
+                        .cluster(options.cluster))
+            return JobDailyHostSketch.count_hosts(sketches)
+        return self.get_unique_hosts_queryset(options).count()
+
+    @staticmethod
+    def get_unique_hosts_queryset(options: QueryParams) -> QuerySet[JobHostSummary]:
         qs = (JobHostSummary.objects
         .filter(
             job__num_hosts__gt=0,
@@ -165,11 +320,27 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
             qs = qs.filter(
                 job__id__in=JobLabel.objects.filter(label_id__in=options.label).values('job_id')
             )
-        qs = qs.values("host_id").distinct()
-        return qs.count()
+        return qs.values("host_id").distinct()
 
-    def get_details(self, request: Request) -> ReportData:
-        filtered_qs = Job.objects.successful_or_failed()
+    def get_totals(self) -> dict[str, Any]:
+        return self.filter_queryset(self.get_base_queryset()).aggregate(
+            total_runs=Sum("runs"),
+            total_successful_runs=Sum("successful_runs"),
+            total_failed_runs=Sum("failed_runs"),
+            total_num_hosts=Sum("num_hosts"),
+            total_elapsed=Sum("elapsed"),
+            total_manual_time=Sum("manual_time"),
+            total_manual_costs=Sum("manual_costs"),
+            total_automated_costs=Sum("automated_costs"),
+            total_savings=Sum("savings"),
+            total_time_savings=Sum("time_savings"),
+        )
+
+    def get_details_queries(self, request: Request) -> dict[str, Callable[[], Any]]:
+        """The independent queries of the report details, evaluated by run_queries."""
+        options = get_filter_options(request)
+        use_rollup = self.use_rollup(options)
+        filtered_qs = self.get_jobs_queryset(use_rollup)
         filtered_qs = self.filter_queryset(filtered_qs)
         filtered_qs = filter_by_range(self.request, queryset=filtered_qs)
         ### TOP USERS ###
@@ -177,34 +348,29 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
                         values(
             user_id=F("launched_by"),
             user_name=F("launched_by__name")
-        ).annotate(count=Count("id")).order_by("launched_by").order_by("-count"))[:5]
+        ).annotate(count=self.runs_aggregate(use_rollup)).order_by("launched_by").order_by("-count"))[:5]
 
         ## TOP PROJECTS ##
         top_projects_qs = (filtered_qs.filter(project__isnull=False).values(
             "project_id",
             project_name=F("project__name")
-        ).annotate(count=Count("id")).order_by("project_id").order_by("-count"))[:5]
+        ).annotate(count=self.runs_aggregate(use_rollup)).order_by("project_id").order_by("-count"))[:5]
 
         ## UNIQUE HOSTS ###
-        unique_host = self.get_unique_host_count(options=get_filter_options(request))
-
-        qs = self.filter_queryset(self.get_base_queryset())
+        exact_unique_hosts = request.query_params.get('unique_hosts') == 'exact'
 
-        report_data_qs = qs.aggregate(
-            total_runs=Sum("runs"),
-            total_successful_runs=Sum("successful_runs"),
-            total_failed_runs=Sum("failed_runs"),
-            total_num_hosts=Sum("num_hosts"),
-            total_elapsed=Sum("elapsed"),
-            total_manual_time=Sum("manual_time"),
-            total_manual_costs=Sum("manual_costs"),
-            total_automated_costs=Sum("automated_costs"),
-            total_savings=Sum("savings"),
-            total_time_savings=Sum("time_savings"),
-        )
+        return {
+            "users": lambda: list(top_users_qs),
+            "projects": lambda: list(top_projects_qs),
+            "unique_hosts": lambda: self.get_unique_host_count(options=options, exact=exact_unique_hosts),
+            "totals": self.get_totals,
+        }
 
-        report_data = ReportData(
-            total_number_of_unique_hosts=ReportDataValue(value=unique_host),
+    @staticmethod
+    def get_report_data(results: dict[str, Any]) -> ReportData:
+        report_data_qs = results["totals"]
+        return ReportData(
+            total_number_of_unique_hosts=ReportDataValue(value=results["unique_hosts"]),
             total_number_of_successful_jobs=ReportDataValue(value=report_data_qs["total_successful_runs"]),
             total_number_of_failed_jobs=ReportDataValue(value=report_data_qs["total_failed_runs"]),
             total_number_of_job_runs=ReportDataValue(value=report_data_qs["total_runs"]),
@@ -227,11 +393,12 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
                 value=round((report_data_qs["total_time_savings"] / 3600), 2) if report_data_qs[
                                                                                      "total_time_savings"] is not None else 0
             ),
-            users=list(top_users_qs),
-            projects=list(top_projects_qs),
+            users=results["users"],
+            projects=results["projects"],
         )
 
-        return report_data
+    def get_details(self, request: Request) -> ReportData:
+        return self.get_report_data(run_queries(self.get_details_queries(request)))
 
     def get_chart_series(self, options: QueryParams) -> ChartsData:
         result = ChartsData()
@@ -256,82 +423,98 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
             start_date = start_date.replace(day=1)
             end_date = end_date.replace(day=1)
 
-        base_chart_qs = (Job.objects
-        .successful_or_failed()
-        .values(
-            date=Trunc(
-                expression="finished",
-                kind=kind,
-                output_field=models.DateTimeField()))
-        .filter(
-            date=OuterRef("term")
-        ))
-
-        base_chart_qs = self.filter_queryset(base_chart_qs)
-        base_chart_qs = filter_by_range(self.request, queryset=base_chart_qs)
-
-        job_chart_qs = base_chart_qs.annotate(
-            runs=Count("id")
-        ).values("runs").order_by()
-
-        host_chart_qs = base_chart_qs.annotate(
-            num_hosts=Sum("num_hosts")
-        ).values("num_hosts").order_by()
-
-        date_sequence_queryset = generate_series(
-            start=start_date,
-            stop=end_date,
-            step=f'1 {kind}s',
-            span=5,
-            output_field=models.DateTimeField
-        ).annotate(
-            runs=Coalesce(Subquery(job_chart_qs), Value(0)),
-            hosts=Coalesce(Subquery(host_chart_qs), Value(0)),
-        )
-
-        for data in date_sequence_queryset:
+        # Hours are finer than the daily rollup, an hour chart spans a single day of jobs.
+        use_rollup = kind != 'hour' and self.use_rollup(options)
+        if use_rollup:
+            date_field, output_field = "day", models.DateField()
+        else:
+            date_field, output_field = "finished", models.DateTimeField()
+
+        chart_qs = self.filter_queryset(self.get_jobs_queryset(use_rollup))
+        chart_qs = filter_by_range(self.request, queryset=chart_qs)
+        chart_qs = (chart_qs
+                    .values(date=Trunc(expression=date_field, kind=kind, output_field=output_field))
+                    .annotate(runs=self.runs_aggregate(use_rollup), hosts=Sum("num_hosts"))
+                    .order_by())
+
+        buckets = {}
+        for row in chart_qs:
+            term = row["date"]
+            if use_rollup:
+                term = datetime.combine(term, time.min, timezone.get_default_timezone())
+            buckets[term] = row
+
+        # Fill the terms without jobs with zeros, the same terms generate_series('1 <kind>s') yields.
+        step = {
+            'hour': relativedelta(hours=1),
+            'day': relativedelta(days=1),
+            'month': relativedelta(months=1),
+            'year': relativedelta(years=1),
+        }[kind]
+        index = 0
+        term = start_date
+        while term <= end_date:
+            bucket = buckets.get(term, {})
             result.job_chart.items.append(
-                ChartItem(x=data.term, y=data.runs),
+                ChartItem(x=term, y=bucket.get("runs", 0)),
             )
             result.host_chart.items.append(
-                ChartItem(x=data.term, y=data.hosts),
+                ChartItem(x=term, y=bucket.get("hosts") or 0),
             )
+            index += 1
+            term = start_date + step * index
 
         return result
 
     @action(methods=["get"], detail=False)
     def details(self, request: Request) -> Response:
-        options = get_filter_options(request)
-
-        details_data = self.get_details(request)
+        response_data = report_cache.get_or_set(
+            "details",
+            self.get_cache_key_data(request),
+            lambda: self.get_details_data(request))
+        return Response(data=response_data, status=status.HTTP_200_OK)
 
-        ## CHARTS ###
-        charts_data = self.get_chart_series(options)
+    def get_details_data(self, request: Request) -> dict:
+        options = get_filter_options(request)
 
-        related_links = Cluster.related_links(options.date_range)
+        results = run_queries({
+            **self.get_details_queries(request),
+            "charts": lambda: self.get_chart_series(options),
+            "related_links": lambda: Cluster.related_links(options.date_range),
+        })
 
         response_data = {
-            **details_data.model_dump(),
-            **charts_data.model_dump(),
-            **related_links,
+            **self.get_report_data(results).model_dump(),
+            **results["charts"].model_dump(),
+            **results["related_links"],
         }
 
-        return Response(data=response_data, status=status.HTTP_200_OK)
+        return response_data
 
     @extend_schema(
         responses={(200, "text/csv; charset=UTF-8"): str},
     )
     @action(methods=["get"], detail=False)
-    def csv(self, request: Request) -> HttpResponse:
-        qs = self.filter_queryset(self.get_base_queryset())
-        response = HttpResponse(
+    def csv(self, request: Request) -> StreamingHttpResponse:
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in self.get_csv_rows()),
             content_type="text/csv; charset=UTF-8",
             headers={"Content-Disposition": 'attachment; filename="AAP_Automation_Dashboard_Report.csv"'},
         )
+        if getattr(settings, "REPORT_CSV_GZIP", True):
+            patch_vary_headers(response, ("Accept-Encoding",))
+            if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", ""):
+                response.streaming_content = compress_sequence(response.streaming_content)
+                response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    def get_csv_rows(self) -> Iterator[list]:
+        """Yield the CSV header and rows, the rows are fetched from a server side cursor in chunks."""
+        qs = self.filter_queryset(self.get_base_queryset())
 
         enable_template_creation_time = Settings.enable_template_creation_time()
 
-        writer = csv.writer(response)
         rows = [
             "Name",
             "Number of job executions",
@@ -350,8 +533,8 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
             "Savings",
         ]
 
-        writer.writerow(rows)
-        for job in qs:
+        yield rows
+        for job in qs.iterator(chunk_size=getattr(settings, "REPORT_CSV_CHUNK_SIZE", 2000)):
             row = [
                 job["name"],
                 job["runs"],
@@ -368,18 +551,10 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
                 round(job["manual_costs"], 2),
                 round(job["savings"], 2),
             ]
-            writer.writerow(row)
-
-        return response
+            yield row
 
     @extend_schema(
-        request=inline_serializer(
-            name="InlineFormPDFSerializer",
-            fields={
-                "job_chart": serializers.CharField(),
-                "host_chart": serializers.CharField(),
-            }
-        ),
+        request=PDF_REQUEST,
         responses={(200, "application/pdf"): bytes},
     )
     @action(methods=["post"], detail=False)
@@ -389,16 +564,130 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
             return Response(data={"error": "Date range is required for PDF generation."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        table_qs = self.filter_queryset(self.get_base_queryset())[:settings.MAX_PDF_JOB_TEMPLATES]
+        report = report_cache.get_or_set(
+            "pdf",
+            self.get_cache_key_data(request),
+            lambda: self.get_pdf_data(request, options))
+
+        context = self.get_pdf_context(
+            options,
+            report,
+            job_chart=request.data.get("job_chart", None),
+            host_chart=request.data.get("host_chart", None))
+
+        return WeasyTemplateResponse(
+            request,
+            template='report.html',
+            context=context,
+            filename='AAP_Automation_Dashboard_Report.PDF',
+            headers={
+                "Content-Disposition": PDF_CONTENT_DISPOSITION
+            })
+
+    @extend_schema(
+        request=PDF_REQUEST,
+        responses={202: PdfReportSerializer},
+    )
+    @action(methods=["post"], detail=False, url_path="pdf/export")
+    def pdf_export(self, request: Request) -> Response:
+        """Queue a PDF report rendered in the background, an identical report of the same data is reused."""
+        options = get_filter_options(request)
+        if options.date_range is None:
+            return Response(data={"error": "Date range is required for PDF generation."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        job_chart = request.data.get("job_chart", None) or ""
+        host_chart = request.data.get("host_chart", None) or ""
+        key = report_cache.current_key("pdf_export", {
+            **self.get_cache_key_data(request),
+            "currency": Settings.currency(),
+            "charts": hashlib.sha256(f"{job_chart}\n{host_chart}".encode()).hexdigest(),
+        })
+
+        report = None
+        if key is not None:
+            # Reports not rendered in time are failed by the data retention task, do not wait on them meanwhile.
+            timeout = getattr(settings, "REPORT_PDF_TIMEOUT_SECONDS", 1800)
+            report = (PdfReport.objects
+                      .filter(key=key)
+                      .exclude(status__in=[JobStatusChoices.FAILED, JobStatusChoices.ERROR, JobStatusChoices.CANCELED])
+                      .exclude(status__in=[JobStatusChoices.PENDING, JobStatusChoices.RUNNING],
+                               internal_created__lt=timezone.now() - timedelta(seconds=timeout))
+                      .order_by("-id")
+                      .first())
+        if report is None:
+            report = PdfReport.objects.create(
+                key=key,
+                query_params=request.query_params.urlencode(),
+                job_chart=job_chart,
+                host_chart=host_chart,
+            )
+            transaction.on_commit(lambda: self._submit_pdf_report(report))
+        return Response(data=PdfReportSerializer(report).data, status=status.HTTP_202_ACCEPTED)
+
+    @staticmethod
+    def _submit_pdf_report(report: PdfReport) -> None:
+        # The web server only publishes, dispatcherd is configured by the dispatcher service otherwise
+        setup_dispatcherd_publisher()
+        generate_pdf_report.apply_async(
+            [report.pk],
+            queue=settings.DISPATCHER_REPORT_CHANNEL,
+        )
+
+    @extend_schema(
+        parameters=[PDF_REPORT_ID_PARAMETER],
+        responses={200: PdfReportSerializer},
+    )
+    @action(methods=["get"], detail=False, url_path=r"pdf/export/(?P<report_id>\d+)")
+    def pdf_export_status(self, request: Request, report_id: int) -> Response:
+        report = get_object_or_404(PdfReport.objects.defer("content"), pk=report_id)
+        return Response(data=PdfReportSerializer(report).data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[PDF_REPORT_ID_PARAMETER],
+        responses={(200, "application/pdf"): bytes},
+    )
+    @action(methods=["get"], detail=False, url_path=r"pdf/export/(?P<report_id>\d+)/download")
+    def pdf_export_download(self, request: Request, report_id: int) -> HttpResponse | Response:
+        report = get_object_or_404(PdfReport, pk=report_id)
+        if report.status != JobStatusChoices.SUCCESSFUL:
+            return Response(data={"detail": f"PDF report is {report.status}."}, status=status.HTTP_409_CONFLICT)
+        return HttpResponse(
+            bytes(report.content),
+            content_type="application/pdf",
+            headers={"Content-Disposition": PDF_CONTENT_DISPOSITION},
+        )
 
+    @staticmethod
+    def get_currency_sign() -> str:
         currency_value = Settings.currency()
         currency_sign = "$"
         if settings is not None:
             _currency = Currency.objects.filter(pk=currency_value).first()
             if _currency is not None:
                 currency_sign = _currency.symbol if _currency.symbol else _currency.iso_code
+        return currency_sign
+
+    def get_pdf_context(self, options: QueryParams, report: dict, job_chart: str | None, host_chart: str | None) -> dict:
+        return {
+            **report,
+            "currency": self.get_currency_sign(),
+            "job_chart": job_chart,
+            "host_chart": host_chart,
+            "start_date": options.date_range.start.strftime('%Y-%m-%d'),
+            "end_date": options.date_range.end.strftime('%Y-%m-%d'),
+            "enable_template_creation_time": Settings.enable_template_creation_time()
+        }
 
+    def get_pdf_data(self, request: Request, options: QueryParams) -> dict:
+        table_qs = self.filter_queryset(self.get_base_queryset())[:settings.MAX_PDF_JOB_TEMPLATES]
         serializer = JobSerializer(table_qs, many=True)
+        return {
+            **self.get_pdf_summary(request, options),
+            "table_data": list(serializer.data),
+        }
+
+    def get_pdf_summary(self, request: Request, options: QueryParams) -> dict:
         details = self.get_details(request)
 
         options_data = OrderedDict()
@@ -417,23 +706,42 @@ class ReportsView(AdminOnlyViewSet, mixins.ListModelMixin, GenericViewSet):
                     "values": ", ".join([t.name for t in qs])
                 }
 
-        context = {
-            "table_data": serializer.data,
-            "details": details,
-            "currency": currency_sign,
-            "job_chart": request.data.get("job_chart", None),
-            "host_chart": request.data.get("host_chart", None),
-            "start_date": options.date_range.start.strftime('%Y-%m-%d'),
-            "end_date": options.date_range.end.strftime('%Y-%m-%d'),
+        return {
+            "details": details.model_dump(),
             "filters": options_data,
-            "enable_template_creation_time": Settings.enable_template_creation_time()
         }
 
-        return WeasyTemplateResponse(
-            request,
-            template='report.html',
-            context=context,
-            filename='AAP_Automation_Dashboard_Report.PDF',
-            headers={
-                "Content-Disposition": 'attachment; filename="AAP_Automation_Dashboard_Report.pdf"'
-            })
+    @classmethod
+    def from_query_params(cls, query_params: str, action: str) -> "ReportsView":
+        """A view answering a GET request of the url encoded query params, to compute reports outside of requests."""
+        http_request = HttpRequest()
+        http_request.method = "GET"
+        http_request.GET = QueryDict(query_params)
+        return cls(request=Request(http_request), format_kwarg=None, action=action)
+
+    @classmethod
+    def render_pdf_report(cls, report: PdfReport) -> bytes:
+        """
+        Render a queued PDF report outside of a request. The table is read from a server side cursor and
+        rendered in chunks of REPORT_PDF_CHUNK_SIZE rows, so it is not capped at MAX_PDF_JOB_TEMPLATES.
+        """
+        view = cls.from_query_params(report.query_params, action="pdf")
+        request = view.request
+        options = get_filter_options(request)
+
+        context = view.get_pdf_context(
+            options,
+            view.get_pdf_summary(request, options),
+            job_chart=report.job_chart or None,
+            host_chart=report.host_chart or None)
+
+        chunk_size = getattr(settings, "REPORT_PDF_CHUNK_SIZE", 500)
+        rows = view.filter_queryset(view.get_base_queryset()).iterator(chunk_size=chunk_size)
+
+        def contexts():
+            chunks = batched(rows, chunk_size)
+            yield {**context, "table_data": JobSerializer(next(chunks, ()), many=True).data}
+            for chunk in chunks:
+                yield {**context, "table_data": JobSerializer(chunk, many=True).data, "table_only": True}
+
+        return render_pdf('report.html', contexts())
@@ -5,7 +5,9 @@ from rest_framework.viewsets import GenericViewSet
 
 from backend.api.v1.mixins import AdminOnlyViewSet
 from backend.api.v1.template.serializers import TemplatesSerializer, JobTemplateSerializer
+from backend.apps.clusters.cache import report_cache
 from backend.apps.clusters.models import JobTemplate
+from backend.common.pagination import NameKeysetPagination
 
 
 class TemplateView(
@@ -19,6 +21,7 @@ class TemplateView(
 
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
 
+    pagination_class = NameKeysetPagination
     search_fields = ["name"]
     ordering = ["name"]
 
@@ -29,3 +32,7 @@ class TemplateView(
 
     def get_queryset(self) -> QuerySet[JobTemplate]:
         return JobTemplate.objects.all()
+
+    def perform_update(self, serializer: TemplatesSerializer) -> None:
+        super().perform_update(serializer)
+        report_cache.bump_data_version()
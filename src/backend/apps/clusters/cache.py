@@ -0,0 +1,271 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable
+
+import redis
+from django.conf import settings
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger("automation_dashboard.clusters.cache")
+
+
+class DimensionCache:
+    """
+    Per-process LRU cache of dimension models (organizations, job templates, hosts, ...)
+    resolved by create_or_update. Entries are keyed on (model, cluster_id, generation,
+    external_id) and store a hash of the fields last written, so a lookup with identical AAP
+    data returns the cached instance without touching the database.
+
+    The generation is a per cluster counter in Redis. Processes writing dimension rows outside
+    the parser (sync_common) bump it once their transaction commits, which makes the entries of
+    every process unreachable at once. Entries are stored under the generation read before the
+    row was written, so a bump racing with a parse never leaves a stale row reachable. Entries
+    also expire after a TTL, and the cache is bypassed while Redis is unavailable.
+    """
+    GENERATION_KEY = "automation_dashboard_dimension_generation"
+
+    def __init__(self, max_size=None, ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._client = None
+
+    @property
+    def max_size(self):
+        return self._max_size if self._max_size is not None else getattr(settings, "DIMENSION_CACHE_MAX_SIZE", 10000)
+
+    @property
+    def ttl(self):
+        return self._ttl if self._ttl is not None else getattr(settings, "DIMENSION_CACHE_TTL", 300)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.BROKER_URL, socket_connect_timeout=1, socket_timeout=1)
+        return self._client
+
+    def generation(self, cluster_id) -> int | None:
+        """
+        Current generation of the cluster entries, None when the cache is disabled or Redis is
+        unavailable. Read it before querying the rows that get cached.
+        """
+        if not self.enabled:
+            return None
+        try:
+            return int(self.client.get(f"{self.GENERATION_KEY}:{cluster_id}") or 0)
+        except redis.RedisError as e:
+            logger.warning(f"Dimension cache unavailable, resolving rows from the database: {e}")
+            return None
+
+    def _bump(self, cluster_id):
+        try:
+            self.client.incr(f"{self.GENERATION_KEY}:{cluster_id}")
+        except redis.RedisError as e:
+            # The entries of other processes stay reachable until they expire.
+            logger.warning(f"Failed to bump dimension cache generation of cluster {cluster_id}: {e}")
+        self.clear(cluster_id)
+
+    def bump_generation(self, cluster_id):
+        """Invalidate the cluster entries of every process once the surrounding transaction commits."""
+        transaction.on_commit(lambda: self._bump(cluster_id))
+
+    @staticmethod
+    def _key(model, cluster_id, generation, external_id):
+        return model._meta.label, cluster_id, generation, external_id
+
+    @staticmethod
+    def content_hash(fields: dict) -> int:
+        return hash(tuple(sorted(fields.items())))
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, model, cluster_id, generation, external_id, fields: dict):
+        """Return the cached instance if it was last written with the same fields, else None."""
+        if generation is None:
+            return None
+        key = self._key(model, cluster_id, generation, external_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            content_hash, instance, modified, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            if content_hash != self.content_hash(fields):
+                return None
+            if getattr(instance, "internal_modified", None) != modified:
+                # The shared instance was saved again since it was cached, its fields may differ from the hash.
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return instance
+
+    def _set(self, key, content_hash, instance):
+        with self._lock:
+            self._entries[key] = (content_hash, instance, getattr(instance, "internal_modified", None),
+                                  time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set(self, model, cluster_id, generation, external_id, fields: dict, instance):
+        """Cache the instance once the surrounding transaction commits, rolled back rows are never cached."""
+        if generation is None:
+            return
+        key = self._key(model, cluster_id, generation, external_id)
+        content_hash = self.content_hash(fields)
+        transaction.on_commit(lambda: self._set(key, content_hash, instance))
+
+    def invalidate(self, model, cluster_id, external_id):
+        """Drop the entry of this process, other processes only see a bump_generation."""
+        with self._lock:
+            for key in [key for key in self._entries
+                        if key[0] == model._meta.label and key[1] == cluster_id and key[3] == external_id]:
+                del self._entries[key]
+
+    def clear(self, cluster_id=None):
+        with self._lock:
+            if cluster_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[1] == cluster_id]:
+                del self._entries[key]
+        logger.info(f"Dimension cache cleared for cluster {cluster_id}.")
+
+    @contextmanager
+    def clear_on_error(self, cluster_id):
+        """Drop the cluster entries when a write fails, a stale entry (e.g. a deleted row) may be the cause."""
+        try:
+            yield
+        except Exception:
+            self.clear(cluster_id)
+            raise
+
+
+dimension_cache = DimensionCache()
+
+
+class ReportCache:
+    """
+    Redis cache of computed report results. Keys embed a data version counter, parsing jobs
+    or editing costs and templates bumps the version, so every cached report becomes
+    unreachable at once and simply expires. Results are stored as JSON, the way the API renders
+    them. Concurrent requests for a missing entry wait up to LOCK_WAIT seconds for the first one
+    to compute it instead of all querying the database. Redis errors are logged and the report
+    is computed directly.
+    """
+    KEY_PREFIX = "automation_dashboard_report"
+    VERSION_KEY = f"{KEY_PREFIX}_data_version"
+    LOCK_TIMEOUT = 60
+    LOCK_WAIT = 5
+    POLL_INTERVAL = 0.1
+
+    def __init__(self):
+        self._client = None
+
+    @property
+    def enabled(self):
+        return getattr(settings, "REPORT_CACHE_ENABLED", True)
+
+    @property
+    def timeout(self):
+        return getattr(settings, "REPORT_CACHE_TIMEOUT", 3600)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.Redis.from_url(settings.BROKER_URL, socket_connect_timeout=1, socket_timeout=1)
+        return self._client
+
+    def data_version(self) -> int:
+        return int(self.client.get(self.VERSION_KEY) or 0)
+
+    def _bump(self):
+        try:
+            self.client.incr(self.VERSION_KEY)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to bump report data version: {e}")
+
+    def bump_data_version(self):
+        """Invalidate cached reports once the surrounding transaction commits."""
+        if not self.enabled:
+            return
+        transaction.on_commit(self._bump)
+
+    def key(self, name: str, key_data, version: int) -> str:
+        digest = hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{self.KEY_PREFIX}:{version}:{name}:{digest}"
+
+    def current_key(self, name: str, key_data) -> str | None:
+        """Key of the key data at the current data version, None when the cache is disabled or unavailable."""
+        if not self.enabled:
+            return None
+        try:
+            return self.key(name, key_data, self.data_version())
+        except redis.RedisError as e:
+            logger.warning(f"Report cache unavailable, not reusing {name} reports: {e}")
+            return None
+
+    @staticmethod
+    def _loads(value):
+        if value is None:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable cached report: {e}")
+            return None
+
+    def _wait_for(self, key, lock_key):
+        deadline = time.monotonic() + self.LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+            value = self.client.get(key)
+            if value is not None:
+                return value
+            if not self.client.exists(lock_key):
+                return None
+        return None
+
+    def get_or_set(self, name: str, key_data, compute: Callable[[], Any]):
+        """Return the cached result of compute for the key data, computing and storing it on a miss."""
+        if not self.enabled:
+            return compute()
+        try:
+            key = self.key(name, key_data, self.data_version())
+            cached = self._loads(self.client.get(key))
+            if cached is not None:
+                return cached
+            lock_key = f"{key}:lock"
+            if not self.client.set(lock_key, 1, nx=True, ex=self.LOCK_TIMEOUT):
+                # Another request is computing the same report.
+                cached = self._loads(self._wait_for(key, lock_key))
+                return cached if cached is not None else compute()
+        except redis.RedisError as e:
+            logger.warning(f"Report cache unavailable, computing {name} report directly: {e}")
+            return compute()
+
+        try:
+            result = compute()
+            self.client.set(key, json.dumps(result, cls=JSONEncoder), ex=self.timeout)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to cache {name} report: {e}")
+        finally:
+            try:
+                self.client.delete(lock_key)
+            except redis.RedisError:
+                pass
+        return result
+
+
+report_cache = ReportCache()
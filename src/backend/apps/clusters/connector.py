@@ -1,15 +1,25 @@
 import datetime
 import json
 import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlsplit
 
 import pytz
 import requests
 import urllib3
 from django.conf import settings
-from django.db import transaction
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils.timezone import now
+from dispatcherd.worker.exceptions import DispatcherCancel
+from pydantic import ValidationError
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 
+from backend.apps.clusters.cache import dimension_cache
 from backend.apps.clusters.encryption import decrypt_value, encrypt_value
 from backend.apps.clusters.models import (
     ClusterSyncData,
@@ -19,10 +29,19 @@ from backend.apps.clusters.models import (
     Organization, ClusterVersionChoices
 )
 from backend.apps.clusters.exceptions import InvalidClusterVersionError, UnsupportedProductError
-from backend.apps.clusters.schemas import ClusterSchema
+from backend.apps.clusters.parser import BatchDataParser
+from backend.apps.clusters.schemas import ClusterSchema, ExternalJobSchema
 
 logger = logging.getLogger("automation_dashboard.clusters.connector")
 
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Synced types of sync_common with their model, API path and page size.
+SYNC_COMMON = {
+    'organization': (Organization, 'organizations', 100),
+    'job_template': (JobTemplate, 'job_templates', 200),
+}
+
 
 class ApiConnector:
 
@@ -43,6 +62,9 @@ class ApiConnector:
 
         self.access_token = decrypt_value(cluster.access_token)
         logger.debug(f"Access token decrypted for cluster: {cluster.__str__()}")
+        # Host summaries can be fetched from several threads, only one of them may refresh the token.
+        self._reauthorize_lock = threading.Lock()
+        self.session = self._create_session()
 
         try:
             cluster_sync_data = ClusterSyncStatus.objects.get(cluster=self.cluster)
@@ -52,6 +74,11 @@ class ApiConnector:
             cluster_sync_data = ClusterSyncStatus(cluster=self.cluster)
         self.cluster_sync_data = cluster_sync_data
 
+        # Direct ingest parses jobs in batches as they are fetched instead of staging them in ClusterSyncData.
+        self.direct_ingest = getattr(settings, "SYNC_DIRECT_INGEST", False)
+        self.direct_ingest_batch_size = getattr(settings, "SYNC_DIRECT_INGEST_BATCH_SIZE", 100)
+        self._ingest_buffer = []
+
         self.until = until
 
         if self.managed:
@@ -86,6 +113,36 @@ class ApiConnector:
                                                        datetime.datetime.min.time()).astimezone(pytz.UTC)
                 logger.info(f"Initial sync since: {self.since}")
 
+    def _create_session(self):
+        # Connections to the cluster are kept alive and reused for all pages and host summaries,
+        # idempotent GET requests are retried with backoff on throttling and server errors.
+        retry = Retry(
+            total=getattr(settings, "AAP_HTTP_MAX_RETRIES", 3),
+            backoff_factor=getattr(settings, "AAP_HTTP_BACKOFF_FACTOR", 0.5),
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        pool_maxsize = max(
+            getattr(settings, "AAP_HTTP_POOL_MAXSIZE", 10),
+            getattr(settings, "SYNC_HOST_SUMMARIES_CONCURRENCY", 1),
+        )
+        session = requests.Session()
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        session.mount(self.cluster.base_url, HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry))
+        logger.debug(f"HTTP session created with pool size {pool_maxsize}.")
+        return session
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     @property
     def headers(self):
         logger.debug("Generating request headers.")
@@ -113,7 +170,7 @@ class ApiConnector:
         auth = HTTPBasicAuth(client_id, client_secret)
         logger.debug(f"Token refresh POST data: {data}")
         try:
-            response = requests.post(
+            response = self.session.post(
                 url=url,
                 data=data,
                 auth=auth,
@@ -139,13 +196,14 @@ class ApiConnector:
         return True
 
     def _get_request(self, url, timeout=None):
-        return requests.get(
+        return self.session.get(
             url=url,
             verify=self.cluster.verify_ssl,
             timeout=timeout if timeout is not None else self.timeout,
             headers=self.headers)
 
     def _get_with_reauth(self, url, timeout=None):
+        access_token = self.access_token
         # try 1st time
         try:
             response = self._get_request(url, timeout)
@@ -159,6 +217,8 @@ class ApiConnector:
             if isinstance(e_inner, str) and e_inner.startswith("Connection refused by Responses - "):
                 raise
             # end mock testing block ------------------------
+            logger.exception('GET request failed')
+            return None
         except requests.exceptions.RequestException:
             logger.exception('GET request failed')
             return None
@@ -170,7 +230,11 @@ class ApiConnector:
         if response.status_code != 401:
             return response
         logger.info("401 received, attempting re-authentication.")
-        self._reauthorize()
+        with self._reauthorize_lock:
+            if self.access_token == access_token:
+                self._reauthorize()
+            else:
+                logger.info("Access token already refreshed by another request.")
 
         try:
             response = self._get_request(url, timeout)
@@ -244,26 +308,48 @@ class ApiConnector:
                 yield result
 
     def sync_common(self, sync_type):
+        """
+        Sync organizations or job templates modified in AAP after the last synced modified time. Every
+        SYNC_COMMON_RECONCILE_SECONDS all of them are listed instead, which removes job templates deleted
+        in AAP and picks up changes an incremental listing missed.
+        """
         logger.info(f"Starting sync_common for type: {sync_type}")
-        if sync_type == 'organization':
-            endpoint = f'{self.cluster.api_url}/organizations/?page_size=100&page=1'
-            qs = Organization.objects.filter(cluster=self.cluster)
-        elif sync_type == 'job_template':
-            endpoint = f'{self.cluster.api_url}/job_templates/?page_size=200&page=1'
-            qs = JobTemplate.objects.filter(cluster=self.cluster)
-        else:
+        if sync_type not in SYNC_COMMON:
             logger.error(f"Sync type {sync_type} not implemented.")
             raise NotImplementedError
+        model, path, page_size = SYNC_COMMON[sync_type]
+        qs = model.objects.filter(cluster=self.cluster)
+
+        watermark = getattr(self.cluster_sync_data, f"{sync_type}_modified")
+        reconciled = getattr(self.cluster_sync_data, f"{sync_type}_reconciled")
+        reconcile_seconds = getattr(settings, "SYNC_COMMON_RECONCILE_SECONDS", 3600)
+        started = now()
+        reconcile = (watermark is None or reconciled is None
+                     or reconciled <= started - datetime.timedelta(seconds=reconcile_seconds))
+        if reconcile:
+            logger.info(f"Listing all of {sync_type} to reconcile.")
+            endpoint = f'{self.cluster.api_url}/{path}/?page_size={page_size}&page=1'
+        else:
+            modified = watermark.isoformat().replace('+00:00', 'Z')
+            logger.info(f"Listing {sync_type} modified after {modified}.")
+            endpoint = f'{self.cluster.api_url}/{path}/?page_size={page_size}&page=1&order_by=modified&modified__gt={modified}'
         response = self.execute_get(endpoint)
-        response_data = []
-        db_organizations = {}
-        if sync_type == 'job_template':
-            db_organizations = {org.external_id: org for org in Organization.objects.filter(cluster=self.cluster)}
-        db_data = {data.external_id: data for data in qs}
+        synced_ids = set()
+        written = False
 
         for results in response:
+            results = list(results)
+            db_data = {data.external_id: data for data in qs.filter(external_id__in=[result["id"] for result in results])}
+            db_organizations = {}
+            if sync_type == 'job_template':
+                external_organizations = {
+                    result.get("summary_fields", {}).get("organization", {}).get("id", None) for result in results}
+                db_organizations = {
+                    org.external_id: org
+                    for org in Organization.objects.filter(cluster=self.cluster, external_id__in=external_organizations - {None})}
+
             for result in results:
-                db_item = db_data.pop(result["id"], None)
+                db_item = db_data.get(result["id"], None)
                 logger.debug(f"Processing item: {result['id']}")
                 if sync_type == 'job_template':
                     external_organization = result.get("summary_fields", {}).get("organization", {}).get("id", None)
@@ -275,16 +361,20 @@ class ApiConnector:
                     organization = None
 
                 if db_item is not None:
-                    logger.info(f"Updating {sync_type} {db_item.name}")
-                    db_item.name = result["name"]
-                    db_item.description = result["description"]
+                    fields = {"name": result["name"], "description": result["description"]}
                     if sync_type == 'job_template':
-                        db_item.organization = organization
-                    db_item.save()
+                        fields["organization_id"] = organization.pk if organization else None
+                    if db_item.update_changed_fields(**fields):
+                        logger.info(f"Updated {sync_type} {db_item.name}")
+                        written = True
+                    else:
+                        logger.debug(f"Unchanged {sync_type} {db_item.name}")
                 else:
                     logger.info(f"Creating new {sync_type} {result['name']}")
+                    written = True
                     if sync_type == 'job_template':
-                        obj, created = JobTemplate.objects.update_or_create(
+                        # A template recreated in AAP under the same name takes over the row of the old one.
+                        JobTemplate.objects.update_or_create(
                             cluster=self.cluster,
                             name=result["name"],
                             organization=organization,
@@ -293,10 +383,6 @@ class ApiConnector:
                                 "external_id": result["id"],
                             },
                         )
-                        if not created:
-                            # ponytail: Template existed under a different external_id (Controller
-                            # recreated with same name). Drop stale key so cleanup doesn't orphan it.
-                            db_data = {k: v for k, v in db_data.items() if v.pk != obj.pk}
                     elif sync_type == 'organization':
                         Organization.objects.update_or_create(
                             cluster=self.cluster,
@@ -306,26 +392,62 @@ class ApiConnector:
                                 "external_id": result["id"],
                             },
                         )
-                response_data.append(result["id"])
-        if sync_type == 'job_template':
-            skipped_count = 0
-            for key, value in db_data.items():
-                count = Job.objects.filter(job_template_id=value.id, cluster_id=value.cluster_id).count()
-                if count == 0:
-                    logger.info(f"Deleting job template {value.name} with id {value.id}")
-                    value.delete()
-                else:
-                    skipped_count += 1
-
-            if skipped_count > 0:
-                logger.info(f"Skipped deletion of {skipped_count} templates deleted from AAP but DB retains them with job references")
+                synced_ids.add(result["id"])
+                if result.get("modified"):
+                    modified = datetime.datetime.fromisoformat(result["modified"]).astimezone(datetime.timezone.utc)
+                    watermark = modified if watermark is None else max(watermark, modified)
+
+        fields = {f"{sync_type}_modified": watermark}
+        if reconcile:
+            if sync_type == 'job_template' and self._delete_job_templates(synced_ids):
+                written = True
+            fields[f"{sync_type}_reconciled"] = started
+        if written:
+            # Rows written here must not be served from the dimension cache of any parse worker.
+            dimension_cache.bump_generation(self.cluster.pk)
+        self._update_sync_status(**fields)
+
+    def _delete_job_templates(self, synced_ids) -> bool:
+        """
+        Delete the job templates missing from a full listing, unless jobs still reference them.
+        Returns whether any job template was deleted.
+        """
+        stale_ids = [pk for external_id, pk in JobTemplate.objects.filter(cluster=self.cluster).values_list("external_id", "pk")
+                     if external_id not in synced_ids]
+        if not stale_ids:
+            return False
+        stale = (JobTemplate.objects
+                 .filter(pk__in=stale_ids)
+                 .annotate(has_jobs=Exists(Job.objects.filter(job_template=OuterRef("pk"))))
+                 .values_list("pk", "name", "has_jobs"))
+        delete_ids = []
+        skipped_count = 0
+        for pk, name, has_jobs in stale:
+            if has_jobs:
+                skipped_count += 1
+                continue
+            logger.info(f"Deleting job template {name} with id {pk}")
+            delete_ids.append(pk)
+        if delete_ids:
+            JobTemplate.objects.filter(pk__in=delete_ids).delete()
+        if skipped_count > 0:
+            logger.info(f"Skipped deletion of {skipped_count} templates deleted from AAP but DB retains them with job references")
+        return bool(delete_ids)
+
+    def _update_sync_status(self, **fields):
+        if self.cluster_sync_data.pk is None:
+            self.cluster_sync_data, _ = ClusterSyncStatus.objects.get_or_create(cluster=self.cluster)
+        # Only the given fields are written, backfill slices move last_job_finished_date concurrently.
+        ClusterSyncStatus.objects.filter(pk=self.cluster_sync_data.pk).update(**fields, internal_modified=now())
+        for name, value in fields.items():
+            setattr(self.cluster_sync_data, name, value)
 
     def ping(self, ping_url):
         logger.info(f'Pinging api {self.cluster.base_url}{ping_url}')
         url = f'{self.cluster.base_url}{ping_url}'
         timeout = 5
         try:
-            response = requests.get(
+            response = self.session.get(
                 url=url,
                 verify=self.cluster.verify_ssl,
                 timeout=timeout,
@@ -374,33 +496,136 @@ class ApiConnector:
         logger.info(f'Detected AAP version {aap_version} at {self.cluster.base_url}')
         return True
 
-    def sync_jobs(self):
-        logger.info("Starting job sync.")
-        for job in self.jobs:
-            logger.info("Checking status of job %s", job)
-            job_id = job.get("id", None)
-            finished = job.get("finished", None)
-            if job_id is None or finished is None:
-                logger.warning(f"Missing id or finished date time in job: {job}")
-                continue
-            if job.get("started") is None:
-                logger.info(f"Job {job_id} has null started time (status={job.get('status')}); ingesting with started=None")
-            try:
-                finished = datetime.datetime.fromisoformat(finished).astimezone(datetime.timezone.utc)
-            except ValueError:
-                logger.error(f"Invalid finished date format for job: {finished}")
-                raise TypeError(f"finished must be of type datetime.datetime job: {finished}")
+    def _job_finished(self, job):
+        job_id = job.get("id", None)
+        finished = job.get("finished", None)
+        if job_id is None or finished is None:
+            logger.warning(f"Missing id or finished date time in job: {job}")
+            return None
+        if job.get("started") is None:
+            logger.info(f"Job {job_id} has null started time (status={job.get('status')}); ingesting with started=None")
+        try:
+            return datetime.datetime.fromisoformat(finished).astimezone(datetime.timezone.utc)
+        except ValueError:
+            logger.error(f"Invalid finished date format for job: {finished}")
+            raise TypeError(f"finished must be of type datetime.datetime job: {finished}")
 
-            job["host_summaries"] = []
-            logger.info(f"Job {job_id} retrieving host summaries.")
+    @staticmethod
+    def _fetch_host_summaries(host_summaries):
+        try:
+            return list(host_summaries)
+        finally:
+            # Token refresh saves the cluster from the worker thread, do not leak its connection.
+            connections.close_all()
+
+    def _update_last_job_finished_date(self, finished):
+        if self.cluster_sync_data.pk is None:
+            self.cluster_sync_data, created = ClusterSyncStatus.objects.get_or_create(
+                cluster=self.cluster, defaults={"last_job_finished_date": finished})
+            if created:
+                return
+        # Backfill slices sync concurrently, only move the watermark forward in the database.
+        ClusterSyncStatus.objects.filter(
+            Q(last_job_finished_date__lt=finished) | Q(last_job_finished_date__isnull=True),
+            pk=self.cluster_sync_data.pk,
+        ).update(last_job_finished_date=finished, internal_modified=now())
+        last_job_finished_date = self.cluster_sync_data.last_job_finished_date
+        if last_job_finished_date is None or finished > last_job_finished_date:
+            self.cluster_sync_data.last_job_finished_date = finished
+
+    def _flush_ingest_buffer(self):
+        if not self._ingest_buffer:
+            return
+        jobs = [job for job, _, _ in self._ingest_buffer]
+        finished = max(finished for _, _, finished in self._ingest_buffer)
+        logger.info(f"Ingesting {len(jobs)} jobs.")
+        try:
+            with transaction.atomic():
+                BatchDataParser(self.cluster, jobs).parse()
+                # The watermark only moves past jobs that are committed.
+                self._update_last_job_finished_date(finished)
+        except DispatcherCancel:
+            raise
+        except Exception:
+            # A single job the database rejects must not fail the sync, stage the batch so every
+            # job is parsed by its own parse job, the same as staged sync.
+            logger.exception(f"Failed to ingest {len(jobs)} jobs, staging them in ClusterSyncData.")
+            with transaction.atomic():
+                for _, data, _ in self._ingest_buffer:
+                    ClusterSyncData.objects.create(cluster=self.cluster, data=data)
+                self._update_last_job_finished_date(finished)
+        self._ingest_buffer = []
+
+    def _save_job(self, job, finished, host_summaries):
+        job_id = job["id"]
+        job["host_summaries"] = host_summaries
+        if self.direct_ingest:
+            try:
+                self._ingest_buffer.append((ExternalJobSchema(**job), job, finished))
+            except ValidationError:
+                # Keep the raw data of jobs the parser can not read, the same as staged sync.
+                logger.exception(f"Job {job_id} data is not valid, staging it in ClusterSyncData.")
+                self._flush_ingest_buffer()
+            else:
+                if len(self._ingest_buffer) >= self.direct_ingest_batch_size:
+                    self._flush_ingest_buffer()
+                return
 
-            for host_summary in self.job_host_summaries(job_id):
-                logger.debug(f"Appending host summary for job {job_id}: {host_summary.get('id')}")
-                job["host_summaries"].append(host_summary)
+        with transaction.atomic():
+            logger.info(f"Job {job_id} saving data.")
+            self._update_last_job_finished_date(finished)
+            ClusterSyncData.objects.create(cluster=self.cluster, data=job)
+            logger.debug(f"Job {job_id} data saved.")
 
-            with transaction.atomic():
-                logger.info(f"Job {job_id} saving data.")
-                self.cluster_sync_data.last_job_finished_date = finished if self.cluster_sync_data.last_job_finished_date is None or finished > self.cluster_sync_data.last_job_finished_date else self.cluster_sync_data.last_job_finished_date
-                self.cluster_sync_data.save()
-                ClusterSyncData.objects.create(cluster=self.cluster, data=job)
-                logger.debug(f"Job {job_id} data saved.")
+    def sync_jobs(self):
+        logger.info("Starting job sync.")
+        try:
+            self._sync_jobs()
+        except TypeError:
+            self._flush_ingest_buffer()
+            raise
+        self._flush_ingest_buffer()
+
+    def _sync_jobs(self):
+        concurrency = getattr(settings, "SYNC_HOST_SUMMARIES_CONCURRENCY", 1)
+        if concurrency <= 1:
+            for job in self.jobs:
+                logger.info("Checking status of job %s", job)
+                finished = self._job_finished(job)
+                if finished is None:
+                    continue
+                logger.info(f"Job {job['id']} retrieving host summaries.")
+                self._save_job(job, finished, list(self.job_host_summaries(job["id"])))
+            return
+
+        # Host summaries of the next jobs are fetched while the oldest one is saved. Jobs are saved
+        # strictly in finished order, so last_job_finished_date never skips over an unsaved job.
+        pending = deque()
+
+        def save_oldest():
+            _job, _finished, _future = pending.popleft()
+            self._save_job(_job, _finished, _future.result())
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="host_summaries") as executor:
+            try:
+                for job in self.jobs:
+                    logger.info("Checking status of job %s", job)
+                    try:
+                        finished = self._job_finished(job)
+                    except TypeError:
+                        # Same as the serial sync, jobs listed before the invalid one are saved.
+                        while pending:
+                            save_oldest()
+                        raise
+                    if finished is None:
+                        continue
+                    logger.info(f"Job {job['id']} retrieving host summaries.")
+                    future = executor.submit(self._fetch_host_summaries, self.job_host_summaries(job["id"]))
+                    pending.append((job, finished, future))
+                    if len(pending) >= concurrency:
+                        save_oldest()
+                while pending:
+                    save_oldest()
+            finally:
+                for _, _, future in pending:
+                    future.cancel()
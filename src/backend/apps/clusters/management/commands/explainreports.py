@@ -0,0 +1,71 @@
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from backend.api.v1.report.filters import get_filter_options
+from backend.api.v1.report.views import ReportsView
+from backend.apps.clusters.models import DateRangeChoices, Job, JobHostSummary, JobLabel, JobTemplate, Label
+
+REPORT_INDEXES = [index.name for index in Job._meta.indexes if index.name.startswith('job_report_')] + \
+                 [index.name for index in JobLabel._meta.indexes + JobHostSummary._meta.indexes]
+
+
+class Command(BaseCommand):
+    help = "Print the query plans of the reports read from jobs, to compare them before and after index changes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-range',
+                            dest='date_range',
+                            action='store',
+                            choices=[choice for choice in DateRangeChoices.values if choice != DateRangeChoices.CUSTOM],
+                            default=DateRangeChoices.LAST_YEAR,
+                            help='Date range of the reports (default last_year)')
+
+        parser.add_argument('--no-analyze',
+                            dest='analyze',
+                            action='store_false',
+                            help='Only plan the queries, do not run them')
+
+        parser.add_argument('--compare',
+                            dest='compare',
+                            action='store_true',
+                            help='Also plan the queries without the report indexes, dropped in a transaction that is '
+                                 'rolled back. This locks the job tables, run it against a copy of the database.')
+
+    def report_queries(self, date_range):
+        params = {
+            "report": {},
+            "report by job template": {"job_template": JobTemplate.objects.order_by('id').values_list('id', flat=True).first()},
+            "report by label": {"label": Label.objects.order_by('id').values_list('id', flat=True).first()},
+        }
+        # The daily rollup answers date range reports without reading jobs, plan the job queries it replaces.
+        with override_settings(REPORT_ROLLUP_ENABLED=False):
+            for name, filters in params.items():
+                query_params = {"date_range": date_range, **{key: value for key, value in filters.items() if value is not None}}
+                view = ReportsView.from_query_params(urlencode(query_params), action="list")
+                yield name, view.filter_queryset(view.get_base_queryset())
+                yield f"unique hosts of {name}", view.get_unique_hosts_queryset(get_filter_options(view.request))
+
+    def explain(self, date_range, analyze):
+        for name, queryset in self.report_queries(date_range):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {name} =='))
+            self.stdout.write(queryset.explain(analyze=analyze, buffers=analyze))
+            self.stdout.write('')
+
+    def handle(self, *args, **options):
+        date_range = options['date_range']
+        analyze = options['analyze']
+
+        self.stdout.write(self.style.SUCCESS(f'Report query plans, date range {date_range}:'))
+        self.explain(date_range, analyze)
+
+        if options['compare']:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for index in REPORT_INDEXES:
+                        cursor.execute(f'DROP INDEX IF EXISTS {connection.ops.quote_name(index)}')
+                self.stdout.write(self.style.SUCCESS(f'Report query plans without indexes {", ".join(REPORT_INDEXES)}:'))
+                self.explain(date_range, analyze)
+                transaction.set_rollback(True)
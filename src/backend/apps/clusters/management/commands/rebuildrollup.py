@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from backend.apps.clusters.cache import report_cache
+from backend.apps.clusters.models import JobDailyRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily job rollup and host sketches used by reports from synced jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cluster',
+                            dest='cluster',
+                            action='store',
+                            type=int,
+                            help='Rebuild only the rollup of the cluster with this ID')
+        parser.add_argument('--batch-days',
+                            dest='batch_days',
+                            action='store',
+                            type=int,
+                            default=31,
+                            help='Days of a cluster rebuilt per transaction (default 31)')
+
+    def handle(self, *args, **options):
+        JobDailyRollup.rebuild(cluster_id=options.get('cluster'), batch_days=options['batch_days'])
+        report_cache.bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {JobDailyRollup.objects.count()} daily rollup rows.'))
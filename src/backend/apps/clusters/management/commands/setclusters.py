@@ -120,9 +120,9 @@ class Command(BaseCommand):
 
                 new_cluster.save()
 
-                connector = ApiConnector(cluster=Cluster.objects.get(pk=new_cluster.pk))
                 try:
-                    connector.check_aap_version()
+                    with ApiConnector(cluster=Cluster.objects.get(pk=new_cluster.pk)) as connector:
+                        connector.check_aap_version()
                 except Exception as ex:
                     self.stdout.write(self.style.ERROR('Error connecting AAP connector: {}'.format(ex)))
                     transaction.set_rollback(True)
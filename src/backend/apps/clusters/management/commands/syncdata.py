@@ -1,15 +1,18 @@
 import json
 import sys
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import django
 import urllib3
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from backend.apps.clusters.models import Cluster, JobLaunchTypeChoices
+from backend.apps.clusters.models import Cluster, JobLaunchTypeChoices, JobStatusChoices
 from backend.apps.scheduler.models import SyncJob, JobTypeChoices
 
+SLICE_CHOICES = ('month', 'week', 'day')
+ACTIVE_STATUSES = (JobStatusChoices.PENDING, JobStatusChoices.WAITING, JobStatusChoices.RUNNING)
+
 
 class Command(BaseCommand):
     help = "Sync AAP instances data"
@@ -25,6 +28,18 @@ class Command(BaseCommand):
                             action='store',
                             help='End date for sync (e.g. --until=2025-12-21)')
 
+        parser.add_argument('--slice',
+                            dest='slice',
+                            action='store',
+                            choices=SLICE_CHOICES,
+                            help='Split the interval into month, week or day slices synced by separate jobs')
+
+        parser.add_argument('--parallel',
+                            dest='parallel',
+                            action='store',
+                            type=int,
+                            help='Number of slices synced concurrently (default 1, implies --slice=month)')
+
     def handle(self, *args, **options):
 
         if not settings.SHOW_URLLIB3_INSECURE_REQUEST_WARNING:
@@ -49,17 +64,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR('Start date is greater than end date'))
             sys.exit(1)
 
-        args = {
-            'since': since.isoformat() if since is not None else None,
-            'until': until.isoformat() if until is not None else None,
-            'managed': True
-        }
-
-        job_args = None
-        try:
-            job_args = json.dumps(args)
-        except TypeError as e:
-            self.stdout.write(self.style.ERROR('Error parsing arguments: {}'.format(e)))
+        slice_by = options.get('slice') or None
+        parallel = options.get('parallel') or None
+        if parallel is not None and slice_by is None:
+            slice_by = 'month'
+        if slice_by is not None and (since is None or until is None):
+            self.stdout.write(self.style.ERROR('Both "since" and "until" options are mandatory with --slice or --parallel.'))
+            sys.exit(1)
+        if parallel is not None and parallel < 1:
+            self.stdout.write(self.style.ERROR('--parallel must be a positive number.'))
+            sys.exit(1)
 
         try:
             cluster = Cluster.objects.first()
@@ -70,22 +84,109 @@ class Command(BaseCommand):
         if cluster is None:
             self.stdout.write(self.style.ERROR('Cluster instance does not exist.'))
             sys.exit(1)
-        name = "Sync historical data"
-        if since is not None:
-            name = "{} since {}".format(name, since.isoformat())
-        if until is not None:
-            name = "{} until {}".format(name, until.isoformat())
+
+        if slice_by is not None:
+            self.create_slices(cluster, since, until, slice_by, parallel or 1)
+            return
+
         job = SyncJob.objects.create(
-            name=name,
+            name=self.job_name(since, until),
             type=JobTypeChoices.SYNC_JOBS,
             launch_type=JobLaunchTypeChoices.MANUAL,
             cluster=cluster,
-            job_args=job_args
+            job_args=self.job_args(since, until)
         )
         job.signal_start()
 
         self.stdout.write(self.style.SUCCESS(f'Successfully created Sync task for Cluster {cluster}.'))
 
+    def create_slices(self, cluster, since, until, slice_by, parallel):
+        """
+        Create one managed sync job per time slice. Only `parallel` slices are started, the others stay
+        NEW and are started by AAPSyncTask as running slices finish. Slices synced successfully or still
+        queued by an earlier run are not created again, so an interrupted backfill resumes the missing ones.
+        """
+        queued = []
+        active = completed = 0
+        # Marks the slices of this backfill, AAPSyncTask only chains slices of the same backfill.
+        backfill = f'{since.isoformat()}/{until.isoformat()}/{slice_by}'
+        for slice_since, slice_until in self.split_range(since, until, slice_by):
+            job_args = self.job_args(slice_since, slice_until, backfill)
+            job = SyncJob.objects.filter(
+                cluster=cluster,
+                type=JobTypeChoices.SYNC_JOBS,
+                job_args=job_args,
+            ).exclude(
+                status__in=[JobStatusChoices.FAILED, JobStatusChoices.ERROR, JobStatusChoices.CANCELED],
+            ).order_by('-id').first()
+            if job is None:
+                job = SyncJob.objects.create(
+                    name=self.job_name(slice_since, slice_until),
+                    type=JobTypeChoices.SYNC_JOBS,
+                    launch_type=JobLaunchTypeChoices.MANUAL,
+                    cluster=cluster,
+                    job_args=job_args
+                )
+            if job.status == JobStatusChoices.SUCCESSFUL:
+                completed += 1
+            elif job.status in ACTIVE_STATUSES:
+                active += 1
+            else:
+                queued.append(job)
+
+        for job in queued[:max(parallel - active, 0)]:
+            job.signal_start()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully created Sync tasks for Cluster {cluster}: '
+            f'{len(queued)} queued, {active} running, {completed} already synced.'))
+
+    @staticmethod
+    def split_range(since, until, slice_by):
+        """
+        Split [since, until] into consecutive slices on calendar boundaries. Jobs are synced with
+        finished__gt=since and finished__lte=until, so adjacent slices share a boundary without overlapping.
+        """
+        slices = []
+        start = since
+        while start < until:
+            day = datetime.combine(start.date(), datetime.min.time(), tzinfo=timezone.utc)
+            if slice_by == 'month':
+                boundary = day.replace(day=1, year=day.year + day.month // 12, month=day.month % 12 + 1)
+            elif slice_by == 'week':
+                boundary = day + timedelta(days=7 - day.weekday())
+            else:
+                boundary = day + timedelta(days=1)
+            end = min(boundary, until)
+            slices.append((start, end))
+            start = end
+        return slices
+
+    def job_args(self, since, until, backfill=None):
+        args = {
+            'since': since.isoformat() if since is not None else None,
+            'until': until.isoformat() if until is not None else None,
+            'managed': True
+        }
+        if backfill is not None:
+            args['backfill'] = backfill
+
+        job_args = None
+        try:
+            job_args = json.dumps(args)
+        except TypeError as e:
+            self.stdout.write(self.style.ERROR('Error parsing arguments: {}'.format(e)))
+        return job_args
+
+    @staticmethod
+    def job_name(since, until):
+        name = "Sync historical data"
+        if since is not None:
+            name = "{} since {}".format(name, since.isoformat())
+        if until is not None:
+            name = "{} until {}".format(name, until.isoformat())
+        return name
+
     def parse_range(self, _since, _until):
         since = self.parse_date(_since) if _since else None
         until = self.parse_date(_until, True) if _until else None
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.14 on 2026-10-18 03:32
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_empty_rollup_built(apps, schema_editor):
+    # Existing jobs are rolled up by manage.py rebuildrollup in batches, without jobs there is nothing to build.
+    job_model = apps.get_model('clusters', 'Job')
+    state_model = apps.get_model('clusters', 'JobDailyRollupState')
+    if not job_model.objects.exists():
+        state_model.objects.create(pk=1, built=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0026_alter_subscriptioncost_monthly_subscription_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('new', 'New'), ('pending', 'Pending'), ('waiting', 'Waiting'), ('running', 'Running'), ('successful', 'Successful'), ('failed', 'Failed'), ('error', 'Error'), ('canceled', 'Canceled')], max_length=25)),
+                ('name', models.CharField(max_length=255)),
+                ('job_count', models.IntegerField(default=0)),
+                ('elapsed', models.DecimalField(decimal_places=3, default=Decimal('0'), max_digits=20)),
+                ('num_hosts', models.BigIntegerField(default=0)),
+                ('cluster', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clusters.cluster')),
+                ('job_template', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='clusters.jobtemplate')),
+                ('launched_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='clusters.aapuser')),
+                ('organization', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='clusters.organization')),
+                ('project', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='clusters.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cluster', 'day'], name='clusters_jo_cluster_e3c36f_idx'), models.Index(fields=['day', 'job_template'], name='clusters_jo_day_8102f9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cluster', 'day', 'job_template', 'organization', 'project', 'launched_by', 'status', 'name'), name='clusters_jobdailyrollup_dimension_uniq', nulls_distinct=False)],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobDailyRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('built', models.DateTimeField(null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(mark_empty_rollup_built, migrations.RunPython.noop),
+    ]
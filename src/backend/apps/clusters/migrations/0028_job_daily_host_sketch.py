@@ -0,0 +1,29 @@
+# Generated by Django 5.2.14 on 2026-10-18 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0027_job_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobDailyHostSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sketch', models.BinaryField()),
+                ('cluster', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='clusters.cluster')),
+                ('job_template', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='clusters.jobtemplate')),
+                ('organization', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='clusters.organization')),
+                ('project', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='clusters.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['cluster', 'day'], name='clusters_jo_cluster_6bc722_idx'), models.Index(fields=['day', 'job_template'], name='clusters_jo_day_7fa4d1_idx')],
+            },
+        ),
+    ]
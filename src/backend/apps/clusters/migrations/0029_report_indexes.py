@@ -0,0 +1,40 @@
+# Generated by Django 5.2.14 on 2026-10-18 04:02
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, so syncing and parsing jobs are not blocked on large tables.
+    atomic = False
+
+    dependencies = [
+        ('clusters', '0028_job_daily_host_sketch'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('num_hosts__gt', 0), ('status__in', ['successful', 'failed'])), fields=['finished'], include=('cluster', 'job_template', 'organization', 'project', 'launched_by', 'status', 'name', 'elapsed', 'num_hosts'), name='job_report_finished_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('num_hosts__gt', 0), ('status__in', ['successful', 'failed'])), fields=['job_template', 'finished'], name='job_report_template_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('num_hosts__gt', 0), ('status__in', ['successful', 'failed'])), fields=['organization', 'finished'], name='job_report_organization_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='job',
+            index=models.Index(condition=models.Q(('num_hosts__gt', 0), ('status__in', ['successful', 'failed'])), fields=['project', 'finished'], name='job_report_project_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobhostsummary',
+            index=models.Index(fields=['job', 'host'], name='clusters_jo_job_id_d0e8a7_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='joblabel',
+            index=models.Index(fields=['label', 'job'], name='clusters_jo_label_i_59bfbf_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.14 on 2026-10-18 04:21
+
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+def trigram_index(table, name):
+    # Expression of the name__icontains lookup of the list search.
+    return f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin ((UPPER(name::text)) gin_trgm_ops)'
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently, so syncing and parsing jobs are not blocked on large tables.
+    atomic = False
+
+    dependencies = [
+        ('clusters', '0029_report_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='jobtemplate',
+            index=models.Index(fields=['name', 'id'], name='jobtemplate_name_keyset_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='label',
+            index=models.Index(fields=['name', 'id'], name='label_name_keyset_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='organization',
+            index=models.Index(fields=['name', 'id'], name='organization_name_keyset_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='project',
+            index=models.Index(fields=['name', 'id'], name='project_name_keyset_idx'),
+        ),
+        TrigramExtension(),
+        migrations.RunSQL(
+            trigram_index('clusters_jobtemplate', 'jobtemplate_name_trgm_idx'),
+            'DROP INDEX CONCURRENTLY IF EXISTS jobtemplate_name_trgm_idx',
+        ),
+        migrations.RunSQL(
+            trigram_index('clusters_label', 'label_name_trgm_idx'),
+            'DROP INDEX CONCURRENTLY IF EXISTS label_name_trgm_idx',
+        ),
+        migrations.RunSQL(
+            trigram_index('clusters_organization', 'organization_name_trgm_idx'),
+            'DROP INDEX CONCURRENTLY IF EXISTS organization_name_trgm_idx',
+        ),
+        migrations.RunSQL(
+            trigram_index('clusters_project', 'project_name_trgm_idx'),
+            'DROP INDEX CONCURRENTLY IF EXISTS project_name_trgm_idx',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.14 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clusters', '0031_name_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clustersyncstatus',
+            name='job_template_modified',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='clustersyncstatus',
+            name='job_template_reconciled',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='clustersyncstatus',
+            name='organization_modified',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='clustersyncstatus',
+            name='organization_reconciled',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='clustersyncstatus',
+            name='last_job_finished_date',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
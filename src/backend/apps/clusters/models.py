@@ -10,11 +10,15 @@ import pytz
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
-from django.db.models import QuerySet, Min, Sum
+from django.db import connection, models, transaction
+from django.db.models import QuerySet, Min, Max, Sum, Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
 from solo.models import SingletonModel
 
+from backend.apps.clusters.cache import dimension_cache
 from backend.apps.clusters.schemas import DateRangeSchema, RelatedLinks
+from backend.apps.clusters.sketch import HyperLogLog
 
 manual_time = settings.DEFAULT_TIME_TAKEN_TO_MANUALLY_EXECUTE_MINUTES
 automation_time = settings.DEFAULT_TIME_TAKEN_TO_CREATE_AUTOMATION_MINUTES
@@ -50,6 +54,15 @@ def get_month_overlap_days(current_year, current_month, start_date, end_date):
     return month_days, month_start_day, month_end_day
 
 
+def name_keyset_index(prefix: str) -> models.Index:
+    """
+    Index of models listed in filter dropdowns, which page through them by (name, id) keyset. Their name
+    search is answered by a pg_trgm index created in migration 0031 outside the model state, so databases
+    without the extension can still be created from the models.
+    """
+    return models.Index(fields=['name', 'id'], name=f'{prefix}_name_keyset_idx')
+
+
 class CreatUpdateModel(models.Model):
     internal_created = models.DateTimeField(auto_now_add=True, blank=True, editable=False)
     internal_modified = models.DateTimeField(auto_now=True)
@@ -59,6 +72,19 @@ class CreatUpdateModel(models.Model):
     class Meta:
         abstract = True
 
+    def update_changed_fields(self, **fields) -> bool:
+        """
+        Set the given fields and save only the ones that differ from the current values.
+        Returns False without writing the row when nothing changed.
+        """
+        changed = [key for key, value in fields.items() if getattr(self, key) != value]
+        if not changed:
+            return False
+        for key in changed:
+            setattr(self, key, fields[key])
+        self.save(update_fields=[*changed, 'internal_modified'])
+        return True
+
 
 class ClusterVersionChoices(models.TextChoices):
     AAP27 = "AAP 2.7", "AAP 2.7"
@@ -324,22 +350,6 @@ class ClusterSyncData(CreatUpdateModel):
     def __str__(self):
         return f'{self.cluster.protocol}://{self.cluster.address}:{self.cluster.port} - {self.pk}'
 
-    @property
-    def cache_timeout_blocked(self):
-        from backend.apps.scheduler.models import SyncJob, JobTypeChoices as SyncJobTypeChoices
-        # Max limit for data parser
-        limit = settings.SCHEDULE_MAX_DATA_PARSE_JOBS
-        if SyncJob.objects.filter(
-                cluster=self.cluster,
-                status__in=[JobStatusChoices.PENDING, JobStatusChoices.WAITING, JobStatusChoices.RUNNING],
-                type=SyncJobTypeChoices.PARSE_JOB_DATA).count() >= limit:
-            logger.warning(
-                "Parse job data %s could not be started because there are more than %s other jobs from that template waiting to run"
-                % (self, limit)
-            )
-            return True
-        return False
-
     def save(self, *args, **kwargs):
         from backend.apps.scheduler.models import SyncJob, JobTypeChoices as SyncJobTypeChoices
         super(ClusterSyncData, self).save(*args, **kwargs)
@@ -357,7 +367,14 @@ class ClusterSyncData(CreatUpdateModel):
 
 class ClusterSyncStatus(CreatUpdateModel):
     cluster = models.OneToOneField(Cluster, on_delete=models.CASCADE, related_name='status')
-    last_job_finished_date = models.DateTimeField()
+    last_job_finished_date = models.DateTimeField(null=True)
+    # Latest AAP modified time of the synced organizations and job templates, later syncs only fetch
+    # the ones modified after it.
+    organization_modified = models.DateTimeField(null=True)
+    job_template_modified = models.DateTimeField(null=True)
+    # Last full listing of organizations and job templates, which also removes job templates deleted in AAP.
+    organization_reconciled = models.DateTimeField(null=True)
+    job_template_reconciled = models.DateTimeField(null=True)
 
     def __str__(self):
         return f'{self.cluster.protocol}://{self.cluster.address}:{self.cluster.port}'
@@ -381,10 +398,7 @@ class BaseModel(CreatUpdateModel):
 
         try:
             model = cls.objects.get(cluster=cluster, external_id=external_id)
-            for key, value in kwargs.items():
-                setattr(model, key, value)
-            model.name = name
-            model.save()
+            model.update_changed_fields(name=name, **kwargs)
             return model, False
         except cls.DoesNotExist:
             try:
@@ -445,19 +459,29 @@ class BaseModel(CreatUpdateModel):
                     return model, created
 
     @classmethod
-    def create_or_update(cls, cluster: Cluster, external_id: int, **kwargs):
+    def create_or_update(cls, cluster: Cluster, external_id: int, generation: int | None = None, **kwargs):
         """
         Create or update a model instance based on cluster and external_id.
 
         Handles IntegrityError race conditions when concurrent workers attempt
-        to create the same record simultaneously.
+        to create the same record simultaneously. Unchanged rows are served from
+        the dimension cache at the given generation, which the caller reads once
+        per parse; without it the cache is bypassed.
         """
+        if external_id > 0:
+            model = dimension_cache.get(cls, cluster.pk, generation, external_id, kwargs)
+            if model is not None:
+                logger.debug(f'Unchanged {cls.__name__} for cluster {cluster} with external id: {external_id}')
+                return model
+
         logger.info(f'Creating or updating {cls.__name__} for cluster {cluster} with external id: {external_id}')
 
+        fields = dict(kwargs)
         name = kwargs.pop('name', None)
 
         if external_id > 0:
             model, created = cls._create_or_update_positive_id(cluster, external_id, name, **kwargs)
+            dimension_cache.set(cls, cluster.pk, generation, external_id, fields, model)
         else:
             model, created = cls._create_or_update_negative_id(cluster, name, **kwargs)
 
@@ -483,7 +507,9 @@ class NameDescriptionModel(BaseModel):
 
 
 class Organization(NameDescriptionModel):
-    pass
+
+    class Meta(NameDescriptionModel.Meta):
+        indexes = [name_keyset_index('organization')]
 
 
 class JobTemplate(NameDescriptionModel):
@@ -502,6 +528,7 @@ class JobTemplate(NameDescriptionModel):
             ('cluster', 'external_id', 'organization'),
             ('cluster', 'name', 'organization'),
         )
+        indexes = [name_keyset_index('jobtemplate')]
 
     def __str__(self):
         return f"{self.organization}:{self.name}"
@@ -522,20 +549,31 @@ class AAPUser(BaseModel):
         return f"{self.type}:{self.name}"
 
     @classmethod
-    def create_or_update(cls, cluster: Cluster, external_id: int, **kwargs):
+    def create_or_update(cls, cluster: Cluster, external_id: int, generation: int | None = None, **kwargs):
         user_type = kwargs.pop('type', None)
-        model, created = AAPUser.objects.update_or_create(
-            type=user_type,
-            cluster=cluster,
-            external_id=external_id,
-            defaults={**kwargs, 'external_id': external_id},
-        )
+        model = dimension_cache.get(cls, cluster.pk, generation, (external_id, user_type), kwargs)
+        if model is not None:
+            logger.debug(f'Unchanged {cls.__name__} for cluster {cluster} with external id: {external_id}')
+            return model
+
+        try:
+            model = AAPUser.objects.get(type=user_type, cluster=cluster, external_id=external_id)
+            model.update_changed_fields(**kwargs)
+            created = False
+        except AAPUser.DoesNotExist:
+            model, created = AAPUser.objects.update_or_create(
+                type=user_type,
+                cluster=cluster,
+                external_id=external_id,
+                defaults={**kwargs, 'external_id': external_id},
+            )
 
         if created:
             logger.info(f'Created {cls.__name__} for cluster {cluster} with external id: {external_id}')
         else:
             logger.info(f'Updated {cls.__name__} for cluster {cluster} with external id: {external_id}')
 
+        dimension_cache.set(cls, cluster.pk, generation, (external_id, user_type), kwargs, model)
         return model
 
 
@@ -558,6 +596,9 @@ class InstanceGroup(BaseModel):
 class Label(BaseModel):
     name = models.CharField(max_length=255)
 
+    class Meta(BaseModel.Meta):
+        indexes = [name_keyset_index('label')]
+
     def __str__(self):
         return self.name
 
@@ -569,14 +610,14 @@ class Host(NameDescriptionModel):
 class Project(NameDescriptionModel):
     scm_type = models.CharField(max_length=50, null=True, blank=True)
 
+    class Meta(NameDescriptionModel.Meta):
+        indexes = [name_keyset_index('project')]
 
-class JobFilterMethods(object):
 
-    def successful_or_failed(self):
-        return self.filter(
-            status__in=[JobStatusChoices.SUCCESSFUL, JobStatusChoices.FAILED],
-            num_hosts__gt=0
-        )
+REPORT_JOBS_CONDITION = Q(status__in=[JobStatusChoices.SUCCESSFUL, JobStatusChoices.FAILED], num_hosts__gt=0)
+
+
+class ReportDimensionFilterMethods(object):
 
     def organization(self, ids: List[int] | None):
         if ids is not None and len(ids) > 0:
@@ -598,6 +639,12 @@ class JobFilterMethods(object):
             return self.filter(project__in=ids)
         return self
 
+
+class JobFilterMethods(ReportDimensionFilterMethods):
+
+    def successful_or_failed(self):
+        return self.filter(REPORT_JOBS_CONDITION)
+
     def label(self, ids: List[int] | None):
         if ids is not None and len(ids) > 0:
             labels_qs = JobLabel.objects.filter(label_id__in=ids).values_list("job_id", flat=True)
@@ -663,7 +710,21 @@ class Job(BaseModel):
         abstract = False
         indexes = [
             models.Index(fields=['status', 'finished']),
-            models.Index(fields=['cluster', 'job_template'])
+            models.Index(fields=['cluster', 'job_template']),
+            # Reports read successful and failed jobs with hosts (JobFilterMethods.successful_or_failed) of a
+            # finished range, the included columns answer the grouping and sums with index only scans.
+            models.Index(
+                fields=['finished'],
+                include=['cluster', 'job_template', 'organization', 'project', 'launched_by',
+                         'status', 'name', 'elapsed', 'num_hosts'],
+                condition=REPORT_JOBS_CONDITION,
+                name='job_report_finished_idx'),
+            models.Index(fields=['job_template', 'finished'], condition=REPORT_JOBS_CONDITION,
+                         name='job_report_template_idx'),
+            models.Index(fields=['organization', 'finished'], condition=REPORT_JOBS_CONDITION,
+                         name='job_report_organization_idx'),
+            models.Index(fields=['project', 'finished'], condition=REPORT_JOBS_CONDITION,
+                         name='job_report_project_idx'),
         ]
 
     objects = JobManager()
@@ -673,6 +734,11 @@ class JobLabel(CreatUpdateModel):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='labels')
     label = models.ForeignKey(Label, on_delete=models.CASCADE, related_name='jobs')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['label', 'job']),
+        ]
+
     def __str__(self):
         return f'{self.label.name}: {self.job.name}'
 
@@ -693,10 +759,376 @@ class JobHostSummary(CreatUpdateModel):
     created = models.DateTimeField()
     modified = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'host']),
+        ]
+
     def __str__(self) -> str:
         return f'{self.job.name} - {self.host.name}'
 
 
+def rollup_day(dt: datetime.datetime) -> datetime.date:
+    """Day of the daily rollup a time falls on, days are those of the TIME_ZONE setting."""
+    return timezone.localdate(dt, timezone.get_default_timezone())
+
+
+def rollup_range_q(field: str, first: datetime.date, last: datetime.date) -> Q:
+    """Condition matching the times of field that fall on the rollup days first to last."""
+    default_timezone = timezone.get_default_timezone()
+    start = datetime.datetime.combine(first, datetime.time.min, default_timezone)
+    end = datetime.datetime.combine(last + datetime.timedelta(days=1), datetime.time.min, default_timezone)
+    return Q(**{f"{field}__gte": start, f"{field}__lt": end})
+
+
+def rollup_days_q(field: str, days) -> Q:
+    """Condition matching the times of field that fall on the given rollup days."""
+    default_timezone = timezone.get_default_timezone()
+    q = Q()
+    for day in days:
+        start = datetime.datetime.combine(day, datetime.time.min, default_timezone)
+        q |= Q(**{f"{field}__gte": start, f"{field}__lt": start + datetime.timedelta(days=1)})
+    return q
+
+
+class JobDailyRollupFilterMethods(ReportDimensionFilterMethods):
+    """
+    Report filters of JobFilterMethods answered from daily rollup rows; date range bounds are whole
+    days of the TIME_ZONE setting. Rows are not labelled, reports filtered by label read jobs.
+    """
+
+    def successful_or_failed(self):
+        return self
+
+    def before(self, dt: datetime.datetime | None):
+        if dt is not None:
+            return self.filter(day__lte=rollup_day(dt))
+        return self
+
+    def after(self, dt: datetime.datetime | None):
+        if dt is not None:
+            return self.filter(day__gte=rollup_day(dt))
+        return self
+
+
+class JobDailyRollupQuerySet(JobDailyRollupFilterMethods, QuerySet):
+    pass
+
+
+class JobDailyRollupManager(JobDailyRollupFilterMethods, models.Manager):
+    use_for_related_objects = True
+
+    def get_queryset(self):
+        return JobDailyRollupQuerySet(self.model, using=self._db)
+
+
+def advisory_xact_lock(keys, shared: bool = False) -> None:
+    """Take transaction level advisory locks on the keys until the transaction ends."""
+    function = "pg_advisory_xact_lock_shared" if shared else "pg_advisory_xact_lock"
+    with connection.cursor() as cursor:
+        # Taken in array order, every caller locks the keys in the same order and cannot deadlock.
+        cursor.execute(f"SELECT {function}(hashtextextended(key, 0)) FROM unnest(%s::text[]) AS key", [sorted(set(keys))])
+
+
+def lock_jobs(cluster_id: int, external_ids) -> None:
+    """
+    Serialize the parses of the same jobs of a cluster until the transaction ends, call it before looking the
+    jobs up. The rollup deltas of an updated job are then computed from the job as the last parse left it.
+    """
+    advisory_xact_lock(f"automation_dashboard_job:{cluster_id}:{external_id}" for external_id in external_ids)
+
+
+def lock_cluster_rollups(cluster_ids, shared: bool = False) -> None:
+    """
+    Parses of a cluster change its rollup rows and host sketches concurrently under the shared lock. Rebuilding
+    the rollup of clusters takes it exclusively, no parse changes the rows while they are recomputed.
+    """
+    advisory_xact_lock((f"automation_dashboard_rollup:{cluster_id}" for cluster_id in cluster_ids), shared=shared)
+
+
+class JobDailyRollup(models.Model):
+    """
+    Successful and failed jobs with hosts, pre-aggregated per day of the TIME_ZONE setting and report
+    dimension. The parser applies the changes of every parsed job to its row, see apply.
+    """
+    day = models.DateField()
+    cluster = models.ForeignKey(Cluster, on_delete=models.CASCADE)
+    job_template = models.ForeignKey(JobTemplate, on_delete=models.CASCADE, null=True)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, null=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True)
+    launched_by = models.ForeignKey(AAPUser, on_delete=models.CASCADE, null=True)
+    status = models.CharField(choices=JobStatusChoices.choices, max_length=25)
+    name = models.CharField(max_length=255)
+    job_count = models.IntegerField(default=0)
+    elapsed = models.DecimalField(max_digits=20, decimal_places=3, default=decimal.Decimal(0))
+    num_hosts = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['cluster', 'day']),
+            models.Index(fields=['day', 'job_template']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cluster', 'day', 'job_template', 'organization', 'project', 'launched_by', 'status', 'name'],
+                name='clusters_jobdailyrollup_dimension_uniq',
+                nulls_distinct=False,
+            ),
+        ]
+
+    objects = JobDailyRollupManager()
+
+    @classmethod
+    def enabled_for(cls, start: datetime.datetime | None, end: datetime.datetime | None) -> bool:
+        """
+        Reports read the rollup when it is enabled, has been built and the range starts and ends on whole
+        rollup days.
+        """
+        if not getattr(settings, "REPORT_ROLLUP_ENABLED", True) or start is None or end is None:
+            return False
+        default_timezone = timezone.get_default_timezone()
+        return (start.astimezone(default_timezone).time() == datetime.time.min
+                and end.astimezone(default_timezone).time() == datetime.time.max
+                and JobDailyRollupState.objects.filter(built__isnull=False).exists())
+
+    @staticmethod
+    def values(job: Job) -> tuple | None:
+        """The (dimension key, elapsed, num_hosts) a job adds to the rollup, None if it is not counted."""
+        if (job.finished is None or job.num_hosts <= 0
+                or job.status not in (JobStatusChoices.SUCCESSFUL, JobStatusChoices.FAILED)):
+            return None
+        key = (rollup_day(job.finished), job.job_template_id, job.organization_id, job.project_id,
+               job.launched_by_id, job.status, job.name)
+        return key, decimal.Decimal(job.elapsed or 0).quantize(decimal.Decimal("0.001")), job.num_hosts
+
+    @classmethod
+    def apply(cls, cluster_id: int, removed, added) -> None:
+        """
+        Subtract the values of jobs before they were updated and add those of new and updated jobs to the rollup
+        rows of a cluster, call it in the transaction that changed the jobs. Rows left without jobs are deleted.
+        """
+        deltas = {}
+        for sign, rows in ((-1, removed), (1, added)):
+            for row in rows:
+                if row is None:
+                    continue
+                key, elapsed, num_hosts = row
+                job_count, total_elapsed, total_hosts = deltas.get(key, (0, decimal.Decimal(0), 0))
+                deltas[key] = (job_count + sign, total_elapsed + sign * elapsed, total_hosts + sign * num_hosts)
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+        lock_cluster_rollups([cluster_id], shared=True)
+        table = connection.ops.quote_name(cls._meta.db_table)
+        # Upserted in key order, concurrent parses lock the same rows in the same order and cannot deadlock.
+        keys = sorted(deltas, key=lambda key: tuple((value is None, value) for value in key))
+        empty = []
+        for start in range(0, len(keys), 1000):
+            batch = keys[start:start + 1000]
+            params = []
+            for key in batch:
+                params.extend([key[0], cluster_id, *key[1:], *deltas[key]])
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (day, cluster_id, job_template_id, organization_id, project_id, launched_by_id, "
+                    f"status, name, job_count, elapsed, num_hosts) "
+                    f"VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(batch))} "
+                    f"ON CONFLICT ON CONSTRAINT clusters_jobdailyrollup_dimension_uniq DO UPDATE SET "
+                    f"job_count = {table}.job_count + EXCLUDED.job_count, "
+                    f"elapsed = {table}.elapsed + EXCLUDED.elapsed, "
+                    f"num_hosts = {table}.num_hosts + EXCLUDED.num_hosts "
+                    f"RETURNING id, job_count",
+                    params,
+                )
+                empty.extend(pk for pk, job_count in cursor.fetchall() if job_count <= 0)
+        if empty:
+            cls.objects.filter(pk__in=empty).delete()
+
+    @classmethod
+    def rebuild(cls, cluster_id: int | None = None, batch_days: int = 31) -> None:
+        """
+        Recompute the rollup rows and host sketches of all clusters, or of one, committing batch_days days of a
+        cluster at a time. Once all clusters are rebuilt reports read the rollup, see JobDailyRollupState.
+        """
+        clusters = Cluster.objects.order_by("pk")
+        if cluster_id is not None:
+            clusters = clusters.filter(pk=cluster_id)
+        for pk in clusters.values_list("pk", flat=True):
+            bounds = Job.objects.filter(cluster_id=pk).aggregate(first=Min("finished"), last=Max("finished"))
+            days = [rollup_day(bound) for bound in bounds.values() if bound is not None]
+            for model in (cls, JobDailyHostSketch):
+                bounds = model.objects.filter(cluster_id=pk).aggregate(first=Min("day"), last=Max("day"))
+                days.extend(bound for bound in bounds.values() if bound is not None)
+            if not days:
+                continue
+            first, last = min(days), max(days)
+            while first <= last:
+                batch_last = min(first + datetime.timedelta(days=batch_days - 1), last)
+                logger.info(f"Rebuilding daily rollup of cluster {pk} from {first} to {batch_last}")
+                with transaction.atomic():
+                    cls.rebuild_days(pk, first, batch_last)
+                first = batch_last + datetime.timedelta(days=1)
+        if cluster_id is None:
+            state = JobDailyRollupState.get_solo()
+            state.built = timezone.now()
+            state.save()
+
+    @classmethod
+    def rebuild_days(cls, cluster_id: int, first: datetime.date, last: datetime.date) -> None:
+        """Recompute the rollup rows and host sketches of the days first to last of a cluster."""
+        lock_cluster_rollups([cluster_id])
+        cls.objects.filter(cluster_id=cluster_id, day__range=(first, last)).delete()
+        jobs = Job.objects.filter(rollup_range_q("finished", first, last), cluster_id=cluster_id)
+        cls._create_from(jobs)
+        JobDailyHostSketch.rebuild_days(cluster_id, first, last, jobs)
+
+    @classmethod
+    def _create_from(cls, jobs: QuerySet) -> None:
+        rows = (jobs.successful_or_failed()
+                .values("cluster_id", "job_template_id", "organization_id", "project_id", "launched_by_id", "status", "name",
+                        day=TruncDate("finished", tzinfo=timezone.get_default_timezone()))
+                .annotate(job_count=Count("id"), elapsed=Sum("elapsed"), num_hosts=Sum("num_hosts"))
+                .order_by())
+        cls.objects.bulk_create((cls(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class JobDailyRollupState(SingletonModel):
+    """
+    Time the rollup and host sketches of all clusters were last rebuilt (manage.py rebuildrollup). Reports
+    read jobs until they have been built once, the parser keeps them up to date afterwards.
+    """
+    built = models.DateTimeField(null=True)
+
+
+class JobDailyHostSketch(models.Model):
+    """
+    HyperLogLog sketch of the hosts of successful and failed jobs per day and report filter dimension.
+    Sketches of any day range and filter combination are merged to estimate the number of unique hosts.
+    """
+    day = models.DateField()
+    cluster = models.ForeignKey(Cluster, on_delete=models.CASCADE)
+    job_template = models.ForeignKey(JobTemplate, on_delete=models.CASCADE, null=True)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, null=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True)
+    sketch = models.BinaryField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['cluster', 'day']),
+            models.Index(fields=['day', 'job_template']),
+        ]
+
+    objects = JobDailyRollupManager()
+
+    @staticmethod
+    def bucket(job: Job) -> tuple | None:
+        """The (day, job_template_id, organization_id, project_id) sketch of a job, None if its hosts are not counted."""
+        if job.finished is None or job.num_hosts <= 0 or job.status not in (JobStatusChoices.SUCCESSFUL, JobStatusChoices.FAILED):
+            return None
+        return rollup_day(job.finished), job.job_template_id, job.organization_id, job.project_id
+
+    @staticmethod
+    def _buckets_q(buckets) -> Q:
+        q = Q(pk__in=[])
+        for day, job_template_id, organization_id, project_id in buckets:
+            q |= Q(day=day, job_template_id=job_template_id, organization_id=organization_id, project_id=project_id)
+        return q
+
+    @staticmethod
+    def _host_rows(jobs: QuerySet):
+        return (JobHostSummary.objects
+                .filter(job__in=jobs.successful_or_failed().values("id"), host__isnull=False)
+                .values("host_id",
+                        day=TruncDate("job__finished", tzinfo=timezone.get_default_timezone()),
+                        sketch_cluster_id=F("job__cluster_id"),
+                        sketch_job_template_id=F("job__job_template_id"),
+                        sketch_organization_id=F("job__organization_id"),
+                        sketch_project_id=F("job__project_id"))
+                .distinct()
+                .order_by())
+
+    @classmethod
+    def _sketches(cls, jobs: QuerySet) -> dict[tuple, HyperLogLog]:
+        sketches = {}
+        for row in cls._host_rows(jobs).iterator():
+            key = (row["sketch_cluster_id"], row["day"], row["sketch_job_template_id"], row["sketch_organization_id"], row["sketch_project_id"])
+            sketches.setdefault(key, HyperLogLog()).add(row["host_id"])
+        return sketches
+
+    @classmethod
+    def _create(cls, sketches: dict[tuple, HyperLogLog]) -> None:
+        cls.objects.bulk_create(
+            (cls(cluster_id=cluster_id, day=day, job_template_id=job_template_id, organization_id=organization_id,
+                 project_id=project_id, sketch=sketch.to_bytes())
+             for (cluster_id, day, job_template_id, organization_id, project_id), sketch in sketches.items()),
+            batch_size=1000,
+        )
+
+    @classmethod
+    def refresh(cls, cluster_id: int, added_job_ids, stale_buckets) -> None:
+        """
+        Add the hosts of new jobs to their sketches, and recompute the stale sketches of updated jobs
+        (before and after the update) since hosts can not be removed from a sketch.
+        """
+        stale_buckets = {bucket for bucket in stale_buckets if bucket is not None}
+        added_job_ids = list(added_job_ids)
+        if not stale_buckets and not added_job_ids:
+            return
+        added = {key: sketch for key, sketch in cls._sketches(Job.objects.filter(pk__in=added_job_ids)).items()
+                 if key[1:] not in stale_buckets}
+        # Only parses changing the same sketches wait for each other.
+        lock_cluster_rollups([cluster_id], shared=True)
+        advisory_xact_lock(f"automation_dashboard_sketch:{cluster_id}:{bucket}"
+                           for bucket in stale_buckets | {key[1:] for key in added})
+
+        if stale_buckets:
+            cls.objects.filter(cls._buckets_q(stale_buckets), cluster_id=cluster_id).delete()
+            job_template_ids = {bucket[1] for bucket in stale_buckets}
+            jobs = Job.objects.filter(rollup_days_q("finished", {bucket[0] for bucket in stale_buckets}), cluster_id=cluster_id)
+            job_template_q = Q(job_template_id__in=job_template_ids - {None})
+            if None in job_template_ids:
+                job_template_q |= Q(job_template__isnull=True)
+            jobs = jobs.filter(job_template_q)
+            cls._create({key: sketch for key, sketch in cls._sketches(jobs).items() if key[1:] in stale_buckets})
+
+        if not added:
+            return
+        existing = {}
+        for row in cls.objects.filter(cls._buckets_q(key[1:] for key in added), cluster_id=cluster_id):
+            existing.setdefault(row.bucket_key, []).append(row)
+        new_sketches = {}
+        for key, sketch in added.items():
+            rows = existing.get(key, [])
+            if not rows:
+                new_sketches[key] = sketch
+                continue
+            for row in rows:
+                sketch.update(HyperLogLog.from_bytes(row.sketch))
+            rows[0].sketch = sketch.to_bytes()
+            rows[0].save(update_fields=["sketch"])
+            if len(rows) > 1:
+                cls.objects.filter(pk__in=[row.pk for row in rows[1:]]).delete()
+        cls._create(new_sketches)
+
+    @classmethod
+    def rebuild_days(cls, cluster_id: int, first: datetime.date, last: datetime.date, jobs: QuerySet) -> None:
+        """Recompute the sketches of the days first to last of a cluster from its jobs of these days."""
+        cls.objects.filter(cluster_id=cluster_id, day__range=(first, last)).delete()
+        cls._create(cls._sketches(jobs))
+
+    @property
+    def bucket_key(self) -> tuple:
+        return self.cluster_id, self.day, self.job_template_id, self.organization_id, self.project_id
+
+    @classmethod
+    def count_hosts(cls, queryset: QuerySet) -> int:
+        """Estimate the number of unique hosts of the sketches in the queryset."""
+        merged = HyperLogLog()
+        for sketch in queryset.values_list("sketch", flat=True).iterator():
+            merged.update(HyperLogLog.from_bytes(sketch))
+        return merged.count()
+
+
 class SubscriptionCost(SingletonModel):
     """
     Stores subscription cost information for the AAP subscription, including monthly cost and average engineer hourly rate.
@@ -784,10 +1216,14 @@ class SubscriptionCost(SingletonModel):
             start, end = end, start
 
         # Get total elapsed time for the specified period - keep full precision
-        elapsed_result = Job.objects.successful_or_failed().filter(
-            finished__gte=start,
-            finished__lte=end,
-        ).aggregate(total_seconds=Sum('elapsed'))
+        if JobDailyRollup.enabled_for(start, end):
+            elapsed_qs = JobDailyRollup.objects.after(start).before(end)
+        else:
+            elapsed_qs = Job.objects.successful_or_failed().filter(
+                finished__gte=start,
+                finished__lte=end,
+            )
+        elapsed_result = elapsed_qs.aggregate(total_seconds=Sum('elapsed'))
 
         total_elapsed_raw = elapsed_result['total_seconds']
         if total_elapsed_raw is None or total_elapsed_raw == 0:
@@ -1,9 +1,13 @@
 import decimal
 import logging
+from functools import cached_property
+from typing import List
 
 from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 
+from backend.apps.clusters.cache import dimension_cache, report_cache
 from backend.apps.clusters.models import (
     ClusterSyncData,
     Organization,
@@ -17,7 +21,10 @@ from backend.apps.clusters.models import (
     JobLabel,
     Host,
     JobHostSummary,
-    Project)
+    JobDailyRollup,
+    JobDailyHostSketch,
+    Project,
+    lock_jobs)
 from backend.apps.clusters.schemas import (
     ExternalJobSchema,
     NameDescriptionModelSchema,
@@ -27,6 +34,62 @@ from backend.apps.clusters.schemas import (
 logger = logging.getLogger("automation_dashboard.clusters.parser")
 
 
+def resolve_models(model, cluster, values: dict, generation: int | None) -> dict:
+    """
+    Resolve instances of a BaseModel subclass for a {external_id: fields} mapping of positive
+    external ids with one SELECT, one bulk_update for changed rows and one bulk_create for
+    missing rows. Rows that still could not be resolved (e.g. a name already used by a row
+    with another external id) fall back to create_or_update. Rows cached unchanged in the
+    dimension cache at the given generation are not queried at all.
+    """
+    instances = {}
+    for external_id, fields in values.items():
+        instance = dimension_cache.get(model, cluster.pk, generation, external_id, fields)
+        if instance is not None:
+            instances[external_id] = instance
+    cached = set(instances)
+    if len(cached) == len(values):
+        return instances
+
+    changed = []
+    changed_fields = set()
+    pending = [external_id for external_id in values if external_id not in cached]
+    for instance in model.objects.filter(cluster=cluster, external_id__in=pending):
+        fields = values[instance.external_id]
+        diff = [key for key, value in fields.items() if getattr(instance, key) != value]
+        if diff:
+            for key in diff:
+                setattr(instance, key, fields[key])
+            changed.append(instance)
+            changed_fields.update(diff)
+        instances[instance.external_id] = instance
+
+    if changed:
+        logger.info(f"Updating {len(changed)} {model.__name__} rows.")
+        modified = timezone.now()
+        for instance in changed:
+            instance.internal_modified = modified
+        model.objects.bulk_update(changed, [*changed_fields, "internal_modified"])
+
+    missing = [external_id for external_id in values if external_id not in instances]
+    if missing:
+        logger.info(f"Creating {len(missing)} {model.__name__} rows.")
+        model.objects.bulk_create(
+            [model(cluster=cluster, external_id=external_id, **values[external_id]) for external_id in missing],
+            ignore_conflicts=True,
+        )
+        for instance in model.objects.filter(cluster=cluster, external_id__in=missing):
+            instances[instance.external_id] = instance
+
+    for external_id, fields in values.items():
+        if external_id not in instances:
+            instances[external_id] = model.create_or_update(
+                cluster=cluster, external_id=external_id, generation=generation, **fields)
+        elif external_id not in cached:
+            dimension_cache.set(model, cluster.pk, generation, external_id, fields, instances[external_id])
+    return instances
+
+
 class DataParser:
     """
     DataParser is responsible for extracting and transforming external job data
@@ -49,6 +112,11 @@ class DataParser:
         else:
             logger.error(f"No data found for data id: {data_id}")
 
+    @cached_property
+    def generation(self) -> int | None:
+        """Dimension cache generation of the cluster, read once per parse before any row is looked up."""
+        return dimension_cache.generation(self.cluster.pk)
+
     @property
     def organization(self) -> Organization | None:
         logger.info("Accessing organization property.")
@@ -58,6 +126,7 @@ class DataParser:
             return Organization.create_or_update(
                 cluster=self.cluster,
                 external_id=external_organization.id,
+                generation=self.generation,
                 name=external_organization.name,
                 description=external_organization.description,
             )
@@ -71,6 +140,7 @@ class DataParser:
         job_template = JobTemplate.create_or_update(
             cluster=self.cluster,
             external_id=external_job_template.id if external_job_template else -1,
+            generation=self.generation,
             name=external_job_template.name if external_job_template else self.data.name,
             description=external_job_template.description if external_job_template else self.data.description,
         )
@@ -101,6 +171,7 @@ class DataParser:
             return AAPUser.create_or_update(
                 cluster=self.cluster,
                 external_id=external_launched_by.id,
+                generation=self.generation,
                 name=external_launched_by.name,
                 type=external_launched_by.type,
             )
@@ -116,6 +187,7 @@ class DataParser:
             return Inventory.create_or_update(
                 cluster=self.cluster,
                 external_id=external_inventory.id,
+                generation=self.generation,
                 name=external_inventory.name,
                 description=external_inventory.description,
             )
@@ -131,6 +203,7 @@ class DataParser:
             return ExecutionEnvironment.create_or_update(
                 cluster=self.cluster,
                 external_id=external_execution_environment.id,
+                generation=self.generation,
                 name=external_execution_environment.name,
                 description=external_execution_environment.description,
             )
@@ -146,6 +219,7 @@ class DataParser:
             return InstanceGroup.create_or_update(
                 cluster=self.cluster,
                 external_id=external_instance_group.id,
+                generation=self.generation,
                 name=external_instance_group.name,
                 is_container_group=external_instance_group.is_container_group,
             )
@@ -157,6 +231,7 @@ class DataParser:
         return Label.create_or_update(
             cluster=self.cluster,
             external_id=external_label.id,
+            generation=self.generation,
             name=external_label.name,
         )
 
@@ -183,6 +258,7 @@ class DataParser:
             return Project.create_or_update(
                 cluster=self.cluster,
                 external_id=external_project.id,
+                generation=self.generation,
                 name=external_project.name,
                 description=external_project.description,
                 scm_type=external_project.scm_type,
@@ -199,10 +275,31 @@ class DataParser:
         return Host.create_or_update(
             cluster=self.cluster,
             external_id=external_id,
+            generation=self.generation,
             name=name,
             description=description,
         )
 
+    def get_hosts(self) -> dict:
+        """
+        Resolve the hosts of all host summaries at once, keyed by external id or, for hosts
+        without one, by host name. Existing hosts are loaded with one SELECT and missing ones
+        are created with one bulk insert.
+        """
+        logger.info("Getting hosts.")
+        hosts = {}
+        hosts_without_id = set()
+        for host_summary in self.data.host_summaries or []:
+            host = host_summary.summary_fields.host if host_summary.summary_fields else None
+            if host:
+                hosts[host.id] = {"name": host.name, "description": host.description}
+            else:
+                hosts_without_id.add(host_summary.host_name)
+        instances = resolve_models(Host, self.cluster, hosts, self.generation) if hosts else {}
+        for host_name in hosts_without_id:
+            instances[host_name] = self.get_host(None, host_name)
+        return instances
+
     @property
     def host_summaries(self):
         logger.info("Getting host summaries.")
@@ -210,13 +307,14 @@ class DataParser:
         if not external_host_summaries:
             logger.debug("No external host summaries found, using empty list.")
             external_host_summaries = []
+        hosts = self.get_hosts()
         for host_summary in external_host_summaries:
             logger.debug(f"Processing host summary for host: {host_summary.host_name}")
             summary_fields = host_summary.summary_fields
-            host = self.get_host(summary_fields.host, host_summary.host_name)
+            host = summary_fields.host if summary_fields else None
             data = host_summary.model_dump()
             data.pop("summary_fields")
-            data["host"] = host
+            data["host"] = hosts[host.id] if host else hosts[host_summary.host_name]
             yield data
 
     @property
@@ -244,8 +342,11 @@ class DataParser:
         job_data = self.job
         external_id = job_data.pop("id")
 
-        with transaction.atomic():
+        with dimension_cache.clear_on_error(self.cluster.pk), transaction.atomic():
+            lock_jobs(self.cluster.pk, [external_id])
             job = Job.objects.filter(cluster=self.cluster, external_id=external_id).first()
+            rollup_removed = [JobDailyRollup.values(job)] if job is not None else []
+            stale_sketches = {JobDailyHostSketch.bucket(job)} if job is not None else set()
             if job is None:
                 logger.info("No job found, creating new job.")
                 job = Job.objects.create(
@@ -269,7 +370,7 @@ class DataParser:
                 job.description = job_data.pop("description")
                 job.organization = organization
                 job.instance_group = instance_group
-                job.execute_environment = execution_environment
+                job.execution_environment = execution_environment
                 job.instance_group = instance_group
                 job.job_template = job_template
                 job.launched_by = launched_by
@@ -306,8 +407,9 @@ class DataParser:
             ignored_hosts_count = 0
             rescued_hosts_count = 0
 
+            host_summaries = []
             for host_summary in self.host_summaries:
-                logger.info("Processing host summary.")
+                logger.debug("Processing host summary.")
                 num_hosts += 1
                 changed_hosts_count += host_summary.get("changed", 0)
                 dark_hosts_count += host_summary.get("dark", 0)
@@ -318,8 +420,10 @@ class DataParser:
                 failed_hosts_count += 1 if host_summary.get("failed", True) is True else 0
                 ignored_hosts_count += host_summary.get("ignored", 0)
                 rescued_hosts_count += host_summary.get("rescued", 0)
-                logger.info("Creating new host summary.")
-                JobHostSummary.objects.create(job=job, **host_summary)
+                host_summaries.append(JobHostSummary(job=job, **host_summary))
+
+            logger.info(f"Creating {len(host_summaries)} host summaries.")
+            JobHostSummary.objects.bulk_create(host_summaries, batch_size=1000)
 
             logger.info("Processing job summary counts.")
             job.num_hosts = num_hosts
@@ -335,6 +439,295 @@ class DataParser:
 
             logger.info("Updating job with summary counts.")
             job.save()
+            JobDailyRollup.apply(self.cluster.pk, rollup_removed, [JobDailyRollup.values(job)])
+            if stale_sketches:
+                stale_sketches.add(JobDailyHostSketch.bucket(job))
+                JobDailyHostSketch.refresh(self.cluster.pk, [], stale_sketches)
+            else:
+                JobDailyHostSketch.refresh(self.cluster.pk, [job.pk], [])
+            report_cache.bump_data_version()
 
             logger.info("Finished processing and deleting record.")
             self.model.delete()
+
+
+class BatchDataParser:
+    """
+    BatchDataParser parses many AAP jobs of one cluster at once. Related models are
+    resolved with set-based lookups and jobs, job labels and job host summaries are
+    written with bulk_create/bulk_update in a single transaction.
+    """
+
+    JOB_UPDATE_FIELDS = [
+        "type", "job_type", "launch_type", "name", "description", "organization", "instance_group",
+        "execution_environment", "job_template", "launched_by", "project", "created", "modified",
+    ]
+    JOB_COUNT_FIELDS = [
+        "num_hosts", "changed_hosts_count", "dark_hosts_count", "failures_hosts_count", "ok_hosts_count",
+        "processed_hosts_count", "skipped_hosts_count", "failed_hosts_count", "ignored_hosts_count",
+        "rescued_hosts_count",
+    ]
+
+    def __init__(self, cluster, jobs: List[ExternalJobSchema], sync_data_ids: List[int] | None = None):
+        logger.info(f"Initializing BatchDataParser for {len(jobs)} jobs.")
+        self.cluster = cluster
+        # The same AAP job can be synced more than once, the latest data wins.
+        self.jobs = list({job.id: job for job in jobs}.values())
+        self.sync_data_ids = sync_data_ids or []
+
+    @classmethod
+    def from_sync_data(cls, cluster, data_ids: List[int]) -> "BatchDataParser":
+        models = ClusterSyncData.objects.filter(cluster=cluster, pk__in=data_ids).order_by("id")
+        jobs = []
+        sync_data_ids = []
+        for model in models:
+            jobs.append(ExternalJobSchema(**model.data))
+            sync_data_ids.append(model.pk)
+        return cls(cluster, jobs, sync_data_ids)
+
+    def _resolve_named(self, model, values: dict, negative: dict, generation: int | None) -> dict:
+        instances = resolve_models(model, self.cluster, values, generation) if values else {}
+        for name, fields in negative.items():
+            instances[name] = model.create_or_update(cluster=self.cluster, external_id=-1, name=name, **fields)
+        return instances
+
+    def _resolve_launched_by(self, generation: int | None) -> dict:
+        users = {}
+        for job in self.jobs:
+            if job.launched_by and job.launched_by.id:
+                users[(job.launched_by.id, job.launched_by.type)] = job.launched_by.name
+        instances = {}
+        for key, name in users.items():
+            user = dimension_cache.get(AAPUser, self.cluster.pk, generation, key, {"name": name})
+            if user is not None:
+                instances[key] = user
+        if len(instances) == len(users):
+            return instances
+        changed = []
+        for user in AAPUser.objects.filter(cluster=self.cluster, external_id__in={key[0] for key in users if key not in instances}):
+            key = (user.external_id, user.type)
+            if key not in users or key in instances:
+                continue
+            if user.name != users[key]:
+                user.name = users[key]
+                changed.append(user)
+            instances[key] = user
+            dimension_cache.set(AAPUser, self.cluster.pk, generation, key, {"name": user.name}, user)
+        if changed:
+            modified = timezone.now()
+            for user in changed:
+                user.internal_modified = modified
+            AAPUser.objects.bulk_update(changed, ["name", "internal_modified"])
+        for (external_id, user_type), name in users.items():
+            if (external_id, user_type) not in instances:
+                instances[(external_id, user_type)] = AAPUser.create_or_update(
+                    cluster=self.cluster, external_id=external_id, generation=generation, name=name, type=user_type)
+        return instances
+
+    def _resolve_dimensions(self):
+        organizations = {}
+        job_templates = {}
+        job_templates_negative = {}
+        inventories = {}
+        execution_environments = {}
+        instance_groups = {}
+        labels = {}
+        projects = {}
+        hosts = {}
+        hosts_negative = {}
+        for job in self.jobs:
+            summary_fields = job.summary_fields
+            if summary_fields.organization:
+                organizations[summary_fields.organization.id] = {
+                    "name": summary_fields.organization.name,
+                    "description": summary_fields.organization.description,
+                }
+            if summary_fields.job_template:
+                job_templates[summary_fields.job_template.id] = {
+                    "name": summary_fields.job_template.name,
+                    "description": summary_fields.job_template.description,
+                }
+            else:
+                job_templates_negative[job.name] = {"description": job.description}
+            if summary_fields.inventory:
+                inventories[summary_fields.inventory.id] = {
+                    "name": summary_fields.inventory.name,
+                    "description": summary_fields.inventory.description,
+                }
+            if summary_fields.execution_environment is not None:
+                execution_environments[summary_fields.execution_environment.id] = {
+                    "name": summary_fields.execution_environment.name,
+                    "description": summary_fields.execution_environment.description,
+                }
+            if summary_fields.instance_group is not None:
+                instance_groups[summary_fields.instance_group.id] = {
+                    "name": summary_fields.instance_group.name,
+                    "is_container_group": summary_fields.instance_group.is_container_group,
+                }
+            if summary_fields.labels is not None:
+                for label in summary_fields.labels.results:
+                    labels[label.id] = {"name": label.name}
+            if summary_fields.project is not None:
+                projects[summary_fields.project.id] = {
+                    "name": summary_fields.project.name,
+                    "description": summary_fields.project.description,
+                    "scm_type": summary_fields.project.scm_type,
+                }
+            for host_summary in job.host_summaries or []:
+                host = host_summary.summary_fields.host if host_summary.summary_fields else None
+                if host:
+                    hosts[host.id] = {"name": host.name, "description": host.description}
+                else:
+                    hosts_negative[host_summary.host_name] = {"description": ""}
+
+        # Read once for the whole batch, before any row is looked up.
+        generation = dimension_cache.generation(self.cluster.pk)
+        return {
+            "organizations": self._resolve_named(Organization, organizations, {}, generation),
+            "job_templates": self._resolve_named(JobTemplate, job_templates, job_templates_negative, generation),
+            "launched_by": self._resolve_launched_by(generation),
+            "inventories": self._resolve_named(Inventory, inventories, {}, generation),
+            "execution_environments": self._resolve_named(ExecutionEnvironment, execution_environments, {}, generation),
+            "instance_groups": self._resolve_named(InstanceGroup, instance_groups, {}, generation),
+            "labels": self._resolve_named(Label, labels, {}, generation),
+            "projects": self._resolve_named(Project, projects, {}, generation),
+            "hosts": self._resolve_named(Host, hosts, hosts_negative, generation),
+        }
+
+    def _update_manual_execution_time(self, job_templates: dict, job_template_of: dict):
+        # Same as DataParser.job_template, the first parsed job of a template without jobs
+        # defines its manual execution time.
+        template_ids = {job_template.pk for job_template in job_templates.values()}
+        with_jobs = set(Job.objects.filter(job_template_id__in=template_ids).values_list("job_template_id", flat=True).distinct())
+        changed = {}
+        for job in self.jobs:
+            job_template = job_template_of[job.id]
+            if job_template.pk in with_jobs or job_template.pk in changed:
+                continue
+            if job.elapsed is None:
+                continue
+            manual_execution_time = int(
+                decimal.Decimal(job.elapsed / 60 * 2).quantize(decimal.Decimal(1), rounding=decimal.ROUND_UP))
+            manual_execution_time = max(manual_execution_time, settings.DEFAULT_TIME_TAKEN_TO_MANUALLY_EXECUTE_MINUTES)
+            job_template.time_taken_manually_execute_minutes = min(manual_execution_time, 1000000)
+            changed[job_template.pk] = job_template
+        if changed:
+            logger.info(f"Manual execution time updated for {len(changed)} job templates.")
+            JobTemplate.objects.bulk_update(list(changed.values()), ["time_taken_manually_execute_minutes"])
+
+    def parse(self):
+        logger.info(f"Starting batch parse of {len(self.jobs)} jobs.")
+        if not self.jobs:
+            ClusterSyncData.objects.filter(pk__in=self.sync_data_ids).delete()
+            return
+
+        with dimension_cache.clear_on_error(self.cluster.pk), transaction.atomic():
+            dimensions = self._resolve_dimensions()
+            job_template_of = {}
+            for job in self.jobs:
+                external_job_template = job.summary_fields.job_template
+                if external_job_template:
+                    job_template_of[job.id] = dimensions["job_templates"][external_job_template.id]
+                else:
+                    job_template_of[job.id] = dimensions["job_templates"][job.name]
+            self._update_manual_execution_time(dimensions["job_templates"], job_template_of)
+
+            lock_jobs(self.cluster.pk, [job.id for job in self.jobs])
+            db_jobs = {job.external_id: job for job in Job.objects.filter(cluster=self.cluster, external_id__in=[job.id for job in self.jobs])}
+            existing_job_ids = [job.pk for job in db_jobs.values()]
+            rollup_removed = [JobDailyRollup.values(job) for job in db_jobs.values()]
+            stale_sketches = {JobDailyHostSketch.bucket(job) for job in db_jobs.values()}
+
+            new_jobs = []
+            host_summaries = {}
+            for data in self.jobs:
+                summary_fields = data.summary_fields
+                related = {
+                    "organization": dimensions["organizations"][summary_fields.organization.id] if summary_fields.organization else None,
+                    "instance_group": dimensions["instance_groups"][summary_fields.instance_group.id] if summary_fields.instance_group is not None else None,
+                    "execution_environment": dimensions["execution_environments"][summary_fields.execution_environment.id] if summary_fields.execution_environment is not None else None,
+                    "inventory": dimensions["inventories"][summary_fields.inventory.id] if summary_fields.inventory else None,
+                    "job_template": job_template_of[data.id],
+                    "launched_by": dimensions["launched_by"][(data.launched_by.id, data.launched_by.type)] if data.launched_by and data.launched_by.id else None,
+                    "project": dimensions["projects"][summary_fields.project.id] if summary_fields.project is not None else None,
+                }
+                counts = dict.fromkeys(self.JOB_COUNT_FIELDS, 0)
+                summaries = []
+                for host_summary in data.host_summaries or []:
+                    host = host_summary.summary_fields.host if host_summary.summary_fields else None
+                    summary = host_summary.model_dump()
+                    summary.pop("summary_fields")
+                    summary["host"] = dimensions["hosts"][host.id] if host else dimensions["hosts"][host_summary.host_name]
+                    summaries.append(summary)
+                    counts["num_hosts"] += 1
+                    counts["changed_hosts_count"] += summary.get("changed", 0)
+                    counts["dark_hosts_count"] += summary.get("dark", 0)
+                    counts["failures_hosts_count"] += summary.get("failures", 0)
+                    counts["ok_hosts_count"] += summary.get("ok", 0)
+                    counts["processed_hosts_count"] += summary.get("processed", 0)
+                    counts["skipped_hosts_count"] += summary.get("skipped", 0)
+                    counts["failed_hosts_count"] += 1 if summary.get("failed", True) is True else 0
+                    counts["ignored_hosts_count"] += summary.get("ignored", 0)
+                    counts["rescued_hosts_count"] += summary.get("rescued", 0)
+                host_summaries[data.id] = summaries
+
+                job_data = data.model_dump()
+                for key in ["id", "summary_fields", "launched_by", "execution_environment", "host_summaries"]:
+                    job_data.pop(key, None)
+                job = db_jobs.get(data.id)
+                if job is None:
+                    job = Job(cluster=self.cluster, external_id=data.id, **related, **job_data, **counts)
+                    new_jobs.append(job)
+                    db_jobs[data.id] = job
+                else:
+                    for key in self.JOB_UPDATE_FIELDS:
+                        setattr(job, key, related[key] if key in related else job_data[key])
+                    for key, value in counts.items():
+                        setattr(job, key, value)
+
+            logger.info(f"Creating {len(new_jobs)} jobs, updating {len(existing_job_ids)} jobs.")
+            Job.objects.bulk_create(new_jobs)
+            if existing_job_ids:
+                modified = timezone.now()
+                existing_jobs = [job for job in db_jobs.values() if job.pk in existing_job_ids]
+                for job in existing_jobs:
+                    job.internal_modified = modified
+                Job.objects.bulk_update(existing_jobs, [*self.JOB_UPDATE_FIELDS, *self.JOB_COUNT_FIELDS, "internal_modified"])
+
+            db_job_labels = {}
+            for job_label in JobLabel.objects.filter(job_id__in=existing_job_ids):
+                db_job_labels[(job_label.job_id, job_label.label_id)] = job_label
+            new_job_labels = []
+            seen_job_labels = set()
+            for data in self.jobs:
+                job = db_jobs[data.id]
+                external_labels = data.summary_fields.labels.results if data.summary_fields.labels is not None else []
+                for external_label in external_labels:
+                    label = dimensions["labels"][external_label.id]
+                    key = (job.pk, label.pk)
+                    if key in seen_job_labels:
+                        continue
+                    seen_job_labels.add(key)
+                    if db_job_labels.pop(key, None) is None:
+                        new_job_labels.append(JobLabel(job=job, label=label))
+            stale_job_labels = [job_label.pk for job_label in db_job_labels.values()]
+            if stale_job_labels:
+                logger.info(f"Deleting {len(stale_job_labels)} old job labels.")
+                JobLabel.objects.filter(pk__in=stale_job_labels).delete()
+            JobLabel.objects.bulk_create(new_job_labels)
+
+            logger.info("Deleting job host summaries.")
+            JobHostSummary.objects.filter(job_id__in=existing_job_ids).delete()
+            JobHostSummary.objects.bulk_create(
+                [JobHostSummary(job=db_jobs[job_id], **summary) for job_id, summaries in host_summaries.items() for summary in summaries],
+                batch_size=1000,
+            )
+
+            JobDailyRollup.apply(self.cluster.pk, rollup_removed, [JobDailyRollup.values(job) for job in db_jobs.values()])
+            existing_job_id_set = set(existing_job_ids)
+            stale_sketches.update(JobDailyHostSketch.bucket(job) for job in db_jobs.values() if job.pk in existing_job_id_set)
+            JobDailyHostSketch.refresh(self.cluster.pk, [job.pk for job in new_jobs], stale_sketches)
+            report_cache.bump_data_version()
+
+            logger.info(f"Finished batch parse, deleting {len(self.sync_data_ids)} records.")
+            ClusterSyncData.objects.filter(pk__in=self.sync_data_ids).delete()
@@ -0,0 +1,133 @@
+import datetime
+import logging
+from typing import Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from backend.apps.clusters.cache import report_cache
+from backend.apps.clusters.models import (
+    ClusterSyncData,
+    Job,
+    JobDailyHostSketch,
+    JobDailyRollup,
+    JobHostSummary,
+    JobLabel,
+    JobStatusChoices)
+from backend.apps.common.models import PdfReport
+from backend.apps.scheduler.models import SyncJob
+
+logger = logging.getLogger("automation_dashboard.clusters.retention")
+
+FINISHED_STATUSES = [JobStatusChoices.SUCCESSFUL, JobStatusChoices.FAILED, JobStatusChoices.ERROR, JobStatusChoices.CANCELED]
+ACTIVE_STATUSES = [JobStatusChoices.NEW, JobStatusChoices.PENDING, JobStatusChoices.WAITING, JobStatusChoices.RUNNING]
+
+
+def retention_cutoff(name: str) -> datetime.datetime | None:
+    """Time before which rows of the DATA_RETENTION_DAYS entry are deleted, None when they are kept."""
+    days = getattr(settings, "DATA_RETENTION_DAYS", {}).get(name)
+    return timezone.now() - datetime.timedelta(days=days) if days is not None else None
+
+
+def delete_in_batches(name: str, queryset: QuerySet, delete: Callable[[list[int]], None]) -> int:
+    """
+    Delete the rows of the queryset DATA_RETENTION_BATCH_SIZE at a time, each batch in its own transaction
+    so locks are held briefly, and at most DATA_RETENTION_MAX_BATCHES batches per run.
+    """
+    batch_size = getattr(settings, "DATA_RETENTION_BATCH_SIZE", 5000)
+    max_batches = getattr(settings, "DATA_RETENTION_MAX_BATCHES", 100)
+    deleted = 0
+    for _ in range(max_batches):
+        with transaction.atomic():
+            ids = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+            if ids:
+                delete(ids)
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+    if deleted:
+        logger.info(f"Deleted {deleted} {name} past retention.")
+    return deleted
+
+
+def _delete_jobs(ids: list[int]):
+    JobLabel.objects.filter(job_id__in=ids).delete()
+    JobHostSummary.objects.filter(job_id__in=ids).delete()
+    Job.objects.filter(pk__in=ids).only("pk").delete()
+    report_cache.bump_data_version()
+
+
+def purge_jobs() -> int:
+    """
+    Delete jobs finished before their retention with their labels and host summaries. The daily rollup
+    and host sketches already summarize them, they are kept so date range reports still cover the
+    deleted jobs unless DATA_RETENTION_KEEP_ROLLUP is disabled.
+    """
+    cutoff = retention_cutoff("jobs")
+    if cutoff is None:
+        return 0
+    deleted = delete_in_batches("jobs", Job.objects.filter(finished__lt=cutoff), _delete_jobs)
+    if not getattr(settings, "DATA_RETENTION_KEEP_ROLLUP", True):
+        with transaction.atomic():
+            JobDailyRollup.objects.filter(day__lt=cutoff.date()).delete()
+            JobDailyHostSketch.objects.filter(day__lt=cutoff.date()).delete()
+            report_cache.bump_data_version()
+    return deleted
+
+
+def purge_sync_jobs() -> int:
+    """Delete sync and parse jobs that finished before their retention."""
+    cutoff = retention_cutoff("sync_jobs")
+    if cutoff is None:
+        return 0
+    return delete_in_batches(
+        "sync jobs",
+        SyncJob.objects.filter(status__in=FINISHED_STATUSES, finished__lt=cutoff),
+        lambda ids: SyncJob.objects.filter(pk__in=ids).delete())
+
+
+def purge_sync_data() -> int:
+    """Delete raw sync data no pending parse job will read, left behind by failed or canceled parses."""
+    cutoff = retention_cutoff("sync_data")
+    if cutoff is None:
+        return 0
+    queryset = (ClusterSyncData.objects
+                .filter(internal_created__lt=cutoff)
+                .exclude(Exists(SyncJob.objects.filter(cluster_sync_data=OuterRef("pk"), status__in=ACTIVE_STATUSES))))
+    return delete_in_batches(
+        "sync data",
+        queryset,
+        lambda ids: ClusterSyncData.objects.filter(pk__in=ids).only("pk").delete())
+
+
+def fail_stale_pdf_reports() -> int:
+    """Fail PDF reports not rendered within REPORT_PDF_TIMEOUT_SECONDS, e.g. lost by a restarted worker."""
+    timeout = getattr(settings, "REPORT_PDF_TIMEOUT_SECONDS", 1800)
+    failed = PdfReport.objects.filter(
+        status__in=[JobStatusChoices.PENDING, JobStatusChoices.RUNNING],
+        internal_created__lt=timezone.now() - datetime.timedelta(seconds=timeout),
+    ).update(status=JobStatusChoices.FAILED, explanation=f"PDF report was not rendered within {timeout} seconds.",
+             finished=timezone.now())
+    if failed:
+        logger.warning(f"Failed {failed} PDF reports not rendered in time.")
+    return failed
+
+
+def purge_pdf_reports() -> int:
+    """Delete PDF reports created more than REPORT_PDF_RETENTION_SECONDS ago."""
+    retention = getattr(settings, "REPORT_PDF_RETENTION_SECONDS", 86400)
+    return delete_in_batches(
+        "PDF reports",
+        PdfReport.objects.filter(internal_created__lt=timezone.now() - datetime.timedelta(seconds=retention)),
+        lambda ids: PdfReport.objects.filter(pk__in=ids).delete())
+
+
+def purge_old_data() -> dict[str, int]:
+    return {
+        "jobs": purge_jobs(),
+        "sync_jobs": purge_sync_jobs(),
+        "sync_data": purge_sync_data(),
+        "pdf_reports": purge_pdf_reports(),
+    }
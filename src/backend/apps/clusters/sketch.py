@@ -0,0 +1,51 @@
+import hashlib
+import math
+import struct
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch estimating the number of distinct values added to it. Sketches of
+    different buckets are merged by taking the maximum of every register. Only registers
+    that are set are stored, so sketches of a few hosts stay a few bytes.
+    """
+    PRECISION = 12
+    REGISTERS = 1 << PRECISION
+    ENTRY = struct.Struct(">HB")
+
+    def __init__(self, registers: dict[int, int] | None = None):
+        self.registers = registers if registers is not None else {}
+
+    @classmethod
+    def _hash(cls, value) -> int:
+        return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+    def add(self, value) -> None:
+        hashed = self._hash(value)
+        index = hashed >> (64 - self.PRECISION)
+        remaining = hashed & ((1 << (64 - self.PRECISION)) - 1)
+        rank = (64 - self.PRECISION) - remaining.bit_length() + 1
+        if rank > self.registers.get(index, 0):
+            self.registers[index] = rank
+
+    def update(self, other: "HyperLogLog") -> None:
+        registers = self.registers
+        for index, rank in other.registers.items():
+            if rank > registers.get(index, 0):
+                registers[index] = rank
+
+    def count(self) -> int:
+        m = self.REGISTERS
+        zeros = m - len(self.registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / (zeros + sum(2.0 ** -rank for rank in self.registers.values()))
+        if estimate <= 2.5 * m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities.
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return b"".join(self.ENTRY.pack(index, rank) for index, rank in sorted(self.registers.items()))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(dict(cls.ENTRY.iter_unpack(bytes(data))))
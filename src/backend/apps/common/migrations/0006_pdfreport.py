@@ -0,0 +1,32 @@
+# Generated by Django 5.2.14 on 2026-10-18 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_alter_settings_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PdfReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('internal_created', models.DateTimeField(auto_now_add=True)),
+                ('internal_modified', models.DateTimeField(auto_now=True)),
+                ('key', models.CharField(db_index=True, max_length=255, null=True)),
+                ('status', models.CharField(choices=[('new', 'New'), ('pending', 'Pending'), ('waiting', 'Waiting'), ('running', 'Running'), ('successful', 'Successful'), ('failed', 'Failed'), ('error', 'Error'), ('canceled', 'Canceled')], default='pending', max_length=20)),
+                ('query_params', models.TextField(blank=True, default='')),
+                ('job_chart', models.TextField(blank=True, default='')),
+                ('host_chart', models.TextField(blank=True, default='')),
+                ('content', models.BinaryField(null=True)),
+                ('explanation', models.TextField(blank=True, default='')),
+                ('finished', models.DateTimeField(editable=False, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 
-from backend.apps.clusters.models import CreatUpdateModel
+from backend.apps.clusters.models import CreatUpdateModel, JobStatusChoices
 
 
 class Currency(CreatUpdateModel):
@@ -56,3 +56,24 @@ class FilterSet(CreatUpdateModel):
 
     def __str__(self):
         return self.name
+
+
+class PdfReport(CreatUpdateModel):
+    """
+    A PDF report rendered in the background by the generate_pdf_report task. The key is the report
+    cache key of the filters, costs and data version, requests with the same key share one render.
+    """
+    key = models.CharField(max_length=255, null=True, db_index=True)
+    status = models.CharField(choices=JobStatusChoices.choices, default=JobStatusChoices.PENDING, max_length=20)
+    query_params = models.TextField(blank=True, default="")
+    job_chart = models.TextField(blank=True, default="")
+    host_chart = models.TextField(blank=True, default="")
+    content = models.BinaryField(null=True, editable=False)
+    explanation = models.TextField(blank=True, default="")
+    finished = models.DateTimeField(null=True, editable=False)
+
+    class Meta:
+        abstract = False
+
+    def __str__(self):
+        return f'PDF report {self.pk}: {self.status}'
@@ -1,4 +1,5 @@
 from ansible_base.lib.utils.db import get_pg_notify_params
+from dispatcherd.config import is_setup, setup as dispatcher_setup
 from django.conf import settings
 
 from backend.apps.dispatch.pool import get_auto_max_workers
@@ -10,6 +11,7 @@ def get_dispatcherd_config():
         "service": {
             "pool_kwargs": {
                 "min_workers": settings.JOB_EVENT_WORKERS,
+                # The task manager splits it between the sync and parse pools, see get_pool_max_workers
                 "max_workers": get_auto_max_workers(),
             },
             "main_kwargs": {
@@ -65,7 +67,8 @@ def get_dispatcherd_config():
         "channels": [
             settings.DISPATCHER_SYNC_CHANNEL,
             settings.DISPATCHER_PARSE_CHANNEL,
-            settings.DISPATCHER_METRICS_CHANNEL
+            settings.DISPATCHER_METRICS_CHANNEL,
+            settings.DISPATCHER_REPORT_CHANNEL
         ],
         "default_publish_channel": settings.CLUSTER_HOST_ID,
         "max_connection_idle_seconds": 5,
@@ -80,3 +83,9 @@ def get_dispatcherd_config():
     }
 
     return config
+
+
+def setup_dispatcherd_publisher():
+    """Configure dispatcherd once in processes that only publish tasks, like the web server."""
+    if not is_setup():
+        dispatcher_setup(config=get_dispatcherd_config())
@@ -1,4 +1,6 @@
 from ansible_runner.utils.capacity import get_mem_in_bytes, get_cpu_count
+from django.conf import settings
+
 from backend.common_utils import get_corrected_memory, get_mem_effective_capacity, get_corrected_cpu, get_cpu_effective_capacity
 
 
@@ -31,3 +33,46 @@ def get_auto_max_workers():
     auto_max = max(mem_capacity, cpu_capacity)
 
     return auto_max
+
+
+def get_pool_budget():
+    """Jobs the sync and parse pools may run at once together
+
+    The dispatcher service runs at most get_auto_max_workers() workers, JOB_EVENT_WORKERS of them are
+    left for the task managers and system tasks.
+    """
+    return max(len(settings.DISPATCHER_POOLS), get_auto_max_workers() - settings.JOB_EVENT_WORKERS)
+
+
+def get_pool_max_workers(pool):
+    """Most jobs of a pool that may run at once, see DISPATCHER_POOLS
+
+    The pools split get_pool_budget(). The parse pool takes its share first, leaving at least one
+    worker to the sync pool, and the sync pool gets the rest.
+    """
+    budget = get_pool_budget()
+    parse_max_workers = settings.DISPATCHER_POOLS['parse']['max_workers']
+    if parse_max_workers is None:
+        # Parse jobs are bound by the database, more of them than cores only add contention
+        parse_max_workers = max(1, int(get_corrected_cpu(get_cpu_count())))
+    parse_max_workers = min(parse_max_workers, budget - 1)
+    if pool == 'parse':
+        return parse_max_workers
+    max_workers = settings.DISPATCHER_POOLS[pool]['max_workers']
+    if max_workers is None:
+        return budget - parse_max_workers
+    return min(max_workers, budget - parse_max_workers)
+
+
+def get_pool_workers(pool, pending, running, recent_latency=None, baseline_latency=None):
+    """Number of jobs of a pool, or of a task manager lane of it, the task manager lets run at once
+
+    The number grows with the queue depth, up to the pool maximum. When the recent jobs take
+    DISPATCHER_AUTOSCALE_LATENCY_FACTOR times longer than the baseline, the jobs contend for a shared
+    resource, like the database connections of parse jobs, so it backs off to half of the running jobs.
+    """
+    workers = running + pending
+    if recent_latency and baseline_latency and \
+            float(recent_latency) > float(baseline_latency) * settings.DISPATCHER_AUTOSCALE_LATENCY_FACTOR:
+        workers = running // 2
+    return min(max(workers, settings.DISPATCHER_POOLS[pool]['min_workers']), get_pool_max_workers(pool))
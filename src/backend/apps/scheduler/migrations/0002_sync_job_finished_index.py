@@ -0,0 +1,17 @@
+# Generated by Django 5.2.14 on 2026-10-18 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduler', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='syncjob',
+            index=models.Index(fields=['status', 'finished'], name='syncjob_status_finished_idx'),
+        ),
+    ]
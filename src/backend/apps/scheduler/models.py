@@ -9,13 +9,14 @@ import dateutil.rrule
 import pytz
 from ansible_base.lib.utils.models import get_type_for_model, prevent_search
 from dateutil.tz import tzutc, datetime_exists
-from django.db import models
+from django.db import connection, models
 from django.db.models import QuerySet
 from django.utils.timezone import make_aware, now
 from django.utils.translation import gettext_lazy as _
 from solo.models import SingletonModel
 
 from backend.apps.clusters.models import Cluster, CreatUpdateModel, JobLaunchTypeChoices, JobStatusChoices, ClusterSyncData
+from backend.common_utils import ScheduleParseDataManager, ScheduleSyncTaskManager
 
 logger = logging.getLogger('automation_dashboard.scheduler')
 
@@ -299,6 +300,10 @@ class JobTypeChoices(models.TextChoices):
 class SyncJob(CreatUpdateModel):
     class Meta:
         ordering = ['internal_created', 'id']
+        indexes = [
+            # The task manager reads the durations of recently finished jobs to scale the dispatcher pools.
+            models.Index(fields=['status', 'finished'], name='syncjob_status_finished_idx'),
+        ]
 
     name = models.CharField(max_length=512)
     status = models.CharField(
@@ -404,8 +409,25 @@ class SyncJob(CreatUpdateModel):
         self.save()
         return True
 
+    @classmethod
+    def bulk_signal_start(cls, pks) -> list[int]:
+        """Move the given jobs that can start to PENDING in one statement, returns the ids of the moved jobs."""
+        if not pks:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {cls._meta.db_table} SET status = %s, internal_modified = %s "
+                f"WHERE id = ANY(%s::bigint[]) AND status IN (%s, %s) RETURNING id",
+                [JobStatusChoices.PENDING, now(), list(pks), JobStatusChoices.NEW, JobStatusChoices.WAITING],
+            )
+            started = [row[0] for row in cursor.fetchall()]
+        if started:
+            ScheduleSyncTaskManager().schedule()
+        return started
+
     def save(self, *args, **kwargs):
         update_fields = kwargs.get('update_fields', [])
+        status_saved = not update_fields or 'status' in update_fields
 
         if self.status == JobStatusChoices.RUNNING and not self.started:
             # Record the `started` time.
@@ -430,4 +452,18 @@ class SyncJob(CreatUpdateModel):
                 if 'elapsed' not in update_fields:
                     update_fields.append('elapsed')
 
-        return super(SyncJob, self).save(*args, **kwargs)
+        result = super(SyncJob, self).save(*args, **kwargs)
+        if status_saved:
+            self.wakeup_schedulers()
+        return result
+
+    def wakeup_schedulers(self):
+        """Run the schedulers that act on the current status once the transaction commits."""
+        finished = self.status in (JobStatusChoices.SUCCESSFUL, JobStatusChoices.FAILED,
+                                   JobStatusChoices.ERROR, JobStatusChoices.CANCELED)
+        if self.status == JobStatusChoices.PENDING or finished:
+            # A finished job frees a slot of its task manager lane.
+            ScheduleSyncTaskManager().schedule()
+        if self.type == JobTypeChoices.PARSE_JOB_DATA and (self.status == JobStatusChoices.NEW or finished):
+            # A finished parse job frees a slot of the per cluster limit.
+            ScheduleParseDataManager().schedule()
@@ -1,27 +1,72 @@
+import functools
+import heapq
 import logging
 import signal
 import time
 import uuid
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from datetime import timedelta
 
+import psycopg
 import redis
 from ansible_base.lib.utils.db import advisory_lock
 from django.conf import settings
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Avg, Q
+from django.utils.timezone import now
 
 from backend.analytics.subsystem_metrics import DispatcherMetrics
+from backend.apps.clusters.models import JobLaunchTypeChoices
+from backend.apps.dispatch.pool import get_pool_max_workers, get_pool_workers
 from backend.apps.scheduler.models import SyncJob, JobTypeChoices, JobStatusChoices
 from backend.apps.tasks.jobs import AAPSyncTask, AAPParseDataTask
 from backend.common_utils import ScheduleSyncTaskManager, is_testing
 
 logger = logging.getLogger('automation_dashboard.scheduler')
 
+# Task manager lanes in priority order
+SYNC_LANE = "sync"
+PARSE_LANE = "parse"
+BACKFILL_LANE = "backfill"
+LANES = (SYNC_LANE, PARSE_LANE, BACKFILL_LANE)
+# Dispatcher pool of the jobs of each lane, see DISPATCHER_POOLS
+LANE_POOLS = {SYNC_LANE: "sync", BACKFILL_LANE: "sync", PARSE_LANE: "parse"}
+
+
+def get_lane(task):
+    if task.type == JobTypeChoices.PARSE_JOB_DATA:
+        return PARSE_LANE
+    if task.launch_type == JobLaunchTypeChoices.MANUAL:
+        # Manual sync jobs are the backfills created by the syncdata command
+        return BACKFILL_LANE
+    return SYNC_LANE
+
+
+@contextmanager
+def publish_pipeline():
+    """
+    Pipeline the queries made in the block on the Django connection, which dispatcherd also publishes pg_notify
+    messages on, so a batch of task submissions costs one round trip to the database.
+    """
+    connection.ensure_connection()
+    if not psycopg.Pipeline.is_supported():
+        yield
+        return
+    with connection.connection.pipeline():
+        yield
+
+
+def timeit(func=None, *, metric=None):
+    """Record the time spent in the method in the {prefix}_{metric}_seconds metric, metric defaults to the method name."""
+    if func is None:
+        return functools.partial(timeit, metric=metric)
 
-def timeit(func):
     def inner(*args, **kwargs):
         t_now = time.perf_counter()
         result = func(*args, **kwargs)
         dur = time.perf_counter() - t_now
-        args[0].subsystem_metrics.inc(f"{args[0].prefix}_{func.__name__}_seconds", dur)
+        args[0].subsystem_metrics.inc(f"{args[0].prefix}_{metric or func.__name__}_seconds", dur)
         return result
 
     return inner
@@ -116,57 +161,137 @@ class SyncTaskManager(TaskBase):
     def __init__(self):
         super(SyncTaskManager, self).__init__(prefix="automation_dashboard_task_manager")
 
-    @timeit
-    def start_task(self, task):
-        self.subsystem_metrics.inc(f"{self.prefix}_tasks_started", 1)
-        self.start_task_limit -= 1
+    # Recorded in the start_task metric dashboards already chart.
+    @timeit(metric="start_task")
+    def start_tasks(self, tasks):
+        """Move the tasks to WAITING with one update and submit them to the dispatcher in one round trip."""
+        self.subsystem_metrics.inc(f"{self.prefix}_tasks_started", len(tasks))
+        self.start_task_limit -= len(tasks)
 
         if self.start_task_limit == 0:
             # schedule another run immediately after this task manager
             ScheduleSyncTaskManager().schedule()
 
-        task.status = JobStatusChoices.WAITING
-        task.celery_task_id = str(uuid.uuid4())
-        task.save()
-        if task.type == JobTypeChoices.SYNC_JOBS:
-            task_cls = AAPSyncTask
-            task_cls.apply_async(
-                [task.pk],
-                {},
-                queue=settings.DISPATCHER_SYNC_CHANNEL,
-                uuid=task.celery_task_id,
-            )
-        elif task.type == JobTypeChoices.PARSE_JOB_DATA:
-            task_cls = AAPParseDataTask
-            task_cls.apply_async(
-                [task.pk],
-                {},
-                queue=settings.DISPATCHER_PARSE_CHANNEL,
-                uuid=task.celery_task_id,
-            )
-        else:
-            msg = f"Unknown task type: {task.type}"
-            logger.error(f"Unknown task type: {task.type}")
-            task.status = JobStatusChoices.FAILED
-            task.explanation = msg
-            return
+        task_classes = {
+            JobTypeChoices.SYNC_JOBS: (AAPSyncTask, settings.DISPATCHER_SYNC_CHANNEL),
+            JobTypeChoices.PARSE_JOB_DATA: (AAPParseDataTask, settings.DISPATCHER_PARSE_CHANNEL),
+        }
+        submissions = []
+        waiting = []
+        modified = now()
+        for task in tasks:
+            if task.type not in task_classes:
+                msg = f"Unknown task type: {task.type}"
+                logger.error(msg)
+                task.status = JobStatusChoices.FAILED
+                task.explanation = msg
+                task.save(update_fields=['status', 'explanation'])
+                continue
+            task.status = JobStatusChoices.WAITING
+            task.celery_task_id = str(uuid.uuid4())
+            task.internal_modified = modified
+            waiting.append(task)
+            submissions.append((*task_classes[task.type], task))
+
+        SyncJob.objects.bulk_update(waiting, ['status', 'celery_task_id', 'internal_modified'])
+        with publish_pipeline():
+            for task_cls, queue, task in submissions:
+                task_cls.apply_async(
+                    [task.pk],
+                    {},
+                    queue=queue,
+                    uuid=task.celery_task_id,
+                )
 
     @timeit
     def process_pending_tasks(self, pending_tasks):
+        tasks = []
         for task in pending_tasks:
-            if self.start_task_limit <= 0:
+            if len(tasks) >= self.start_task_limit:
                 break
             if self.timed_out():
                 logger.warning("Task manager has reached time out while processing pending jobs, exiting loop early")
                 break
-            self.start_task(task)
+            tasks.append(task)
+        if tasks:
+            self.start_tasks(tasks)
+
+    def order_pending_tasks(self, pending_tasks, running_tasks):
+        """
+        Order the pending tasks by lane priority. Within a lane the clusters with the fewest active tasks go first,
+        so a cluster with a large backlog does not hold back the others. Tasks over the limit of their lane are left
+        for a later run.
+        """
+        limits = getattr(settings, "TASK_MANAGER_LANE_LIMITS", {})
+        lane_limits = self.get_lane_limits(pending_tasks, running_tasks)
+        pool_limits = {pool: get_pool_max_workers(pool) for pool in set(LANE_POOLS.values())}
+        pool_active = Counter(LANE_POOLS[get_lane(t)] for t in running_tasks)
+        lane_active = Counter(get_lane(t) for t in running_tasks)
+        cluster_active = Counter((get_lane(t), t.cluster_id) for t in running_tasks)
+        queues = defaultdict(lambda: defaultdict(deque))
+        for task in pending_tasks:
+            queues[get_lane(task)][task.cluster_id].append(task)
+
+        ordered = []
+        for lane in LANES:
+            limit = lane_limits[lane] if limits.get(lane) is None else min(limits[lane], lane_limits[lane])
+            pool = LANE_POOLS[lane]
+            heap = [(cluster_active[lane, cluster_id], tasks[0].id, cluster_id) for cluster_id, tasks in queues[lane].items()]
+            heapq.heapify(heap)
+            while heap and lane_active[lane] < limit and pool_active[pool] < pool_limits[pool]:
+                active, _, cluster_id = heapq.heappop(heap)
+                tasks = queues[lane][cluster_id]
+                ordered.append(tasks.popleft())
+                lane_active[lane] += 1
+                pool_active[pool] += 1
+                if tasks:
+                    heapq.heappush(heap, (active + 1, tasks[0].id, cluster_id))
+            if heap:
+                logger.debug(f"{lane} lane has reached its limit of active tasks")
+        return ordered
+
+    def get_lane_latencies(self):
+        """
+        Average duration of the recent and the baseline successful jobs of the sync and parse lanes, in one query.
+        Backfill slices are left out, they last as long as their range takes to sync whatever the load, and would
+        otherwise back off the scheduled syncs sharing their pool.
+        """
+        baseline_since = now() - timedelta(seconds=settings.DISPATCHER_AUTOSCALE_BASELINE_SECONDS)
+        recent_since = now() - timedelta(seconds=settings.DISPATCHER_AUTOSCALE_RECENT_SECONDS)
+        rows = (
+            SyncJob.objects
+            .filter(status=JobStatusChoices.SUCCESSFUL, finished__gte=baseline_since,
+                    type__in=[JobTypeChoices.SYNC_JOBS, JobTypeChoices.PARSE_JOB_DATA])
+            .exclude(type=JobTypeChoices.SYNC_JOBS, launch_type=JobLaunchTypeChoices.MANUAL)
+            .order_by()
+            .values('type')
+            .annotate(recent=Avg('elapsed', filter=Q(finished__gte=recent_since)), baseline=Avg('elapsed'))
+        )
+        return {
+            PARSE_LANE if row['type'] == JobTypeChoices.PARSE_JOB_DATA else SYNC_LANE: (row['recent'], row['baseline'])
+            for row in rows
+        }
+
+    def get_lane_limits(self, pending_tasks, running_tasks):
+        """Jobs each lane may have running, scaled with its queue depth and backed off on its own latency only"""
+        pending = Counter(get_lane(t) for t in pending_tasks)
+        running = Counter(get_lane(t) for t in running_tasks)
+        latencies = self.get_lane_latencies() if pending_tasks else {}
+        limits = {
+            lane: get_pool_workers(LANE_POOLS[lane], pending[lane], running[lane], *latencies.get(lane, (None, None)))
+            for lane in LANES
+        }
+        for pool in set(LANE_POOLS.values()):
+            workers = sum(limit for lane, limit in limits.items() if LANE_POOLS[lane] == pool)
+            self.subsystem_metrics.set(f"{self.prefix}_{pool}_pool_workers", min(workers, get_pool_max_workers(pool)))
+        return limits
 
     def process_tasks(self):
         running_tasks = [t for t in self.all_tasks if t.status in [JobStatusChoices.WAITING, JobStatusChoices.RUNNING]]
         self.subsystem_metrics.inc(f"{self.prefix}_running_processed", len(running_tasks))
         pending_tasks = [t for t in self.all_tasks if t.status == JobStatusChoices.PENDING]
         self.subsystem_metrics.inc(f"{self.prefix}_pending_processed", len(pending_tasks))
-        self.process_pending_tasks(pending_tasks)
+        self.process_pending_tasks(self.order_pending_tasks(pending_tasks, running_tasks))
 
     def _schedule(self):
         self.get_tasks(
@@ -8,6 +8,7 @@ def run_manager(manager):
     manager().schedule()
 
 
-@task(queue=settings.DISPATCHER_SYNC_CHANNEL)
+# Wakeups that arrive while the manager runs collapse into one follow-up run
+@task(queue=settings.DISPATCHER_SYNC_CHANNEL, on_duplicate='queue_one')
 def sync_task_manager():
     run_manager(SyncTaskManager)
@@ -1,3 +1,5 @@
+import decimal
+import json
 import logging
 import time
 
@@ -5,12 +7,14 @@ from dispatcherd.publish import task
 from dispatcherd.worker.exceptions import DispatcherCancel
 from django.conf import settings
 from django.db import transaction
+from django.utils.timezone import now
 
 from backend.analytics.subsystem_metrics import DispatcherMetrics
 from backend.apps.clusters.connector import ApiConnector
-from backend.apps.clusters.models import JobStatusChoices
-from backend.apps.clusters.parser import DataParser
-from backend.apps.scheduler.models import SyncJob
+from backend.apps.clusters.models import JobLaunchTypeChoices, JobStatusChoices
+from backend.apps.clusters.parser import BatchDataParser, DataParser
+from backend.apps.scheduler.models import SyncJob, JobTypeChoices as SyncJobTypeChoices
+from backend.common_utils import ScheduleParseDataManager, ScheduleSyncTaskManager, task_manager_bulk_reschedule
 from backend.utils.update_models import update_model
 
 logger = logging.getLogger('automation_dashboard.tasks.jobs')
@@ -87,6 +91,34 @@ class AAPSyncTask(BaseTask):
     model = SyncJob
     prefix = "automation_dashboard_sync_job"
 
+    def run(self, pk, **kwargs):
+        try:
+            super().run(pk, **kwargs)
+        finally:
+            if self.instance is not None and self.instance.launch_type == JobLaunchTypeChoices.MANUAL:
+                self.start_next_slice()
+
+    def start_next_slice(self):
+        """
+        Start the next queued slice of the backfill created by `syncdata --slice` the finished job
+        belongs to, keeping its parallelism. Other manual syncs do not start slices.
+        """
+        backfill = (self.instance.get_job_args or {}).get('backfill')
+        if backfill is None:
+            return
+        with transaction.atomic():
+            next_slice = SyncJob.objects.select_for_update(skip_locked=True).filter(
+                cluster=self.cluster,
+                type=SyncJobTypeChoices.SYNC_JOBS,
+                launch_type=JobLaunchTypeChoices.MANUAL,
+                status=JobStatusChoices.NEW,
+                # job_args is the JSON text written by syncdata
+                job_args__contains=json.dumps({'backfill': backfill})[1:-1],
+            ).order_by('id').first()
+            if next_slice is not None:
+                logger.info(f'Starting next backfill slice {next_slice.name}.')
+                next_slice.signal_start()
+
     def run_task(self):
         job_args = self.instance.get_job_args
 
@@ -95,9 +127,17 @@ class AAPSyncTask(BaseTask):
             logger.error(msg)
             self.update_model(self.instance.pk, status=JobStatusChoices.FAILED, explanation=msg)
             return
+        job_args.pop('backfill', None)
 
         connector = ApiConnector(self.cluster, **job_args)
+        # Every staged ClusterSyncData queues a parse job, wake up the data parser scheduler once for all of them
+        with task_manager_bulk_reschedule():
+            try:
+                self.sync_cluster(connector)
+            finally:
+                connector.close()
 
+    def sync_cluster(self, connector):
         ### Check AAP version an if theserver is alive
         try:
             is_valid_aap_version = connector.check_aap_version()
@@ -167,6 +207,13 @@ class AAPParseDataTask(BaseTask):
             self.update_model(self.instance.pk, status=JobStatusChoices.FAILED, explanation=msg)
             return
 
+        batch_size = getattr(settings, 'DATA_PARSE_BATCH_SIZE', 1)
+        if batch_size > 1:
+            # Finishing the claimed jobs wakes up the managers once for the whole batch
+            with task_manager_bulk_reschedule():
+                self.run_batch(sync_data, batch_size)
+            return
+
         try:
             data_parser = DataParser(sync_data.id)
             data_parser.parse()
@@ -180,3 +227,78 @@ class AAPParseDataTask(BaseTask):
             return
 
         self.update_model(self.instance.pk, status=JobStatusChoices.SUCCESSFUL)
+
+    def parse_one(self, pk, sync_data_id):
+        try:
+            DataParser(sync_data_id).parse()
+        except DispatcherCancel:
+            raise
+        except Exception:
+            msg = f'Failed to parse AAP sync data: {sync_data_id}'
+            logger.exception(msg)
+            self.update_model(pk, status=JobStatusChoices.FAILED, explanation=msg)
+            return
+        self.update_model(pk, status=JobStatusChoices.SUCCESSFUL)
+
+    def claim_batch(self, limit):
+        """Claim parse jobs of the same cluster not yet started, so this task parses them in one batch."""
+        started = now()
+        with transaction.atomic():
+            claimed = list(SyncJob.objects.select_for_update(skip_locked=True).filter(
+                cluster=self.cluster,
+                type=SyncJobTypeChoices.PARSE_JOB_DATA,
+                status=JobStatusChoices.NEW,
+                cluster_sync_data__isnull=False,
+            ).order_by('id')[:limit])
+            SyncJob.objects.filter(pk__in=[job.pk for job in claimed]).update(
+                status=JobStatusChoices.RUNNING,
+                started=started,
+                celery_task_id=self.instance.celery_task_id,
+                internal_modified=started,
+            )
+        for job in claimed:
+            job.status = JobStatusChoices.RUNNING
+            job.started = started
+        return claimed
+
+    @staticmethod
+    def wakeup_schedulers():
+        """queryset.update() bypasses SyncJob.save, wake up the managers the claimed jobs changed status for."""
+        ScheduleSyncTaskManager().schedule()
+        ScheduleParseDataManager().schedule()
+
+    def run_batch(self, sync_data, batch_size):
+        claimed = self.claim_batch(batch_size - 1)
+        claimed_ids = [job.pk for job in claimed]
+        logger.info(f'Parsing AAP sync data {sync_data.id} in a batch with {len(claimed)} other parse jobs.')
+        try:
+            data_parser = BatchDataParser.from_sync_data(
+                self.cluster, [sync_data.id, *[job.cluster_sync_data_id for job in claimed]])
+            data_parser.parse()
+        except DispatcherCancel:
+            SyncJob.objects.filter(pk__in=claimed_ids, status=JobStatusChoices.RUNNING).update(
+                status=JobStatusChoices.NEW, started=None, celery_task_id='', internal_modified=now())
+            self.wakeup_schedulers()
+            self.after_cancel_task()
+            return
+        except Exception:
+            # A single broken record must not fail the whole batch, parse them one by one instead.
+            logger.exception(f'Failed to parse AAP sync data batch of job {self.instance.pk}, parsing one by one.')
+            self.parse_one(self.instance.pk, sync_data.id)
+            for job in claimed:
+                self.parse_one(job.pk, job.cluster_sync_data_id)
+            return
+
+        if claimed:
+            finished = now()
+            # All claimed jobs started together, see claim_batch
+            elapsed = decimal.Decimal((finished - claimed[0].started).total_seconds()).quantize(decimal.Decimal('1.000'))
+            SyncJob.objects.filter(pk__in=claimed_ids).update(
+                status=JobStatusChoices.SUCCESSFUL,
+                finished=finished,
+                elapsed=elapsed,
+                internal_modified=finished,
+            )
+            self.wakeup_schedulers()
+        self.subsystem_metrics.inc(f"{self.prefix}_tasks_succeeded", len(claimed_ids))
+        self.update_model(self.instance.pk, status=JobStatusChoices.SUCCESSFUL)
@@ -0,0 +1,32 @@
+import logging
+
+from dispatcherd.publish import task
+from django.conf import settings
+from django.utils.timezone import now
+
+from backend.apps.clusters.models import JobStatusChoices
+from backend.apps.common.models import PdfReport
+
+logger = logging.getLogger('automation_dashboard.tasks.reports')
+
+
+@task(queue=settings.DISPATCHER_REPORT_CHANNEL)
+def generate_pdf_report(pk):
+    # The report view imports this task to queue it.
+    from backend.api.v1.report.views import ReportsView
+
+    if not PdfReport.objects.filter(pk=pk, status=JobStatusChoices.PENDING).update(status=JobStatusChoices.RUNNING):
+        logger.info(f'PDF report {pk} is not pending, exiting')
+        return
+
+    report = PdfReport.objects.get(pk=pk)
+    try:
+        content = ReportsView.render_pdf_report(report)
+    except Exception:
+        msg = f'Failed to render PDF report {pk}.'
+        logger.exception(msg)
+        PdfReport.objects.filter(pk=pk).update(status=JobStatusChoices.FAILED, explanation=msg, finished=now())
+        return
+
+    PdfReport.objects.filter(pk=pk).update(status=JobStatusChoices.SUCCESSFUL, content=content, finished=now())
+    logger.info(f'Rendered PDF report {pk}.')
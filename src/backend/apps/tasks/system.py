@@ -1,11 +1,15 @@
 import logging
 
 from ansible_base.lib.utils.db import advisory_lock
+from dispatcherd.publish import task
+from django.db.models import Count
 from django.utils.timezone import now
 from django.utils.translation import gettext_noop
 
 from backend.apps.clusters.models import JobStatusChoices
+from backend.apps.clusters.retention import fail_stale_pdf_reports, purge_old_data
 from backend.apps.scheduler.models import SyncScheduleState, SyncSchedule, SyncJob, JobTypeChoices
+from backend.common_utils import task_manager_bulk_reschedule
 from django.conf import settings
 
 logger = logging.getLogger('automation_dashboard.tasks.system')
@@ -13,7 +17,7 @@ logger = logging.getLogger('automation_dashboard.tasks.system')
 
 def automation_dashboard_periodic_scheduler():
     lock_session_timeout_milliseconds = settings.TASK_MANAGER_LOCK_TIMEOUT * 1000
-    with advisory_lock('automation_dashboard_periodic_scheduler_lock', lock_session_timeout_milliseconds=lock_session_timeout_milliseconds, wait=False) as acquired:
+    with task_manager_bulk_reschedule(), advisory_lock('automation_dashboard_periodic_scheduler_lock', lock_session_timeout_milliseconds=lock_session_timeout_milliseconds, wait=False) as acquired:
         if acquired is False:
             logger.debug("Not running periodic scheduler, another task holds lock")
             return
@@ -55,35 +59,61 @@ def automation_dashboard_periodic_scheduler():
                 new_job.save()
 
 
+@task(queue=settings.DISPATCHER_PARSE_CHANNEL, on_duplicate='queue_one')
 def automation_dashboard_job_parser_data_scheduler():
     lock_session_timeout_milliseconds = settings.TASK_MANAGER_LOCK_TIMEOUT * 1000
-    with advisory_lock('automation_dashboard_job_parser_data_scheduler_lock', lock_session_timeout_milliseconds=lock_session_timeout_milliseconds, wait=False) as acquired:
+    with task_manager_bulk_reschedule(), advisory_lock('automation_dashboard_job_parser_data_scheduler_lock', lock_session_timeout_milliseconds=lock_session_timeout_milliseconds, wait=False) as acquired:
         if acquired is False:
             logger.debug("Not running job data scheduler, another task holds lock")
             return
         logger.debug("Starting job data scheduler")
         max_jobs = settings.SCHEDULE_MAX_DATA_PARSE_JOBS
-        job_data_schedules = SyncJob.objects.filter(type=JobTypeChoices.PARSE_JOB_DATA, status=JobStatusChoices.NEW)[:max_jobs]
+        candidates = list(
+            SyncJob.objects
+            .filter(type=JobTypeChoices.PARSE_JOB_DATA, status=JobStatusChoices.NEW)
+            .values_list('id', 'cluster_id', 'cluster_sync_data_id')[:max_jobs]
+        )
+        if not candidates:
+            return
 
-        for job in job_data_schedules:
-            job_data = job.cluster_sync_data
-            if job_data is None:
-                logger.warning("Job {} has no data".format(job.pk))
-                continue
+        # Parse jobs already queued or running take up the per cluster slots, one grouped count for all clusters.
+        active = dict(
+            SyncJob.objects
+            .filter(
+                type=JobTypeChoices.PARSE_JOB_DATA,
+                status__in=[JobStatusChoices.PENDING, JobStatusChoices.WAITING, JobStatusChoices.RUNNING],
+                cluster_id__in={cluster_id for _, cluster_id, _ in candidates},
+            )
+            .order_by()
+            .values_list('cluster_id')
+            .annotate(active=Count('id'))
+        )
 
-            if job_data.cache_timeout_blocked:
-                logger.warning("Cache timeout is in the future, bypassing job parser for job %s" % str(job_data.id))
+        admitted = []
+        blocked = set()
+        for job_id, cluster_id, data_id in candidates:
+            if data_id is None:
+                logger.warning("Job {} has no data".format(job_id))
                 continue
-            try:
-                can_start = job.signal_start()
-            except Exception:
-                logger.exception("Failed to spawn new data parser job")
+            if active.get(cluster_id, 0) >= max_jobs:
+                blocked.add(cluster_id)
                 continue
+            active[cluster_id] = active.get(cluster_id, 0) + 1
+            admitted.append(job_id)
 
-            if not can_start:
-                job.status = JobStatusChoices.FAILED
-                job.job_explanation = gettext_noop(
-                    "Data parse job could not start because it \
-                    was not in the right state"
-                )
-                job.save()
+        for cluster_id in blocked:
+            logger.warning(f"Cluster {cluster_id} has {max_jobs} data parser jobs queued or running, bypassing job parser")
+        started = SyncJob.bulk_signal_start(admitted)
+        logger.debug(f"Started {len(started)} data parser jobs")
+
+
+def automation_dashboard_data_retention():
+    lock_session_timeout_milliseconds = settings.TASK_MANAGER_LOCK_TIMEOUT * 1000
+    with advisory_lock('automation_dashboard_data_retention_lock', lock_session_timeout_milliseconds=lock_session_timeout_milliseconds, wait=False) as acquired:
+        if acquired is False:
+            logger.debug("Not running data retention, another task holds lock")
+            return
+        logger.debug("Starting data retention")
+        fail_stale_pdf_reports()
+        deleted = purge_old_data()
+        logger.debug("Data retention deleted: %s", deleted)
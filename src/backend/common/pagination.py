@@ -1,7 +1,97 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = None
     page_size_query_param = "page_size"
     max_page_size = 200
+
+
+class NameKeysetPagination(StandardResultsSetPagination):
+    """
+    Pages through a list by the (name, id) keyset when no page number is requested, so deep pages of large
+    lists cost the same as the first one. The cursor of the next page encodes the last name and id of the
+    current page, the ordering parameter does not apply to these pages.
+    """
+    cursor_query_param = "cursor"
+    cursor_query_description = "The pagination cursor value."
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param in request.query_params:
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            name, pk = position
+            # The redundant lower bound on name lets the planner range scan the (name, id) index.
+            queryset = queryset.filter(Q(name__gt=name) | Q(name=name, pk__gt=pk), name__gte=name)
+        results = list(queryset.order_by("name", "pk")[:page_size + 1])
+        self.has_next = len(results) > page_size
+        results = results[:page_size]
+        self.last = results[-1] if results else None
+        return results
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            name, pk = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            if not isinstance(name, str) or not isinstance(pk, int):
+                raise ValueError(encoded)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        return name, pk
+
+    def encode_cursor(self, name: str, pk: int) -> str:
+        return urlsafe_b64encode(json.dumps([name, pk]).encode()).decode("ascii")
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last.name, self.last.pk))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["required"] = ["results"]
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_query_description,
+                "schema": {
+                    "type": "string",
+                },
+            },
+        ]
@@ -3,10 +3,12 @@ import logging
 import os
 import sys
 import threading
+from contextlib import contextmanager
 
 from django.conf import settings
 
 _task_manager = threading.local()
+_parse_data_scheduler = threading.local()
 logger = logging.getLogger('automation_dashboard.utils')
 
 
@@ -175,8 +177,20 @@ class ScheduleSyncManager:
     def _schedule(self):
         from django.db import connection
 
+        if not getattr(settings, 'TASK_MANAGER_WAKEUP_ENABLED', True):
+            return
         # runs right away if not in transaction
-        connection.on_commit(lambda: self.manager.delay())
+        connection.on_commit(self._wakeup)
+
+    def _wakeup(self):
+        from backend.apps.dispatch.config import setup_dispatcherd_publisher
+
+        try:
+            setup_dispatcherd_publisher()
+            self.manager.delay()
+        except Exception:
+            # The periodic schedule runs the manager anyway, a lost wakeup only delays it
+            logger.exception(f"Failed to wake up {self.manager.__name__}")
 
     def schedule(self):
         if getattr(self.manager_threading_local, 'bulk_reschedule', False):
@@ -189,3 +203,25 @@ class ScheduleSyncTaskManager(ScheduleSyncManager):
     def __init__(self):
         from backend.apps.scheduler.tasks import sync_task_manager
         super().__init__(sync_task_manager, _task_manager)
+
+
+class ScheduleParseDataManager(ScheduleSyncManager):
+    def __init__(self):
+        from backend.apps.tasks.system import automation_dashboard_job_parser_data_scheduler
+        super().__init__(automation_dashboard_job_parser_data_scheduler, _parse_data_scheduler)
+
+
+@contextmanager
+def task_manager_bulk_reschedule():
+    """Collapse the wakeups requested inside the block into one per manager."""
+    managers = [ScheduleSyncTaskManager(), ScheduleParseDataManager()]
+    try:
+        for manager in managers:
+            manager.manager_threading_local.bulk_reschedule = True
+        yield
+    finally:
+        for manager in managers:
+            manager.manager_threading_local.bulk_reschedule = False
+            if getattr(manager.manager_threading_local, 'needs_scheduling', False):
+                manager.manager_threading_local.needs_scheduling = False
+                manager.schedule()
@@ -0,0 +1,7 @@
+DB_NAME = "aapdashboard"
+DB_USER = "testuser"
+DB_PASSWORD = "testpass"
+DB_HOST = "127.0.0.1"
+DB_PORT = 5432
+SECRET_KEY = "local-test-secret"
+DATABASE_KEY = "local-test-database-key"
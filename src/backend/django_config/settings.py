@@ -342,9 +342,69 @@ DISPATCHER_SCHEDULE = {}
 DISPATCHER_SYNC_CHANNEL = 'automation_dashboard_sync_channel'
 DISPATCHER_PARSE_CHANNEL = 'automation_dashboard_parse_channel'
 DISPATCHER_METRICS_CHANNEL = 'automation_dashboard_metrics_channel'
+DISPATCHER_REPORT_CHANNEL = 'automation_dashboard_report_channel'
 
 SCHEDULE_MAX_DATA_PARSE_JOBS = 30
+# Per-process cache of unchanged organizations, job templates, hosts, ... resolved while parsing,
+# invalidated across processes by a per cluster generation counter in Redis (BROKER_URL)
+DIMENSION_CACHE_MAX_SIZE = 10000
+DIMENSION_CACHE_TTL = 300
+# Number of sync data records a parse task claims and parses in one transaction (1 parses every record on its own)
+DATA_PARSE_BATCH_SIZE = 1
+# Answer report date range queries from the pre-aggregated daily rollup instead of raw jobs
+REPORT_ROLLUP_ENABLED = True
+# Cache computed reports in Redis until new data is parsed or costs and templates change
+REPORT_CACHE_ENABLED = True
+REPORT_CACHE_TIMEOUT = 3600
+# Database connections per web process the report details queries run on concurrently (1 runs them one after
+# another). They are kept open for CONN_MAX_AGE like request connections, count them in the database
+# max_connections budget together with the web processes and threads.
+REPORT_QUERY_WORKERS = 4
+# Rows fetched per server side cursor round trip of the streamed CSV export, gzip it for clients accepting it
+REPORT_CSV_CHUNK_SIZE = 2000
+REPORT_CSV_GZIP = True
+# Table rows rendered per chunk of a background PDF report, reports are deleted by the data retention task a day
+# after they were requested, and failed when they are not rendered within REPORT_PDF_TIMEOUT_SECONDS
+REPORT_PDF_CHUNK_SIZE = 500
+REPORT_PDF_RETENTION_SECONDS = 86400
+REPORT_PDF_TIMEOUT_SECONDS = 1800
+# Days rows are kept before the hourly data retention task deletes them (None keeps them): jobs with their labels
+# and host summaries by finish time, finished sync and parse jobs, and sync data no pending parse job reads
+DATA_RETENTION_DAYS = {
+    'jobs': None,
+    'sync_jobs': 90,
+    'sync_data': 7,
+}
+# Rows deleted per transaction, and batches per table and run
+DATA_RETENTION_BATCH_SIZE = 5000
+DATA_RETENTION_MAX_BATCHES = 100
+# Keep the daily rollup and host sketches of deleted jobs, so date range reports still cover them
+DATA_RETENTION_KEEP_ROLLUP = True
 START_TASK_LIMIT = 50
+# Job pools of the dispatcher, the task manager starts at most max_workers jobs of a pool at once and scales the pool
+# between min_workers and max_workers with its queue depth and job latency. Both pools share the dispatcher workers
+# sized from the CPU and memory capacity of the node, less JOB_EVENT_WORKERS for the system tasks. Parse jobs are
+# bound by the database and each holds a connection, None sizes the pool by the CPU count. Sync jobs mostly wait on
+# the AAP API, None gives the pool the remaining workers.
+DISPATCHER_POOLS = {
+    'sync': {'min_workers': 1, 'max_workers': None},
+    'parse': {'min_workers': 1, 'max_workers': None},
+}
+# Back off the scheduled sync or the parse lane when its jobs finished in the last DISPATCHER_AUTOSCALE_RECENT_SECONDS
+# took this many times longer than the ones finished in the last DISPATCHER_AUTOSCALE_BASELINE_SECONDS. Backfill
+# slices are not measured, they are bounded by their TASK_MANAGER_LANE_LIMITS entry
+DISPATCHER_AUTOSCALE_LATENCY_FACTOR = 2.0
+DISPATCHER_AUTOSCALE_RECENT_SECONDS = 300
+DISPATCHER_AUTOSCALE_BASELINE_SECONDS = 3600
+# Maximum number of waiting and running jobs per task manager lane, None for no limit. The lanes start in this order:
+# scheduled syncs, data parsing, and backfills created by the syncdata command.
+TASK_MANAGER_LANE_LIMITS = {
+    'sync': None,
+    'parse': None,
+    'backfill': 4,
+}
+# Run the task managers as soon as a job is queued or a parse job finishes, instead of waiting for the next periodic run
+TASK_MANAGER_WAKEUP_ENABLED = True
 # Amount of time dispatcher will try to reconnect to database for jobs and consuming new work
 DISPATCHER_DB_DOWNTIME_TOLERANCE = 40
 
@@ -355,6 +415,8 @@ CELERYBEAT_SCHEDULE = {
             'schedule': timedelta(seconds=20),
             'options': {'expires': 20}
         },
+    # Job status changes wake up both managers. A wakeup arriving while another run holds the manager lock is
+    # dropped, the periodic runs pick it up.
     'sync_task_manager':
         {
             'task': 'backend.apps.scheduler.tasks.sync_task_manager',
@@ -364,8 +426,14 @@ CELERYBEAT_SCHEDULE = {
     'data_parser_task_manager':
         {
             'task': 'backend.apps.tasks.system.automation_dashboard_job_parser_data_scheduler',
-            'schedule': timedelta(seconds=5),
-            'options': {'expires': 5}
+            'schedule': timedelta(seconds=20),
+            'options': {'expires': 20}
+        },
+    'data_retention':
+        {
+            'task': 'backend.apps.tasks.system.automation_dashboard_data_retention',
+            'schedule': timedelta(hours=1),
+            'options': {'expires': 3600}
         },
     'send_subsystem_metrics': {
         'task': 'backend.analytics.analytics_tasks.send_subsystem_metrics',
@@ -405,6 +473,22 @@ INITIAL_SYNC_DAYS = 1
 # Initial sync date (overrides INITIAL_SYNC_DAYS)
 INITIAL_SYNC_SINCE = '2025-08-08'
 
+# Number of jobs whose host summaries are fetched concurrently during sync (1 disables concurrency)
+SYNC_HOST_SUMMARIES_CONCURRENCY = 8
+
+# Parse synced jobs directly in batches of SYNC_DIRECT_INGEST_BATCH_SIZE instead of staging them in ClusterSyncData
+SYNC_DIRECT_INGEST = False
+SYNC_DIRECT_INGEST_BATCH_SIZE = 100
+
+# Organizations and job templates are synced incrementally by their AAP modified time, all of them are
+# listed every SYNC_COMMON_RECONCILE_SECONDS to remove job templates deleted in AAP
+SYNC_COMMON_RECONCILE_SECONDS = 3600
+
+# AAP API HTTP session: keep-alive connections per cluster and retries with backoff for 429/5xx responses
+AAP_HTTP_POOL_MAXSIZE = 10
+AAP_HTTP_MAX_RETRIES = 3
+AAP_HTTP_BACKOFF_FACTOR = 0.5
+
 
 # PDF Download (Do not exceed the number 4000)
 MAX_PDF_JOB_TEMPLATES = 4000
@@ -4,10 +4,11 @@ import pytest
 import pytz
 from django.core.cache import cache
 
+from backend.apps.clusters.cache import dimension_cache, report_cache
 from backend.apps.clusters.encryption import encrypt_value
 from backend.apps.clusters.models import Cluster, Organization, Label, JobTemplate, Project, Job, JobTypeChoices, \
     JobLaunchTypeChoices, InstanceGroup, ExecutionEnvironment, Inventory, AAPUser, Host, \
-    JobHostSummary, ClusterSyncData
+    JobHostSummary, ClusterSyncData, JobDailyRollup
 from backend.apps.clusters.models import JobStatusChoices
 from backend.apps.common.models import Currency, FilterSet
 from backend.apps.scheduler.models import JobTypeChoices as SyncJobTypeChoices
@@ -36,6 +37,7 @@ def pytest_runtest_teardown(item, nextitem):
     # NOTE: this should not be memcache (as it is deprecated), nor should it be redis.
     # This is a local test cache, so we want every test to start with an empty cache
     cache.clear()
+    dimension_cache.clear()
 
 
 @pytest.fixture
@@ -217,7 +219,9 @@ def jobs(
             cluster=cluster,
             external_id=1)  # TODO check is 1 correct?
     ]
-    return Job.objects.bulk_create(jobs)
+    jobs = Job.objects.bulk_create(jobs)
+    JobDailyRollup.rebuild()
+    return jobs
 
 
 @pytest.fixture
@@ -296,7 +300,9 @@ def host_summaries(jobs, hosts):
         )
     ]
 
-    return JobHostSummary.objects.bulk_create(summaries)
+    summaries = JobHostSummary.objects.bulk_create(summaries)
+    JobDailyRollup.rebuild()
+    return summaries
 
 
 @pytest.fixture
@@ -733,3 +739,44 @@ def sync_jobs(cluster):
     ]
 
     return SyncJob.objects.bulk_create(jobs)
+
+
+class FakeRedis:
+    """In memory stand-in for the few redis-py commands the report and dimension caches use."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def delete(self, key):
+        return int(self.data.pop(key, None) is not None)
+
+
+@pytest.fixture(autouse=True)
+def dimension_cache_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(dimension_cache, "_client", client)
+    return client
+
+
+@pytest.fixture
+def report_cache_redis(settings, monkeypatch):
+    settings.REPORT_CACHE_ENABLED = True
+    client = FakeRedis()
+    monkeypatch.setattr(report_cache, "_client", client)
+    return client
@@ -30,6 +30,9 @@ LOG_LEVEL = 'ERROR'
 # Use Redis via TCP instead of Unix socket for tests
 BROKER_URL = 'redis://127.0.0.1:6379/0'
 
+# Tests enable the report cache explicitly with a fake Redis client
+REPORT_CACHE_ENABLED = False
+
 # Default Time taken to manually execute automation (min)
 DEFAULT_TIME_TAKEN_TO_MANUALLY_EXECUTE_MINUTES = 60
 
@@ -43,6 +46,8 @@ DEFAULT_MANUAL_COST_AUTOMATION = 60
 DEFAULT_AUTOMATED_PROCESS_COST = 10000
 
 START_TASK_LIMIT = 5
+# Tests enable the task manager wakeups explicitly, there is no dispatcher to publish to
+TASK_MANAGER_WAKEUP_ENABLED = False
 TASK_MANAGER_TIMEOUT = 3
 TASK_MANAGER_TIMEOUT_GRACE_PERIOD = 6
 TASK_MANAGER_LOCK_TIMEOUT = TASK_MANAGER_TIMEOUT + TASK_MANAGER_TIMEOUT_GRACE_PERIOD
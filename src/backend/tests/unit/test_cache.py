@@ -0,0 +1,161 @@
+import json
+import pickle
+from unittest import mock
+
+import pytest
+import redis
+import time_machine
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from backend.apps.clusters.cache import DimensionCache, dimension_cache, report_cache
+from backend.apps.clusters.models import Organization, AAPUser
+
+
+@pytest.mark.django_db(transaction=True, reset_sequences=True)
+class TestDimensionCache:
+
+    def test_get_requires_same_fields(self, cluster):
+        cache = DimensionCache(max_size=10, ttl=60)
+        organization = Organization(pk=1, cluster=cluster, external_id=1, name="Org")
+        cache.set(Organization, cluster.pk, 0, 1, {"name": "Org", "description": ""}, organization)
+        assert cache.get(Organization, cluster.pk, 0, 1, {"name": "Org", "description": ""}) is organization
+        assert cache.get(Organization, cluster.pk, 0, 1, {"name": "Org", "description": "changed"}) is None
+        assert cache.get(Organization, cluster.pk, 0, 2, {"name": "Org", "description": ""}) is None
+
+    def test_least_recently_used_entry_is_evicted(self, cluster):
+        cache = DimensionCache(max_size=2, ttl=60)
+        for external_id in (1, 2):
+            cache.set(Organization, cluster.pk, 0, external_id, {"name": f"Org {external_id}"}, external_id)
+        cache.get(Organization, cluster.pk, 0, 1, {"name": "Org 1"})
+        cache.set(Organization, cluster.pk, 0, 3, {"name": "Org 3"}, 3)
+        assert cache.get(Organization, cluster.pk, 0, 1, {"name": "Org 1"}) == 1
+        assert cache.get(Organization, cluster.pk, 0, 2, {"name": "Org 2"}) is None
+        assert cache.get(Organization, cluster.pk, 0, 3, {"name": "Org 3"}) == 3
+
+    def test_entry_expires(self, cluster):
+        cache = DimensionCache(max_size=10, ttl=60)
+        with time_machine.travel(0, tick=False):
+            cache.set(Organization, cluster.pk, 0, 1, {"name": "Org"}, 1)
+        with time_machine.travel(61, tick=False):
+            assert cache.get(Organization, cluster.pk, 0, 1, {"name": "Org"}) is None
+
+    def test_rolled_back_rows_are_not_cached(self, cluster):
+        cache = DimensionCache(max_size=10, ttl=60)
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                cache.set(Organization, cluster.pk, 0, 1, {"name": "Org"}, 1)
+                raise ValueError
+        assert cache.get(Organization, cluster.pk, 0, 1, {"name": "Org"}) is None
+
+    def test_create_or_update_unchanged_costs_no_queries(self, cluster, dimension_cache_redis, django_assert_num_queries):
+        generation = dimension_cache.generation(cluster.pk)
+        organization = Organization.create_or_update(cluster=cluster, external_id=1, generation=generation, name="Org", description="")
+        user = AAPUser.create_or_update(cluster=cluster, external_id=1, generation=generation, name="admin", type="user")
+        dimension_cache_redis.get = mock.Mock(side_effect=AssertionError("generation read again"))
+        with django_assert_num_queries(0):
+            assert Organization.create_or_update(cluster=cluster, external_id=1, generation=generation, name="Org", description="") == organization
+            assert AAPUser.create_or_update(cluster=cluster, external_id=1, generation=generation, name="admin", type="user") == user
+
+        updated = Organization.create_or_update(cluster=cluster, external_id=1, name="Org", description="New")
+        assert Organization.objects.get(pk=organization.pk).description == "New"
+        assert updated.pk == organization.pk
+
+    def test_invalidate(self, cluster):
+        generation = dimension_cache.generation(cluster.pk)
+        Organization.create_or_update(cluster=cluster, external_id=1, generation=generation, name="Org", description="")
+        dimension_cache.invalidate(Organization, cluster.pk, 1)
+        with CaptureQueriesContext(connection) as queries:
+            Organization.create_or_update(cluster=cluster, external_id=1, generation=generation, name="Org", description="")
+        assert len(queries) > 0
+
+    def test_bump_generation_invalidates_other_processes(self, cluster, dimension_cache_redis):
+        worker = DimensionCache(max_size=10, ttl=60)
+        worker._client = dimension_cache_redis
+        generation = worker.generation(cluster.pk)
+        worker.set(Organization, cluster.pk, generation, 1, {"name": "Org"}, 1)
+        assert worker.get(Organization, cluster.pk, worker.generation(cluster.pk), 1, {"name": "Org"}) == 1
+
+        with transaction.atomic():
+            dimension_cache.bump_generation(cluster.pk)
+            assert worker.generation(cluster.pk) == generation
+        assert worker.generation(cluster.pk) == generation + 1
+        assert worker.get(Organization, cluster.pk, worker.generation(cluster.pk), 1, {"name": "Org"}) is None
+
+    def test_row_read_before_bump_is_not_reachable(self, cluster):
+        generation = dimension_cache.generation(cluster.pk)
+        organization = Organization.objects.create(cluster=cluster, external_id=1, name="Org")
+        dimension_cache.bump_generation(cluster.pk)
+        dimension_cache.set(Organization, cluster.pk, generation, 1, {"name": "Org"}, organization)
+        assert dimension_cache.get(Organization, cluster.pk, dimension_cache.generation(cluster.pk), 1, {"name": "Org"}) is None
+
+    def test_resaved_instance_is_not_served(self, cluster):
+        generation = dimension_cache.generation(cluster.pk)
+        organization = Organization.create_or_update(cluster=cluster, external_id=1, generation=generation, name="Org", description="")
+        organization.update_changed_fields(description="Changed")
+        assert dimension_cache.get(Organization, cluster.pk, generation, 1, {"name": "Org", "description": ""}) is None
+
+    def test_redis_error_bypasses_cache(self, cluster, dimension_cache_redis):
+        dimension_cache_redis.get = mock.Mock(side_effect=redis.ConnectionError("down"))
+        generation = dimension_cache.generation(cluster.pk)
+        assert generation is None
+        Organization.create_or_update(cluster=cluster, external_id=1, generation=generation, name="Org", description="")
+        with CaptureQueriesContext(connection) as queries:
+            Organization.create_or_update(cluster=cluster, external_id=1, generation=generation, name="Org", description="")
+        assert len(queries) > 0
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReportCache:
+
+    def test_result_is_cached_until_data_version_bump(self, report_cache_redis):
+        compute = mock.Mock(side_effect=[{"runs": 1}, {"runs": 2}])
+        assert report_cache.get_or_set("details", {"date_range": "month_to_date"}, compute) == {"runs": 1}
+        assert report_cache.get_or_set("details", {"date_range": "month_to_date"}, compute) == {"runs": 1}
+        assert compute.call_count == 1
+
+        report_cache.bump_data_version()
+        assert report_cache.get_or_set("details", {"date_range": "month_to_date"}, compute) == {"runs": 2}
+        assert compute.call_count == 2
+
+    def test_key_data_order_does_not_matter(self, report_cache_redis):
+        assert report_cache.key("list", {"a": 1, "b": [1, 2]}, 1) == report_cache.key("list", {"b": [1, 2], "a": 1}, 1)
+        assert report_cache.key("list", {"a": 1}, 1) != report_cache.key("list", {"a": 1}, 2)
+        assert report_cache.key("list", {"a": 1}, 1) != report_cache.key("csv", {"a": 1}, 1)
+
+    def test_bump_waits_for_commit(self, report_cache_redis):
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                report_cache.bump_data_version()
+                raise ValueError
+        assert report_cache.data_version() == 0
+
+    def test_waits_for_concurrent_computation(self, report_cache_redis, monkeypatch):
+        monkeypatch.setattr(report_cache, "POLL_INTERVAL", 0)
+        key = report_cache.key("details", {}, 0)
+        report_cache_redis.set(f"{key}:lock", 1)
+        # Data version and cache misses, then the value the other request stored.
+        report_cache_redis.get = mock.Mock(side_effect=[None, None, None, json.dumps(7).encode()])
+        compute = mock.Mock()
+        assert report_cache.get_or_set("details", {}, compute) == 7
+        compute.assert_not_called()
+
+    def test_stops_waiting_for_concurrent_computation(self, report_cache_redis, monkeypatch):
+        monkeypatch.setattr(report_cache, "POLL_INTERVAL", 0)
+        monkeypatch.setattr(report_cache, "LOCK_WAIT", 0.01)
+        key = report_cache.key("details", {}, 0)
+        report_cache_redis.set(f"{key}:lock", 1)
+        assert report_cache.get_or_set("details", {}, lambda: {"runs": 1}) == {"runs": 1}
+
+    def test_cached_results_are_json(self, report_cache_redis):
+        report = {"details": {"total_hours_of_automation": {"value": 1.5}}, "table_data": [{"elapsed": "2.000"}]}
+        assert report_cache.get_or_set("pdf", {}, lambda: report) == report
+        assert json.loads(report_cache_redis.get(report_cache.key("pdf", {}, 0))) == report
+
+    def test_does_not_unpickle_cached_values(self, report_cache_redis):
+        report_cache_redis.set(report_cache.key("details", {}, 0), pickle.dumps({"runs": 0}))
+        assert report_cache.get_or_set("details", {}, lambda: {"runs": 1}) == {"runs": 1}
+
+    def test_redis_error_computes_directly(self, report_cache_redis):
+        report_cache_redis.get = mock.Mock(side_effect=redis.ConnectionError("down"))
+        assert report_cache.get_or_set("details", {}, lambda: {"runs": 1}) == {"runs": 1}
@@ -7,9 +7,12 @@ from unittest.mock import PropertyMock
 import pytest
 import pytz
 import requests as requests_lib
+import responses
 import time_machine
+from django.db import DatabaseError
 from requests import Response
 
+from backend.apps.clusters.cache import dimension_cache
 from backend.apps.clusters.connector import ApiConnector
 from backend.apps.clusters.exceptions import InvalidClusterVersionError, UnsupportedProductError
 from backend.apps.clusters.encryption import decrypt_value
@@ -17,6 +20,7 @@ from backend.apps.clusters.models import (
     ClusterVersionChoices, Cluster, Organization, JobTemplate,
     ClusterSyncData, ClusterSyncStatus, Job, JobTypeChoices, JobStatusChoices,
 )
+from backend.apps.scheduler.models import JobTypeChoices as SyncJobTypeChoices, SyncJob
 
 
 def get_response(**kwargs):
@@ -52,7 +56,7 @@ class TestConnector:
             return get_response()
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         result = connector.execute_get_one(f"{cluster.base_url}{cluster.api_url}/test_endpoint")
         assert result == {'results': []}
 
@@ -61,7 +65,7 @@ class TestConnector:
             return get_response(**{'status_code': HTTPStatus.BAD_REQUEST})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         result = connector.execute_get_one(f"{cluster.base_url}{cluster.api_url}/test_endpoint")
         assert result is None
         assert 'GET request failed with status 400' in caplog.text
@@ -75,7 +79,7 @@ class TestConnector:
             return get_response(**{'headers': headers})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         with pytest.raises(UnsupportedProductError) as e:
             connector.execute_get_one(f"{cluster.base_url}{cluster.api_url}/test_endpoint")
         assert str(e.value) == "Not supported product."
@@ -98,7 +102,7 @@ class TestConnector:
             return get_response(**{'data': data})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         endpoint = f'{cluster.api_url}/jobs/?page_size=100&page=1&order_by=finished'
         response = connector.execute_get(endpoint=endpoint)
         for r in response:
@@ -140,7 +144,7 @@ class TestConnector:
             return get_response(**{'data': data})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         url = "/api/v2/ping/"
         response = connector.ping(url)
         assert response == {'version': '4.4.2'}
@@ -154,7 +158,7 @@ class TestConnector:
             return get_response(**{'headers': headers, 'data': dict(version="2.5")})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         assert connector.detect_aap_version() == ClusterVersionChoices.AAP25
 
     def test_detect_aap_version_24(self, mocker, cluster):
@@ -166,7 +170,7 @@ class TestConnector:
             return get_response(**{'headers': headers})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', side_effect=[None, mocked_requests_get()])
+        mocker.patch('requests.Session.get', side_effect=[None, mocked_requests_get()])
         assert connector.detect_aap_version() == ClusterVersionChoices.AAP24
 
     def test_check_aap_version_24(self, mocker, cluster):
@@ -246,6 +250,28 @@ class TestConnector:
         org = Organization.objects.get(cluster=cluster, name="Stale Org")
         assert org.external_id == 99
 
+    def test_sync_organizations_unchanged_rows_are_not_written(self, mocker, cluster, api_organizations):
+        mocker.patch('backend.apps.clusters.connector.ApiConnector.execute_get').side_effect = [
+            [iter(api_organizations)], [iter(api_organizations)]]
+        connector = ApiConnector(cluster)
+        connector.sync_common(sync_type='organization')
+        modified = dict(Organization.objects.values_list("external_id", "internal_modified"))
+
+        connector.sync_common(sync_type='organization')
+        assert dict(Organization.objects.values_list("external_id", "internal_modified")) == modified
+
+    def test_sync_organizations_bumps_dimension_cache_generation(self, mocker, cluster, api_organizations):
+        mocker.patch('backend.apps.clusters.connector.ApiConnector.execute_get').side_effect = [
+            [iter(api_organizations)], [iter(api_organizations)]]
+        connector = ApiConnector(cluster)
+        connector.sync_common(sync_type='organization')
+        generation = dimension_cache.generation(cluster.pk)
+        assert generation == 1
+
+        # Nothing written, the parse workers keep their cached rows.
+        connector.sync_common(sync_type='organization')
+        assert dimension_cache.generation(cluster.pk) == generation
+
     def test_sync_common_not_implemented(self, cluster):
         connector = ApiConnector(cluster)
         with pytest.raises(NotImplementedError):
@@ -301,6 +327,41 @@ class TestConnector:
         # Should log about skipped deletion
         assert "Skipped deletion of 1 templates deleted from AAP but DB retains them with job references" in caplog.text
 
+    def test_sync_job_templates_incremental(self, mocker, settings, cluster, job_templates):
+        settings.SYNC_COMMON_RECONCILE_SECONDS = 3600
+        mock = mocker.patch('backend.apps.clusters.connector.ApiConnector.execute_get')
+        mock.side_effect = [
+            [iter([{"id": 1, "name": "Job Template A", "description": "", "modified": "2025-01-01T10:00:00.000000Z"}])],
+            [iter([{"id": 1, "name": "Job Template A", "description": "changed", "modified": "2025-01-02T10:00:00.000000Z"}])],
+            [iter([])],
+        ]
+
+        with time_machine.travel(datetime(2025, 1, 3, 10, tzinfo=pytz.UTC), tick=False):
+            ApiConnector(cluster).sync_common(sync_type='job_template')
+        assert mock.call_args.args[0].endswith("/job_templates/?page_size=200&page=1")
+        # The full listing removed the templates missing in AAP.
+        assert list(JobTemplate.objects.values_list("external_id", flat=True)) == [1]
+        status = ClusterSyncStatus.objects.get(cluster=cluster)
+        assert status.job_template_modified == datetime(2025, 1, 1, 10, tzinfo=pytz.UTC)
+        assert status.last_job_finished_date is None
+
+        JobTemplate.objects.create(name="Job Template X", cluster=cluster, external_id=10)
+        with time_machine.travel(datetime(2025, 1, 3, 10, 30, tzinfo=pytz.UTC), tick=False):
+            ApiConnector(cluster).sync_common(sync_type='job_template')
+        assert mock.call_args.args[0].endswith("order_by=modified&modified__gt=2025-01-01T10:00:00Z")
+        assert JobTemplate.objects.get(external_id=1).description == "changed"
+        # Deletions are only reconciled by the full listing.
+        assert JobTemplate.objects.filter(external_id=10).exists()
+        assert ClusterSyncStatus.objects.get(cluster=cluster).job_template_modified == datetime(2025, 1, 2, 10, tzinfo=pytz.UTC)
+
+        with time_machine.travel(datetime(2025, 1, 3, 11, 30, tzinfo=pytz.UTC), tick=False):
+            ApiConnector(cluster).sync_common(sync_type='job_template')
+        assert mock.call_args.args[0].endswith("/job_templates/?page_size=200&page=1")
+        assert not JobTemplate.objects.exists()
+        status = ClusterSyncStatus.objects.get(cluster=cluster)
+        assert status.job_template_modified == datetime(2025, 1, 2, 10, tzinfo=pytz.UTC)
+        assert status.job_template_reconciled == datetime(2025, 1, 3, 11, 30, tzinfo=pytz.UTC)
+
     def test_jobs(self, mocker, cluster):
         return_items = [{'id': 1, 'name': 'test1'}, {'id': 2, 'name': 'test2'}]
         mock = mocker.patch('backend.apps.clusters.connector.ApiConnector.execute_get')
@@ -601,6 +662,113 @@ class TestConnector:
         assert 'Missing id or finished date time' in caplog.text
         assert not ClusterSyncData.objects.filter(cluster=cluster, data__id=100).exists()
 
+    @pytest.mark.parametrize('concurrency', [1, 3])
+    def test_sync_jobs_saves_in_finished_order(self, mocker, settings, cluster, concurrency):
+        """Host summaries may be fetched concurrently, but jobs are saved in the order they were listed."""
+        settings.SYNC_HOST_SUMMARIES_CONCURRENCY = concurrency
+        jobs = [
+            {"id": job_id, "finished": f"2025-01-16T20:{job_id:02d}:00.000000Z", "started": None, "status": "successful"}
+            for job_id in range(1, 8)
+        ]
+        connector = ApiConnector(cluster)
+        mocker.patch.object(type(connector), 'jobs', new_callable=PropertyMock, return_value=jobs)
+        mocker.patch.object(connector, 'job_host_summaries', side_effect=lambda job_id: iter([{"id": job_id * 10}]))
+
+        connector.sync_jobs()
+
+        db_data = list(ClusterSyncData.objects.order_by("id"))
+        assert [data.data["id"] for data in db_data] == list(range(1, 8))
+        assert [data.data["host_summaries"] for data in db_data] == [[{"id": job_id * 10}] for job_id in range(1, 8)]
+        assert ClusterSyncStatus.objects.get(cluster=cluster).last_job_finished_date == datetime(2025, 1, 16, 20, 7, tzinfo=pytz.UTC)
+
+    def test_sync_jobs_concurrent_saves_jobs_before_invalid_one(self, mocker, settings, cluster):
+        """Jobs listed before an invalid finished date are saved before TypeError is raised."""
+        settings.SYNC_HOST_SUMMARIES_CONCURRENCY = 4
+        jobs = [
+            {"id": 1, "finished": "2025-01-16T20:01:00.000000Z", "started": None, "status": "successful"},
+            {"id": 2, "finished": "2025-01-16T20:02:00.000000Z", "started": None, "status": "successful"},
+            {"id": 3, "finished": "not-a-date", "started": None, "status": "successful"},
+        ]
+        connector = ApiConnector(cluster)
+        mocker.patch.object(type(connector), 'jobs', new_callable=PropertyMock, return_value=jobs)
+        mocker.patch.object(connector, 'job_host_summaries', return_value=iter([]))
+
+        with pytest.raises(TypeError):
+            connector.sync_jobs()
+
+        assert list(ClusterSyncData.objects.order_by("id").values_list("data__id", flat=True)) == [1, 2]
+
+    @pytest.mark.parametrize('batch_size', [1, 10])
+    def test_sync_jobs_direct_ingest(self, mocker, settings, cluster, api_jobs, api_host_summaries, batch_size):
+        """With direct ingest, jobs are parsed in batches and never staged in ClusterSyncData."""
+        settings.SYNC_DIRECT_INGEST = True
+        settings.SYNC_DIRECT_INGEST_BATCH_SIZE = batch_size
+        connector = ApiConnector(cluster)
+        mocker.patch.object(type(connector), 'jobs', new_callable=PropertyMock, return_value=api_jobs[:2])
+        mocker.patch.object(connector, 'job_host_summaries', side_effect=[
+            iter([api_host_summaries[0]]),
+            iter([api_host_summaries[1], api_host_summaries[2]]),
+        ])
+
+        connector.sync_jobs()
+
+        assert ClusterSyncData.objects.count() == 0
+        assert list(Job.objects.order_by("external_id").values_list("external_id", "num_hosts")) == [(1, 1), (2, 2)]
+        assert ClusterSyncStatus.objects.get(cluster=cluster).last_job_finished_date == datetime.fromisoformat(api_jobs[1]["finished"])
+
+    def test_sync_jobs_direct_ingest_stages_invalid_job(self, mocker, settings, cluster, api_jobs):
+        """A job the parser can not validate is staged in ClusterSyncData, the others are ingested."""
+        settings.SYNC_DIRECT_INGEST = True
+        invalid = {**api_jobs[1], "status": "unknown"}
+        connector = ApiConnector(cluster)
+        mocker.patch.object(type(connector), 'jobs', new_callable=PropertyMock, return_value=[api_jobs[0], invalid])
+        mocker.patch.object(connector, 'job_host_summaries', side_effect=lambda job_id: iter([]))
+
+        connector.sync_jobs()
+
+        assert list(Job.objects.values_list("external_id", flat=True)) == [1]
+        assert list(ClusterSyncData.objects.values_list("data__id", flat=True)) == [2]
+
+    def test_sync_jobs_direct_ingest_stages_batch_on_database_error(self, mocker, settings, cluster, api_jobs):
+        """A batch the database rejects is staged in ClusterSyncData instead of failing the sync."""
+        settings.SYNC_DIRECT_INGEST = True
+        settings.SYNC_DIRECT_INGEST_BATCH_SIZE = 10
+        connector = ApiConnector(cluster)
+        mocker.patch.object(type(connector), 'jobs', new_callable=PropertyMock, return_value=api_jobs[:2])
+        mocker.patch.object(connector, 'job_host_summaries', side_effect=lambda job_id: iter([]))
+        mocker.patch('backend.apps.clusters.connector.BatchDataParser.parse', side_effect=DatabaseError("rejected"))
+
+        connector.sync_jobs()
+
+        assert Job.objects.count() == 0
+        assert list(ClusterSyncData.objects.order_by("id").values_list("data__id", flat=True)) == [1, 2]
+        assert SyncJob.objects.filter(type=SyncJobTypeChoices.PARSE_JOB_DATA).count() == 2
+        assert ClusterSyncStatus.objects.get(cluster=cluster).last_job_finished_date == datetime.fromisoformat(api_jobs[1]["finished"])
+
+    def test_update_last_job_finished_date_never_moves_back(self, cluster):
+        """Concurrent backfill slices must not overwrite a newer watermark with an older one."""
+        newer = datetime(2025, 6, 1, tzinfo=pytz.UTC)
+        older = datetime(2025, 1, 1, tzinfo=pytz.UTC)
+        ClusterSyncStatus.objects.create(cluster=cluster, last_job_finished_date=older)
+        slice_connector = ApiConnector(cluster)
+        ClusterSyncStatus.objects.filter(cluster=cluster).update(last_job_finished_date=newer)
+
+        slice_connector._update_last_job_finished_date(datetime(2025, 2, 1, tzinfo=pytz.UTC))
+
+        assert ClusterSyncStatus.objects.get(cluster=cluster).last_job_finished_date == newer
+
+    def test_update_last_job_finished_date_after_common_sync(self, mocker, cluster):
+        """The status row created by sync_common has no job watermark yet."""
+        mocker.patch('backend.apps.clusters.connector.ApiConnector.execute_get').side_effect = [[iter([])]]
+        connector = ApiConnector(cluster)
+        connector.sync_common(sync_type='organization')
+        finished = datetime(2025, 2, 1, tzinfo=pytz.UTC)
+
+        connector._update_last_job_finished_date(finished)
+
+        assert ClusterSyncStatus.objects.get(cluster=cluster).last_job_finished_date == finished
+        assert connector.cluster_sync_data.last_job_finished_date == finished
+
     # ------------------------------------------------------------------
     # _reauthorize
     # ------------------------------------------------------------------
@@ -614,7 +782,7 @@ class TestConnector:
             'refresh_token': 'new_refresh_token',
         }).encode('utf-8')
 
-        mocker.patch('requests.post', return_value=mock_response)
+        mocker.patch('requests.Session.post', return_value=mock_response)
 
         connector = ApiConnector(cluster)
         result = connector._reauthorize()
@@ -627,7 +795,7 @@ class TestConnector:
 
     def test_reauthorize_post_request_exception(self, mocker, cluster):
         """_reauthorize should return False if POST raises a RequestException."""
-        mocker.patch('requests.post', side_effect=requests_lib.exceptions.RequestException('Timeout'))
+        mocker.patch('requests.Session.post', side_effect=requests_lib.exceptions.RequestException('Timeout'))
         connector = ApiConnector(cluster)
         result = connector._reauthorize()
         assert result is False
@@ -638,7 +806,7 @@ class TestConnector:
         mock_response.status_code = 400
         mock_response._content = b'Bad Request'
 
-        mocker.patch('requests.post', return_value=mock_response)
+        mocker.patch('requests.Session.post', return_value=mock_response)
 
         connector = ApiConnector(cluster)
         with caplog.at_level(logging.ERROR, logger='automation_dashboard.clusters.connector'):
@@ -659,7 +827,7 @@ class TestConnector:
 
         response_ok = get_response()  # 200 OK
 
-        mocker.patch('requests.get', side_effect=[response_401, response_ok])
+        mocker.patch('requests.Session.get', side_effect=[response_401, response_ok])
         mocker.patch(
             'backend.apps.clusters.connector.ApiConnector._reauthorize',
             return_value=True,
@@ -670,10 +838,51 @@ class TestConnector:
         assert result is not None
         assert result.status_code == 200
 
+    def test_get_with_reauth_skips_refresh_when_token_already_refreshed(self, mocker, cluster):
+        """A 401 for a token another request already refreshed must not refresh the token again."""
+        response_401 = Response()
+        response_401.status_code = 401
+        response_401._content = b'Unauthorized'
+
+        connector = ApiConnector(cluster)
+
+        responses = [response_401, get_response()]
+
+        def get_request(*args, **kwargs):
+            # Another thread refreshed the token while the first request was in flight.
+            connector.access_token = "refreshed-token"
+            return responses.pop(0)
+
+        mocker.patch('requests.Session.get', side_effect=get_request)
+        reauthorize = mocker.patch('backend.apps.clusters.connector.ApiConnector._reauthorize', return_value=True)
+
+        result = connector._get_with_reauth(f"{cluster.base_url}/test")
+        assert result.status_code == 200
+        reauthorize.assert_not_called()
+
+    def test_session_is_reused_and_accepts_gzip(self, cluster):
+        """All requests of a connector go through one pooled session that accepts gzip responses."""
+        connector = ApiConnector(cluster)
+        adapter = connector.session.get_adapter(f"{cluster.base_url}/api/v2/jobs/")
+        assert connector.session.headers["Accept-Encoding"] == "gzip, deflate"
+        assert adapter.max_retries.total == 3
+        assert set(adapter.max_retries.status_forcelist) == {429, 500, 502, 503, 504}
+
+    def test_get_request_retries_server_errors(self, settings, cluster):
+        """GET requests are retried on 5xx responses before the result is returned."""
+        settings.AAP_HTTP_BACKOFF_FACTOR = 0
+        url = f"{cluster.base_url}/api/v2/test/"
+        responses.add(responses.GET, url, status=503)
+        responses.add(responses.GET, url, status=200, json={"results": []}, headers={"X-Api-Product-Name": "AAP"})
+
+        connector = ApiConnector(cluster)
+        assert connector.execute_get_one(url) == {"results": []}
+        responses.assert_call_count(url, 2)
+
     def test_get_with_reauth_request_exception_returns_none(self, mocker, cluster, caplog):
         """A plain RequestException (not ConnectionError) on first GET must return None."""
         mocker.patch(
-            'requests.get',
+            'requests.Session.get',
             side_effect=requests_lib.exceptions.Timeout('Timed out'),
         )
         connector = ApiConnector(cluster)
@@ -686,7 +895,7 @@ class TestConnector:
         error = requests_lib.exceptions.ConnectionError(
             "Connection refused by Responses - the call doesn't match any registered mock."
         )
-        mocker.patch('requests.get', side_effect=error)
+        mocker.patch('requests.Session.get', side_effect=error)
 
         connector = ApiConnector(cluster)
         with pytest.raises(requests_lib.exceptions.ConnectionError) as exc_info:
@@ -700,7 +909,7 @@ class TestConnector:
         response_401._content = b'Unauthorized'
 
         mocker.patch(
-            'requests.get',
+            'requests.Session.get',
             side_effect=[response_401, requests_lib.exceptions.Timeout('Timed out again')],
         )
         mocker.patch(
@@ -766,7 +975,7 @@ class TestConnector:
             return get_response(**{'headers': headers, 'data': {'version': '2.6'}})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         assert connector.detect_aap_version() == ClusterVersionChoices.AAP26
 
     def test_detect_aap_version_27(self, mocker, cluster):
@@ -779,7 +988,7 @@ class TestConnector:
             return get_response(**{'headers': headers, 'data': {'version': '2.7'}})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         assert connector.detect_aap_version() == ClusterVersionChoices.AAP27
 
     def test_detect_aap_version_unknown_version_raises(self, mocker, cluster):
@@ -792,7 +1001,7 @@ class TestConnector:
             return get_response(**{'headers': headers, 'data': {'version': '9.9'}})
 
         connector = ApiConnector(cluster)
-        mocker.patch('requests.get', new=mocked_requests_get)
+        mocker.patch('requests.Session.get', new=mocked_requests_get)
         with pytest.raises(InvalidClusterVersionError) as exc_info:
             connector.detect_aap_version()
         assert 'Not valid version' in str(exc_info.value)
@@ -860,7 +1069,7 @@ class TestConnector:
     def test_ping_request_exception_returns_none(self, mocker, cluster, caplog):
         """ping() must return None and log the exception on a RequestException."""
         mocker.patch(
-            'requests.get',
+            'requests.Session.get',
             side_effect=requests_lib.exceptions.Timeout('Connection timed out'),
         )
         connector = ApiConnector(cluster)
@@ -1,7 +1,13 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
 
 import pytest
+import time_machine
+from django.utils import timezone
 
+from backend.apps.clusters.models import ClusterSyncData, Job
 from backend.apps.scheduler.models import JobStatusChoices, JobTypeChoices, SyncJob
 from backend.apps.tasks.jobs import AAPSyncTask, AAPParseDataTask
 
@@ -136,3 +142,89 @@ class TestJobs:
         assert job.status == JobStatusChoices.RUNNING
         assert job.started is not None
         assert job.finished is None
+
+    @pytest.fixture
+    def parse_jobs(self, cluster, api_jobs, api_host_summaries):
+        api_jobs[0]["host_summaries"] = [api_host_summaries[0]]
+        api_jobs[1]["host_summaries"] = [api_host_summaries[1], api_host_summaries[2]]
+        for data in api_jobs[:2]:
+            ClusterSyncData.objects.create(cluster=cluster, data=data)
+        jobs = list(SyncJob.objects.filter(type=JobTypeChoices.PARSE_JOB_DATA).order_by("id"))
+        SyncJob.objects.filter(pk=jobs[0].pk).update(status=JobStatusChoices.RUNNING)
+        jobs[0].refresh_from_db()
+        return jobs
+
+    def test_run_task_batch_claims_new_parse_jobs(self, settings, cluster, parse_jobs):
+        settings.DATA_PARSE_BATCH_SIZE = 10
+        task = AAPParseDataTask()
+        task.instance = parse_jobs[0]
+        task.cluster = cluster
+        task.run_task()
+
+        assert Job.objects.count() == 2
+        assert ClusterSyncData.objects.count() == 0
+        assert set(SyncJob.objects.values_list("status", flat=True)) == {JobStatusChoices.SUCCESSFUL}
+
+    @patch("backend.apps.dispatch.config.setup_dispatcherd_publisher")
+    @patch("backend.apps.tasks.system.automation_dashboard_job_parser_data_scheduler.delay")
+    @patch("backend.apps.scheduler.tasks.sync_task_manager.delay")
+    def test_run_task_batch_finishes_claimed_jobs(self, mock_sync_delay, mock_parse_delay, mock_setup, settings, cluster, parse_jobs):
+        settings.DATA_PARSE_BATCH_SIZE = 10
+        settings.TASK_MANAGER_WAKEUP_ENABLED = True
+        task = AAPParseDataTask()
+        task.instance = parse_jobs[0]
+        task.cluster = cluster
+        with time_machine.travel(timezone.now(), tick=False) as traveller:
+            claimed = task.claim_batch(9)
+            traveller.shift(timedelta(seconds=2))
+            with patch.object(task, "claim_batch", return_value=claimed):
+                task.run_task()
+
+        job = SyncJob.objects.get(pk=parse_jobs[1].pk)
+        assert job.status == JobStatusChoices.SUCCESSFUL
+        assert job.started is not None
+        assert job.finished - job.started == timedelta(seconds=2)
+        assert job.elapsed == Decimal("2.000")
+        mock_sync_delay.assert_called_once()
+        mock_parse_delay.assert_called_once()
+
+    def test_run_task_batch_falls_back_to_single_parse(self, settings, cluster, parse_jobs):
+        settings.DATA_PARSE_BATCH_SIZE = 10
+        broken = parse_jobs[1].cluster_sync_data
+        broken.data = {**broken.data, "status": "unknown"}
+        ClusterSyncData.objects.filter(pk=broken.pk).update(data=broken.data)
+        task = AAPParseDataTask()
+        task.instance = parse_jobs[0]
+        task.cluster = cluster
+        task.run_task()
+
+        assert Job.objects.count() == 1
+        assert SyncJob.objects.get(pk=parse_jobs[0].pk).status == JobStatusChoices.SUCCESSFUL
+        assert SyncJob.objects.get(pk=parse_jobs[1].pk).status == JobStatusChoices.FAILED
+
+    @staticmethod
+    def backfill_slice(cluster, backfill, **kwargs):
+        job_args = json.dumps({'since': None, 'until': None, 'managed': True, 'backfill': backfill})
+        return SyncJob.objects.create(cluster=cluster, type=JobTypeChoices.SYNC_JOBS, launch_type='manual', job_args=job_args, **kwargs)
+
+    def test_sync_task_starts_next_backfill_slice(self, cluster):
+        waiting = self.backfill_slice(cluster, 'a', status=JobStatusChoices.WAITING)
+        other = self.backfill_slice(cluster, 'b')
+        queued = [self.backfill_slice(cluster, 'a') for _ in range(2)]
+
+        task = AAPSyncTask()
+        with patch.object(AAPSyncTask, "run_task"):
+            task.run(waiting.pk)
+
+        assert [SyncJob.objects.get(pk=job.pk).status for job in queued] == [JobStatusChoices.PENDING, JobStatusChoices.NEW]
+        assert SyncJob.objects.get(pk=other.pk).status == JobStatusChoices.NEW
+
+    def test_manual_sync_does_not_start_backfill_slice(self, cluster):
+        manual = SyncJob.objects.create(cluster=cluster, type=JobTypeChoices.SYNC_JOBS, launch_type='manual', status=JobStatusChoices.WAITING)
+        queued = self.backfill_slice(cluster, 'a')
+
+        task = AAPSyncTask()
+        with patch.object(AAPSyncTask, "run_task"):
+            task.run(manual.pk)
+
+        assert SyncJob.objects.get(pk=queued.pk).status == JobStatusChoices.NEW
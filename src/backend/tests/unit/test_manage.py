@@ -1,9 +1,16 @@
-import pytest
+import io
+import json
+from datetime import datetime, timezone
 from unittest import mock
 
+import pytest
+
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 
+from backend.apps.clusters.management.commands.explainreports import REPORT_INDEXES
+from backend.apps.clusters.management.commands.syncdata import Command as SyncDataCommand
 from backend.apps.clusters.models import JobStatusChoices
 from backend.apps.dispatch.management.commands.run_dispatcher import Command
 from backend.apps.scheduler.models import SyncJob, JobTypeChoices
@@ -73,6 +80,75 @@ class TestResetInterruptedJobs:
         mock_reset.assert_called_once()
 
 
+@pytest.mark.django_db
+class TestSyncDataSlices:
+
+    @staticmethod
+    def slice_jobs():
+        return list(SyncJob.objects.filter(type=JobTypeChoices.SYNC_JOBS).order_by('id'))
+
+    @pytest.mark.parametrize('slice_by, expected', [
+        ('month', [('2025-01-15', '2025-02-01'), ('2025-02-01', '2025-03-01'), ('2025-03-01', '2025-03-10')]),
+        ('week', [('2025-02-26', '2025-03-03'), ('2025-03-03', '2025-03-10')]),
+        ('day', [('2025-03-08', '2025-03-09'), ('2025-03-09', '2025-03-10')]),
+    ])
+    def test_split_range(self, slice_by, expected):
+        since = {'month': '2025-01-15', 'week': '2025-02-26', 'day': '2025-03-08'}[slice_by]
+        slices = SyncDataCommand.split_range(
+            datetime.fromisoformat(since).replace(tzinfo=timezone.utc),
+            datetime(2025, 3, 10, tzinfo=timezone.utc),
+            slice_by)
+        assert [(s.date().isoformat(), u.date().isoformat()) for s, u in slices] == expected
+
+    def test_creates_slices_and_starts_parallel(self, cluster):
+        call_command('syncdata', '--since=2025-01-01', '--until=2025-04-30', '--parallel=2')
+
+        jobs = self.slice_jobs()
+        assert [job.status for job in jobs] == [JobStatusChoices.PENDING] * 2 + [JobStatusChoices.NEW] * 2
+        first, last = json.loads(jobs[0].job_args), json.loads(jobs[-1].job_args)
+        assert (first['since'], first['until'], first['managed']) == ('2025-01-01T00:00:00+00:00', '2025-02-01T00:00:00+00:00', True)
+        assert (last['since'], last['until']) == ('2025-04-01T00:00:00+00:00', '2025-04-30T23:59:59.999999+00:00')
+        assert first['backfill'] == last['backfill'] == '2025-01-01T00:00:00+00:00/2025-04-30T23:59:59.999999+00:00/month'
+
+    def test_rerun_resumes_missing_slices(self, cluster):
+        call_command('syncdata', '--since=2025-01-01', '--until=2025-03-31', '--slice=month')
+        jobs = self.slice_jobs()
+        SyncJob.objects.filter(pk=jobs[0].pk).update(status=JobStatusChoices.SUCCESSFUL)
+        SyncJob.objects.filter(pk=jobs[1].pk).update(status=JobStatusChoices.FAILED)
+
+        call_command('syncdata', '--since=2025-01-01', '--until=2025-03-31', '--slice=month', '--parallel=2')
+
+        rerun = self.slice_jobs()
+        assert len(rerun) == 4
+        assert rerun[3].job_args == jobs[1].job_args
+        # The third slice is still queued from the first run and is started with the retried second one.
+        assert [job.status for job in rerun] == [
+            JobStatusChoices.SUCCESSFUL, JobStatusChoices.FAILED, JobStatusChoices.PENDING, JobStatusChoices.PENDING]
+
+
+@pytest.mark.django_db
+class TestExplainReports:
+
+    @staticmethod
+    def job_indexes():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)", [REPORT_INDEXES])
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_explain_before_and_after_indexes(self, host_summaries, labels):
+        assert self.job_indexes() == set(REPORT_INDEXES)
+        out = io.StringIO()
+        call_command('explainreports', '--date-range=last_3_years', '--compare', stdout=out)
+
+        output = out.getvalue()
+        assert output.count('== report by label ==') == 2
+        assert output.count('== unique hosts of report ==') == 2
+        assert 'Execution Time' in output
+        assert 'Report query plans without indexes job_report_finished_idx' in output
+        # The indexes were only dropped inside the rolled back transaction.
+        assert self.job_indexes() == set(REPORT_INDEXES)
+
+
 class TestUpdatePassword(TestCase):
     @pytest.fixture(autouse=True)
     def mycapsys(self, capsys):
@@ -1,9 +1,12 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from decimal import Decimal
 
 import pytest
 import pytz
+from django.db import connection, transaction
+from django.utils import timezone
 
+from backend.apps.clusters.cache import dimension_cache
 from backend.apps.clusters.models import (
     Organization,
     JobTemplate,
@@ -15,9 +18,16 @@ from backend.apps.clusters.models import (
     Project,
     Host,
     Job,
-    JobHostSummary)
-from backend.apps.clusters.parser import DataParser
+    JobLabel,
+    JobHostSummary,
+    ClusterSyncData,
+    JobDailyRollup,
+    JobDailyRollupState,
+    JobDailyHostSketch,
+    lock_jobs)
+from backend.apps.clusters.parser import BatchDataParser, DataParser
 from backend.apps.clusters.schemas import ExternalJobSchema, NameDescriptionModelSchema, LabelModelSchema
+from backend.apps.clusters.sketch import HyperLogLog
 
 org_expected_data = {
     "name": "Organization A",
@@ -231,6 +241,19 @@ class TestParser:
         for key, value in expected.items():
             assert getattr(organization, key) == value
 
+    def test_update_organization_unchanged_skips_write(self, cluster, cluster_sync_data, django_assert_num_queries):
+        parser = DataParser(cluster_sync_data.id)
+        organization = parser.organization
+        dimension_cache.clear()
+        # Only the SELECT, no UPDATE for identical data.
+        with django_assert_num_queries(1):
+            assert parser.organization == organization
+
+        updated = Organization.create_or_update(
+            cluster=cluster, external_id=organization.external_id, name=organization.name, description="Changed")
+        assert updated.description == "Changed"
+        assert Organization.objects.get(pk=organization.pk).description == "Changed"
+
     @pytest.mark.parametrize('expected', [
         job_template_expected_data
     ])
@@ -417,6 +440,17 @@ class TestParser:
         for key, value in expected.items():
             assert getattr(host, key) == value
 
+    def test_get_hosts(self, cluster, cluster_sync_data, hosts):
+        data = cluster_sync_data.data
+        data["host_summaries"].append({**data["host_summaries"][0], "host_name": "Host D", "summary_fields": {"host": None}})
+        parser = DataParser(ClusterSyncData.objects.create(cluster=cluster, data=data).id)
+        assert Host.objects.count() == 3
+        resolved = parser.get_hosts()
+        assert Host.objects.count() == 4
+        assert resolved[2] == Host.objects.get(cluster=cluster, external_id=2)
+        assert resolved[3] == Host.objects.get(cluster=cluster, external_id=3)
+        assert resolved["Host D"].external_id < 0
+
     @pytest.mark.parametrize('expected', [
         host_summaries_expected_data
     ])
@@ -426,8 +460,7 @@ class TestParser:
             Host(id=1, name="Host B", description="", external_id=2, cluster=cluster),
             Host(id=2, name="Host C", description="", external_id=2, cluster=cluster),
         ]
-        host_summaries_mock = mocker.patch('backend.apps.clusters.parser.DataParser.get_host')
-        host_summaries_mock.side_effect = hosts
+        mocker.patch('backend.apps.clusters.parser.DataParser.get_hosts', return_value={2: hosts[0], 3: hosts[1]})
         host_summaries = list(parser.host_summaries)
         assert len(host_summaries) == 2
         for i, data in enumerate(expected):
@@ -461,3 +494,176 @@ class TestParser:
         for i, data in enumerate(expected["host_summaries"]):
             for key, value in data.items():
                 assert getattr(db_hosts_data[i], key) == value
+
+
+def parsed_rows():
+    skip = {"id", "internal_created", "internal_modified"}
+    jobs = [
+        {key: value for key, value in row.items() if key not in skip}
+        for row in Job.objects.order_by("external_id").values()
+    ]
+    host_summaries = [
+        {key: value for key, value in row.items() if key not in skip}
+        for row in JobHostSummary.objects.order_by("job__external_id", "host_name").values(
+            "job__external_id", "host__external_id", "host_name", "changed", "ok", "processed", "failed", "created")
+    ]
+    job_labels = list(JobLabel.objects.order_by("job__external_id", "label__external_id").values_list(
+        "job__external_id", "label__external_id"))
+    return jobs, host_summaries, job_labels
+
+
+@pytest.mark.django_db(transaction=True, reset_sequences=True)
+class TestBatchDataParser:
+
+    @pytest.fixture
+    def sync_data_rows(self, cluster, api_jobs, api_host_summaries):
+        api_jobs[0]["host_summaries"] = [api_host_summaries[0]]
+        api_jobs[1]["host_summaries"] = [api_host_summaries[1], api_host_summaries[2]]
+        return [ClusterSyncData.objects.create(cluster=cluster, data=data) for data in api_jobs[:2]]
+
+    def test_batch_parse_matches_data_parser(self, cluster, sync_data_rows):
+        for sync_data in sync_data_rows:
+            DataParser(sync_data.id).parse()
+        expected = parsed_rows()
+        assert len(expected[0]) == 2
+
+        Job.objects.all().delete()
+        rows = [ClusterSyncData.objects.create(cluster=cluster, data=sync_data.data) for sync_data in sync_data_rows]
+        BatchDataParser.from_sync_data(cluster, [row.id for row in rows]).parse()
+
+        assert parsed_rows() == expected
+        assert ClusterSyncData.objects.count() == 0
+
+    def test_batch_parse_updates_existing_jobs(self, cluster, sync_data_rows):
+        BatchDataParser.from_sync_data(cluster, [row.id for row in sync_data_rows]).parse()
+        data = sync_data_rows[1].data
+        data["name"] = "Job Template B renamed"
+        data["summary_fields"]["labels"] = {"count": 0, "results": []}
+        data["host_summaries"] = data["host_summaries"][:1]
+        row = ClusterSyncData.objects.create(cluster=cluster, data=data)
+
+        BatchDataParser.from_sync_data(cluster, [row.id]).parse()
+
+        assert Job.objects.count() == 2
+        job = Job.objects.get(external_id=data["id"])
+        assert job.name == "Job Template B renamed"
+        assert job.num_hosts == 1
+        assert JobHostSummary.objects.filter(job=job).count() == 1
+        assert not JobLabel.objects.filter(job=job).exists()
+
+    def test_batch_parse_renames_launched_by(self, cluster, sync_data_rows, aap_user):
+        modified = timezone.now() - timedelta(days=1)
+        AAPUser.objects.filter(pk=aap_user.pk).update(internal_modified=modified)
+        for row in sync_data_rows:
+            row.data["launched_by"]["name"] = "AAP User renamed"
+            ClusterSyncData.objects.filter(pk=row.pk).update(data=row.data)
+
+        BatchDataParser.from_sync_data(cluster, [row.id for row in sync_data_rows]).parse()
+
+        aap_user.refresh_from_db()
+        assert aap_user.name == "AAP User renamed"
+        assert aap_user.internal_modified > modified
+
+    @staticmethod
+    def rollup_rows():
+        return sorted(JobDailyRollup.objects.values_list("day", "name", "status", "job_count", "elapsed", "num_hosts"))
+
+    @staticmethod
+    def sketch_rows():
+        return sorted((row.bucket_key, bytes(row.sketch)) for row in JobDailyHostSketch.objects.all())
+
+    def test_parse_maintains_daily_rollup(self, cluster, sync_data_rows):
+        for sync_data in sync_data_rows:
+            DataParser(sync_data.id).parse()
+        rows = self.rollup_rows()
+        sketches = self.sketch_rows()
+        assert len(rows) == 2
+        assert sum(HyperLogLog.from_bytes(sketch).count() for _, sketch in sketches) == JobHostSummary.objects.count()
+
+        JobDailyRollup.rebuild()
+        assert self.rollup_rows() == rows
+        assert self.sketch_rows() == sketches
+
+    def test_rollup_days_ignore_active_timezone(self, cluster, sync_data_rows):
+        with timezone.override("Pacific/Kiritimati"):
+            BatchDataParser.from_sync_data(cluster, [row.id for row in sync_data_rows]).parse()
+        rows = self.rollup_rows()
+        assert {row[0] for row in rows} == {job.finished.astimezone(pytz.UTC).date() for job in Job.objects.all()}
+
+        JobDailyRollup.rebuild()
+        assert self.rollup_rows() == rows
+
+    def test_rebuild_rollup_in_batches(self, cluster, sync_data_rows):
+        JobDailyRollupState.objects.all().delete()
+        BatchDataParser.from_sync_data(cluster, [row.id for row in sync_data_rows]).parse()
+        rows = self.rollup_rows()
+        sketches = self.sketch_rows()
+        day = datetime.combine(rows[0][0], datetime.min.time(), timezone.get_default_timezone())
+        # Reports read jobs until the rollup is built
+        assert JobDailyRollup.enabled_for(day, day.replace(hour=23, minute=59, second=59, microsecond=999999)) is False
+
+        JobDailyRollup.objects.all().delete()
+        JobDailyRollup.rebuild(batch_days=1)
+        assert self.rollup_rows() == rows
+        assert self.sketch_rows() == sketches
+        assert JobDailyRollup.enabled_for(day, day.replace(hour=23, minute=59, second=59, microsecond=999999)) is True
+
+    def test_batch_parse_refreshes_rollup_of_updated_job(self, cluster, sync_data_rows):
+        BatchDataParser.from_sync_data(cluster, [row.id for row in sync_data_rows]).parse()
+        data = sync_data_rows[1].data
+        data["name"] = "Job Template B renamed"
+        row = ClusterSyncData.objects.create(cluster=cluster, data=data)
+
+        BatchDataParser.from_sync_data(cluster, [row.id]).parse()
+
+        rows = self.rollup_rows()
+        sketches = self.sketch_rows()
+        assert "Job Template B renamed" in [row[1] for row in rows]
+        assert len(rows) == 2
+        JobDailyRollup.rebuild()
+        assert self.rollup_rows() == rows
+        assert self.sketch_rows() == sketches
+
+    def test_parse_moves_updated_job_between_rollup_rows(self, cluster, sync_data_rows):
+        for sync_data in sync_data_rows:
+            DataParser(sync_data.id).parse()
+        data = sync_data_rows[1].data
+        name = data["name"]
+        data["name"] = "Job Template B renamed"
+        DataParser(ClusterSyncData.objects.create(cluster=cluster, data=data).id).parse()
+
+        rows = self.rollup_rows()
+        names = [row[1] for row in rows]
+        assert "Job Template B renamed" in names
+        assert name not in names
+        assert sum(row[3] for row in rows) == Job.objects.count()
+        JobDailyRollup.rebuild()
+        assert self.rollup_rows() == rows
+
+    def test_batch_parse_keeps_latest_data_of_duplicated_job(self, cluster, api_jobs):
+        first = ExternalJobSchema(**{**api_jobs[0], "name": "Old name", "host_summaries": []})
+        latest = ExternalJobSchema(**{**api_jobs[0], "host_summaries": []})
+        BatchDataParser(cluster, [first, latest]).parse()
+        assert list(Job.objects.values_list("name", flat=True)) == [api_jobs[0]["name"]]
+
+    def test_parse_reads_dimension_generation_once(self, cluster, sync_data_rows, mocker):
+        generation = mocker.spy(dimension_cache, "generation")
+        DataParser(sync_data_rows[0].id).parse()
+        assert generation.call_count == 1
+        BatchDataParser.from_sync_data(cluster, [row.id for row in sync_data_rows[1:]]).parse()
+        assert generation.call_count == 2
+
+    def test_lock_jobs_blocks_concurrent_parse_of_same_job(self, cluster):
+        other = connection.copy()
+        try:
+            with transaction.atomic():
+                lock_jobs(cluster.pk, [2, 1])
+                with other.cursor() as cursor:
+                    locked = []
+                    for external_id in (1, 3):
+                        cursor.execute("SELECT pg_try_advisory_xact_lock(hashtextextended(%s, 0))",
+                                       [f"automation_dashboard_job:{cluster.pk}:{external_id}"])
+                        locked.append(cursor.fetchone()[0])
+                assert locked == [False, True]
+        finally:
+            other.close()
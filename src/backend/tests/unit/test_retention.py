@@ -0,0 +1,82 @@
+import datetime
+
+import pytest
+import time_machine
+
+from backend.apps.clusters.models import ClusterSyncData, Job, JobDailyRollup, JobHostSummary, JobStatusChoices
+from backend.apps.clusters.retention import fail_stale_pdf_reports, purge_jobs, purge_pdf_reports, purge_sync_data, purge_sync_jobs
+from backend.apps.common.models import PdfReport
+from backend.apps.scheduler.models import SyncJob
+
+NOW = datetime.datetime(2025, 3, 15, 12, tzinfo=datetime.timezone.utc)
+
+
+@pytest.mark.django_db
+class TestDataRetention:
+
+    @pytest.mark.parametrize("keep_rollup", [True, False])
+    @time_machine.travel(NOW, tick=False)
+    def test_purge_jobs(self, settings, host_summaries, keep_rollup):
+        settings.DATA_RETENTION_DAYS = {"jobs": 30}
+        settings.DATA_RETENTION_BATCH_SIZE = 1
+        settings.DATA_RETENTION_KEEP_ROLLUP = keep_rollup
+        old_job = Job.objects.get(name="Job Template B")
+
+        assert purge_jobs() == 1
+
+        assert not Job.objects.filter(pk=old_job.pk).exists()
+        assert not JobHostSummary.objects.filter(job_id=old_job.pk).exists()
+        # Newer jobs and jobs without a finish time are kept.
+        assert set(Job.objects.values_list("name", flat=True)) == {"Job Template A", "Job Template C"}
+        assert JobHostSummary.objects.count() == 3
+        assert JobDailyRollup.objects.filter(day=old_job.finished.date()).exists() is keep_rollup
+        assert purge_jobs() == 0
+
+    def test_purge_jobs_disabled(self, settings, host_summaries):
+        settings.DATA_RETENTION_DAYS = {"jobs": None}
+        assert purge_jobs() == 0
+        assert Job.objects.count() == 3
+
+    def test_purge_sync_jobs_and_data(self, settings, cluster):
+        settings.DATA_RETENTION_DAYS = {"sync_jobs": 30, "sync_data": 7}
+        settings.DATA_RETENTION_BATCH_SIZE = 1
+        with time_machine.travel(NOW - datetime.timedelta(days=40), tick=False):
+            # Saving sync data creates its parse job.
+            failed_data = ClusterSyncData.objects.create(cluster=cluster, data={})
+            SyncJob.objects.filter(cluster_sync_data=failed_data).update(status=JobStatusChoices.FAILED, finished=NOW - datetime.timedelta(days=40))
+            pending_data = ClusterSyncData.objects.create(cluster=cluster, data={})
+            old_job = SyncJob.objects.create(name="Old", cluster=cluster, status=JobStatusChoices.SUCCESSFUL, finished=NOW - datetime.timedelta(days=40))
+        with time_machine.travel(NOW - datetime.timedelta(days=3), tick=False):
+            recent_data = ClusterSyncData.objects.create(cluster=cluster, data={})
+            SyncJob.objects.filter(cluster_sync_data=recent_data).update(status=JobStatusChoices.FAILED, finished=NOW - datetime.timedelta(days=3))
+
+        with time_machine.travel(NOW, tick=False):
+            assert purge_sync_data() == 1
+            assert set(ClusterSyncData.objects.values_list("pk", flat=True)) == {pending_data.pk, recent_data.pk}
+
+            assert purge_sync_jobs() == 2
+            assert not SyncJob.objects.filter(pk=old_job.pk).exists()
+            assert set(SyncJob.objects.values_list("cluster_sync_data", flat=True)) == {pending_data.pk, recent_data.pk}
+
+    def test_purge_pdf_reports(self, settings):
+        settings.REPORT_PDF_RETENTION_SECONDS = 86400
+        settings.REPORT_PDF_TIMEOUT_SECONDS = 600
+        with time_machine.travel(NOW - datetime.timedelta(days=2), tick=False):
+            expired = PdfReport.objects.create(status=JobStatusChoices.SUCCESSFUL)
+        with time_machine.travel(NOW - datetime.timedelta(hours=1), tick=False):
+            stale = [PdfReport.objects.create(status=status) for status in (JobStatusChoices.PENDING, JobStatusChoices.RUNNING)]
+            rendered = PdfReport.objects.create(status=JobStatusChoices.SUCCESSFUL)
+        with time_machine.travel(NOW - datetime.timedelta(minutes=5), tick=False):
+            recent = PdfReport.objects.create(status=JobStatusChoices.RUNNING)
+
+        with time_machine.travel(NOW, tick=False):
+            assert fail_stale_pdf_reports() == 2
+            assert purge_pdf_reports() == 1
+
+        assert not PdfReport.objects.filter(pk=expired.pk).exists()
+        assert dict(PdfReport.objects.values_list("pk", "status")) == {
+            stale[0].pk: JobStatusChoices.FAILED,
+            stale[1].pk: JobStatusChoices.FAILED,
+            rendered.pk: JobStatusChoices.SUCCESSFUL,
+            recent.pk: JobStatusChoices.RUNNING,
+        }
@@ -0,0 +1,29 @@
+from backend.apps.clusters.sketch import HyperLogLog
+
+
+class TestHyperLogLog:
+
+    @staticmethod
+    def sketch_of(values):
+        sketch = HyperLogLog()
+        for value in values:
+            sketch.add(value)
+        return sketch
+
+    def test_small_cardinality_is_exact(self):
+        assert HyperLogLog().count() == 0
+        assert self.sketch_of([1, 2, 3, 2, 1]).count() == 3
+
+    def test_large_cardinality_estimate(self):
+        count = self.sketch_of(range(50000)).count()
+        assert abs(count - 50000) / 50000 < 0.05
+
+    def test_merge_counts_union(self):
+        merged = self.sketch_of(range(0, 3000))
+        merged.update(self.sketch_of(range(2000, 5000)))
+        assert merged.registers == self.sketch_of(range(5000)).registers
+
+    def test_bytes_round_trip(self):
+        sketch = self.sketch_of(range(100))
+        assert HyperLogLog.from_bytes(memoryview(sketch.to_bytes())).registers == sketch.registers
+        assert len(sketch.to_bytes()) == 3 * len(sketch.registers)
@@ -1,14 +1,22 @@
 import threading
+from datetime import timedelta
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
 
 import pytest
 from dispatcherd.config import setup as dispatcher_setup
 from dispatcherd.worker.exceptions import DispatcherCancel
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
+from backend.apps.clusters.models import ClusterSyncData, JobLaunchTypeChoices
 from backend.apps.dispatch.config import get_dispatcherd_config
+from backend.apps.dispatch.pool import get_pool_max_workers, get_pool_workers
 from backend.apps.scheduler.models import JobStatusChoices, JobTypeChoices, SyncSchedule, SyncJob
 from backend.apps.scheduler.task_manager import SyncTaskManager
 from backend.apps.tasks.jobs import BaseTask, AAPSyncTask, AAPParseDataTask
+from backend.common_utils import task_manager_bulk_reschedule
 
 
 @pytest.mark.django_db(transaction=True, reset_sequences=True)
@@ -20,43 +28,54 @@ class TestSyncTaskManager:
         assert tb.start_task_limit == 5
         assert tb.task_manager_timeout == 3
 
-    def test_start_task_unknown_type(self):
+    def test_start_tasks_unknown_type(self, cluster):
         tb = SyncTaskManager()
-        task = MagicMock()
+        task = cluster.create_sync_job(name="Unknown", status=JobStatusChoices.PENDING)
         task.type = "UNKNOWN"
-        tb.start_task(task)
+        tb.start_tasks([task])
+        task.refresh_from_db()
         assert task.status == JobStatusChoices.FAILED
         assert "Unknown task type" in task.explanation
 
-    @patch("backend.apps.scheduler.task_manager.AAPSyncTask")
-    def test_start_task_sync_jobs(self, mock_sync_task):
-        tb = SyncTaskManager()
-        task = MagicMock()
-        task.type = JobTypeChoices.SYNC_JOBS
-        tb.start_task(task)
-        mock_sync_task.apply_async.assert_called_once()
-
     @patch("backend.apps.scheduler.task_manager.AAPParseDataTask")
-    @patch("backend.apps.scheduler.task_manager.settings")
-    def test_start_task_parse_job_data(self, mock_settings, mock_parse_task):
-        mock_settings.START_TASK_LIMIT = 5
-        mock_settings.DISPATCHER_PARSE_CHANNEL = "parse"
+    @patch("backend.apps.scheduler.task_manager.AAPSyncTask")
+    def test_start_tasks(self, mock_sync_task, mock_parse_task, settings, cluster, cluster_sync_data):
         tb = SyncTaskManager()
-        task = MagicMock()
-        task.type = JobTypeChoices.PARSE_JOB_DATA
-        tb.start_task(task)
-        mock_parse_task.apply_async.assert_called_once()
+        sync_tasks = [cluster.create_sync_job(name=f"Sync {i}", status=JobStatusChoices.PENDING) for i in range(2)]
+        parse_task = SyncJob.objects.get(cluster_sync_data=cluster_sync_data)
+        parse_task.status = JobStatusChoices.PENDING
+        with CaptureQueriesContext(connection) as queries:
+            tb.start_tasks([*sync_tasks, parse_task])
+        # One update moves all tasks to WAITING
+        assert len([query for query in queries if query["sql"].startswith("UPDATE")]) == 1
+        assert tb.start_task_limit == 2
+        assert mock_sync_task.apply_async.call_count == 2
+        mock_parse_task.apply_async.assert_called_once_with(
+            [parse_task.pk], {}, queue=settings.DISPATCHER_PARSE_CHANNEL, uuid=parse_task.celery_task_id)
+        for task in [*sync_tasks, parse_task]:
+            task.refresh_from_db()
+            assert task.status == JobStatusChoices.WAITING
+            assert task.celery_task_id
+        assert tb.subsystem_metrics.METRICS["automation_dashboard_task_manager_start_task_seconds"].get() > 0
 
     @patch("backend.apps.scheduler.task_manager.SyncTaskManager.timed_out")
-    @patch("backend.apps.scheduler.task_manager.SyncTaskManager.start_task")
-    def test_process_pending_tasks_timeout(self, mock_start_task, mock_timed_out):
+    @patch("backend.apps.scheduler.task_manager.SyncTaskManager.start_tasks")
+    def test_process_pending_tasks_timeout(self, mock_start_tasks, mock_timed_out):
         tb = SyncTaskManager()
         tb.start_task_limit = 5
         mock_timed_out.side_effect = [False, True]
         tasks = [MagicMock(), MagicMock()]
         tb.process_pending_tasks(tasks)
         # Should only process first task before timeout
-        assert mock_start_task.call_count == 1
+        mock_start_tasks.assert_called_once_with(tasks[:1])
+
+    @patch("backend.apps.scheduler.task_manager.SyncTaskManager.start_tasks")
+    def test_process_pending_tasks_limit(self, mock_start_tasks):
+        tb = SyncTaskManager()
+        tb.start_task_limit = 2
+        tasks = [MagicMock(), MagicMock(), MagicMock()]
+        tb.process_pending_tasks(tasks)
+        mock_start_tasks.assert_called_once_with(tasks[:2])
 
     def test_process_pending_tasks_empty(self):
         tb = SyncTaskManager()
@@ -74,6 +93,133 @@ class TestSyncTaskManager:
         tb.process_tasks()
         tb.process_pending_tasks.assert_called_once_with([task_pending])
 
+    @staticmethod
+    def lane_task(pk, cluster_id, type=JobTypeChoices.SYNC_JOBS, launch_type=JobLaunchTypeChoices.SCHEDULED,
+                  status=JobStatusChoices.PENDING):
+        return MagicMock(id=pk, cluster_id=cluster_id, type=type, launch_type=launch_type, status=status)
+
+    def test_order_pending_tasks_round_robin(self):
+        tb = SyncTaskManager()
+        pending = [self.lane_task(pk, 1) for pk in (1, 2, 3)] + [self.lane_task(pk, 2) for pk in (4, 5)]
+        ordered = tb.order_pending_tasks(pending, [])
+        assert [t.id for t in ordered] == [1, 4, 2, 5, 3]
+
+    def test_order_pending_tasks_lanes(self, settings):
+        settings.TASK_MANAGER_LANE_LIMITS = {"sync": None, "parse": None, "backfill": 1}
+        tb = SyncTaskManager()
+        pending = [
+            *[self.lane_task(pk, 1) for pk in (1, 2, 3, 4)],
+            self.lane_task(5, 2),
+            self.lane_task(6, 2, type=JobTypeChoices.PARSE_JOB_DATA),
+            self.lane_task(7, 1, launch_type=JobLaunchTypeChoices.MANUAL),
+            self.lane_task(8, 2, launch_type=JobLaunchTypeChoices.MANUAL),
+        ]
+        running = [self.lane_task(9, 1, status=JobStatusChoices.RUNNING)]
+        ordered = tb.order_pending_tasks(pending, running)
+        # The small cluster syncs first, parsing goes before backfills and only one backfill fits its lane
+        assert [t.id for t in ordered] == [5, 1, 2, 3, 4, 6, 7]
+
+    @patch("backend.apps.dispatch.pool.get_auto_max_workers", return_value=20)
+    def test_get_pool_workers(self, mock_auto_max_workers, settings):
+        settings.DISPATCHER_POOLS = {
+            "sync": {"min_workers": 1, "max_workers": None},
+            "parse": {"min_workers": 2, "max_workers": 4},
+        }
+        settings.DISPATCHER_AUTOSCALE_LATENCY_FACTOR = 2.0
+        # Scales with the queue depth, within the pool bounds
+        assert get_pool_workers("sync", pending=5, running=3) == 8
+        assert get_pool_workers("sync", pending=30, running=3) == 12
+        assert get_pool_workers("parse", pending=0, running=0) == 2
+        assert get_pool_workers("parse", pending=10, running=1) == 4
+        # Backs off to half of the running jobs when they slow down
+        assert get_pool_workers("sync", pending=5, running=6, recent_latency=Decimal("30.0"),
+                                baseline_latency=Decimal("10.0")) == 3
+        assert get_pool_workers("sync", pending=5, running=6, recent_latency=15.0, baseline_latency=10.0) == 11
+
+    @patch("backend.apps.dispatch.config.get_auto_max_workers", return_value=16)
+    @patch("backend.apps.dispatch.pool.get_cpu_count", return_value=8)
+    @patch("backend.apps.dispatch.pool.get_auto_max_workers", return_value=16)
+    def test_pools_split_dispatcher_workers(self, mock_auto_max_workers, mock_cpu_count, mock_config_auto_max_workers,
+                                            settings):
+        settings.JOB_EVENT_WORKERS = 4
+        settings.DISPATCHER_POOLS = {
+            "sync": {"min_workers": 1, "max_workers": None},
+            "parse": {"min_workers": 1, "max_workers": None},
+        }
+        assert get_dispatcherd_config()["service"]["pool_kwargs"]["max_workers"] == 16
+        assert (get_pool_max_workers("sync"), get_pool_max_workers("parse")) == (4, 8)
+
+        # Configured sizes are capped to the workers left after JOB_EVENT_WORKERS
+        settings.DISPATCHER_POOLS["parse"]["max_workers"] = 20
+        assert (get_pool_max_workers("sync"), get_pool_max_workers("parse")) == (1, 11)
+        settings.DISPATCHER_POOLS = {
+            "sync": {"min_workers": 1, "max_workers": 2},
+            "parse": {"min_workers": 1, "max_workers": 4},
+        }
+        assert (get_pool_max_workers("sync"), get_pool_max_workers("parse")) == (2, 4)
+        assert get_dispatcherd_config()["service"]["pool_kwargs"]["max_workers"] == 16
+
+    def test_get_lane_latencies(self, cluster):
+        finished = timezone.now() - timedelta(minutes=30)
+        scheduled = dict(status=JobStatusChoices.SUCCESSFUL, launch_type=JobLaunchTypeChoices.SCHEDULED)
+        for elapsed in (10, 20):
+            job = cluster.create_sync_job(name="Sync", **scheduled)
+            SyncJob.objects.filter(pk=job.pk).update(finished=finished, elapsed=elapsed)
+        job = cluster.create_sync_job(name="Sync", **scheduled)
+        SyncJob.objects.filter(pk=job.pk).update(finished=timezone.now(), elapsed=60)
+        # A long backfill slice is not part of the scheduled sync latency
+        SyncJob.objects.create(name="Backfill", cluster=cluster, type=JobTypeChoices.SYNC_JOBS,
+                               launch_type=JobLaunchTypeChoices.MANUAL, status=JobStatusChoices.SUCCESSFUL,
+                               finished=timezone.now(), elapsed=3600)
+        latencies = SyncTaskManager().get_lane_latencies()
+        assert set(latencies) == {"sync"}
+        recent, baseline = latencies["sync"]
+        assert recent == 60
+        assert baseline == 30
+
+    @patch("backend.apps.dispatch.pool.get_auto_max_workers", return_value=20)
+    @patch("backend.apps.scheduler.task_manager.SyncTaskManager.get_lane_latencies",
+           return_value={"sync": (Decimal("30.0"), Decimal("10.0"))})
+    def test_order_pending_tasks_lane_backoff(self, mock_latencies, mock_auto_max_workers, settings):
+        settings.DISPATCHER_POOLS = {
+            "sync": {"min_workers": 1, "max_workers": 8},
+            "parse": {"min_workers": 1, "max_workers": 8},
+        }
+        settings.TASK_MANAGER_LANE_LIMITS = {"sync": None, "parse": None, "backfill": 4}
+        tb = SyncTaskManager()
+        running = [
+            *[self.lane_task(pk, 1, status=JobStatusChoices.RUNNING) for pk in (1, 2)],
+            *[self.lane_task(pk, 1, launch_type=JobLaunchTypeChoices.MANUAL, status=JobStatusChoices.RUNNING)
+              for pk in (3, 4)],
+        ]
+        pending = [
+            self.lane_task(5, 2),
+            self.lane_task(6, 2, launch_type=JobLaunchTypeChoices.MANUAL),
+        ]
+        ordered = tb.order_pending_tasks(pending, running)
+        # Slow scheduled syncs back off their own lane only, backfills still start up to their lane limit
+        assert [t.id for t in ordered] == [6]
+
+    @patch("backend.apps.dispatch.pool.get_auto_max_workers", return_value=20)
+    @patch("backend.apps.scheduler.task_manager.SyncTaskManager.get_lane_latencies",
+           return_value={"parse": (Decimal("30.0"), Decimal("10.0"))})
+    def test_order_pending_tasks_pool_backoff(self, mock_latencies, mock_auto_max_workers, settings):
+        settings.DISPATCHER_POOLS = {
+            "sync": {"min_workers": 1, "max_workers": 8},
+            "parse": {"min_workers": 1, "max_workers": 8},
+        }
+        tb = SyncTaskManager()
+        running = [self.lane_task(pk, 1, type=JobTypeChoices.PARSE_JOB_DATA, status=JobStatusChoices.RUNNING)
+                   for pk in (1, 2, 3, 4)]
+        pending = [
+            *[self.lane_task(pk, 2, type=JobTypeChoices.PARSE_JOB_DATA) for pk in (5, 6)],
+            self.lane_task(7, 2),
+        ]
+        ordered = tb.order_pending_tasks(pending, running)
+        # Slow parse jobs hold back new ones, the sync pool still starts its jobs
+        assert [t.id for t in ordered] == [7]
+        assert tb.subsystem_metrics.METRICS["automation_dashboard_task_manager_parse_pool_workers"].get() == 2
+
     @patch("backend.apps.scheduler.task_manager.SyncTaskManager.get_tasks")
     @patch("backend.apps.scheduler.task_manager.SyncTaskManager.process_tasks")
     def test__schedule_with_tasks(self, mock_process_tasks, mock_get_tasks):
@@ -177,8 +323,9 @@ class TestSyncTaskManager:
         assert job.status == JobStatusChoices.FAILED
         assert "No job args provided" in job.explanation
 
+    @patch("backend.apps.clusters.connector.ApiConnector.close")
     @patch("backend.apps.clusters.connector.ApiConnector.check_aap_version", side_effect=Exception("API error"))
-    def test_aapsynctask_api_failure(self, mock_check, cluster):
+    def test_aapsynctask_api_failure(self, mock_check, mock_close, cluster):
         job = SyncJob.objects.create(
             name="API Failure Job",
             status=JobStatusChoices.WAITING,
@@ -191,6 +338,8 @@ class TestSyncTaskManager:
         job.refresh_from_db()
         assert job.status == JobStatusChoices.FAILED
         assert "Error connecting to AAP API" in job.explanation
+        # The HTTP session is closed when the sync fails too
+        mock_close.assert_called_once()
 
     def test_aapparsedatatask_parser_failure(self, cluster, cluster_sync_data):
         job = SyncJob.objects.create(
@@ -221,3 +370,85 @@ class TestSyncTaskManager:
         job.refresh_from_db()
         assert job.status == JobStatusChoices.CANCELED
         assert "Canceled" in job.explanation
+
+    @patch("backend.apps.dispatch.config.setup_dispatcherd_publisher")
+    @patch("backend.apps.tasks.system.automation_dashboard_job_parser_data_scheduler.delay")
+    @patch("backend.apps.scheduler.tasks.sync_task_manager.delay")
+    def test_job_status_wakes_up_managers(self, mock_sync_delay, mock_parse_delay, mock_setup, settings, cluster,
+                                          cluster_sync_data):
+        settings.TASK_MANAGER_WAKEUP_ENABLED = True
+        job = SyncJob.objects.create(
+            name="Data parser",
+            type=JobTypeChoices.PARSE_JOB_DATA,
+            cluster=cluster,
+            cluster_sync_data=cluster_sync_data,
+        )
+        assert mock_parse_delay.call_count == 1
+        mock_sync_delay.assert_not_called()
+
+        job.signal_start()
+        assert mock_sync_delay.call_count == 1
+
+        job.name = "Renamed"
+        job.save(update_fields=["name"])
+        assert mock_sync_delay.call_count == 1
+        assert mock_parse_delay.call_count == 1
+
+        job.status = JobStatusChoices.SUCCESSFUL
+        job.save()
+        assert mock_parse_delay.call_count == 2
+        assert mock_sync_delay.call_count == 2
+        assert mock_setup.call_count == 4
+
+    @patch("backend.apps.dispatch.config.setup_dispatcherd_publisher")
+    @patch("backend.apps.scheduler.tasks.sync_task_manager.delay")
+    def test_bulk_reschedule_wakes_up_once(self, mock_sync_delay, mock_setup, settings, cluster):
+        settings.TASK_MANAGER_WAKEUP_ENABLED = True
+        jobs = [cluster.create_sync_job(name=f"Job {i}") for i in range(3)]
+        with task_manager_bulk_reschedule():
+            for job in jobs:
+                job.signal_start()
+            mock_sync_delay.assert_not_called()
+        mock_sync_delay.assert_called_once()
+
+    @patch("backend.apps.dispatch.config.setup_dispatcherd_publisher")
+    @patch("backend.apps.tasks.system.automation_dashboard_job_parser_data_scheduler.delay")
+    @patch("backend.apps.tasks.jobs.ApiConnector")
+    def test_sync_task_wakes_up_parser_once(self, mock_connector, mock_parse_delay, mock_setup, settings, cluster, api_jobs):
+        settings.TASK_MANAGER_WAKEUP_ENABLED = True
+        job = SyncJob.objects.create(
+            name="Sync Job",
+            status=JobStatusChoices.WAITING,
+            type=JobTypeChoices.SYNC_JOBS,
+            cluster=cluster,
+            job_args='{}',
+        )
+
+        def sync_jobs():
+            for data in api_jobs[:3]:
+                ClusterSyncData.objects.create(cluster=cluster, data=data)
+            mock_parse_delay.assert_not_called()
+
+        connector = mock_connector.return_value
+        connector.check_aap_version.return_value = True
+        connector.sync_jobs.side_effect = sync_jobs
+        AAPSyncTask().run(job.pk)
+
+        assert SyncJob.objects.filter(type=JobTypeChoices.PARSE_JOB_DATA).count() == 3
+        mock_parse_delay.assert_called_once()
+
+    @patch("backend.apps.dispatch.config.setup_dispatcherd_publisher")
+    @patch("backend.apps.scheduler.tasks.sync_task_manager.delay", side_effect=Exception("Broker is down"))
+    def test_wakeup_failure_does_not_fail_save(self, mock_sync_delay, mock_setup, settings, cluster):
+        settings.TASK_MANAGER_WAKEUP_ENABLED = True
+        job = cluster.create_sync_job(name="Job")
+        assert job.signal_start() is True
+        mock_sync_delay.assert_called_once()
+        job.refresh_from_db()
+        assert job.status == JobStatusChoices.PENDING
+
+    @patch("backend.apps.scheduler.tasks.sync_task_manager.delay")
+    def test_wakeup_disabled(self, mock_sync_delay, cluster):
+        job = cluster.create_sync_job(name="Job")
+        job.signal_start()
+        mock_sync_delay.assert_not_called()
@@ -1,5 +1,12 @@
 from unittest.mock import patch, MagicMock
 
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from backend.apps.clusters.encryption import encrypt_value
+from backend.apps.clusters.models import Cluster, ClusterSyncData
+from backend.apps.scheduler.models import JobStatusChoices, JobTypeChoices, SyncJob
 from backend.apps.tasks import system
 
 
@@ -36,25 +43,41 @@ class TestTaskSystem:
         mock_lock.return_value.__enter__.return_value = False
         system.automation_dashboard_periodic_scheduler()
 
-    @patch("backend.apps.tasks.system.settings")
-    @patch("backend.apps.tasks.system.advisory_lock")
-    @patch("backend.apps.tasks.system.SyncJob")
-    def test_automation_dashboard_job_parser_data_scheduler_runs(
-            self,
-            mock_sync_job,
-            mock_lock,
-            mock_settings
-    ):
-        mock_settings.TASK_MANAGER_LOCK_TIMEOUT = 1
-        mock_settings.SCHEDULE_MAX_DATA_PARSE_JOBS = 2
-        mock_lock.return_value.__enter__.return_value = True
-        job = MagicMock()
-        job.cluster_sync_data = MagicMock()
-        job.cluster_sync_data.cache_timeout_blocked = False
-        job.signal_start.return_value = True
-        mock_sync_job.objects.filter.return_value = [job]
-        system.automation_dashboard_job_parser_data_scheduler()
-        job.signal_start.assert_called_once()
+    @pytest.mark.django_db
+    def test_automation_dashboard_job_parser_data_scheduler_runs(self, settings, cluster):
+        settings.SCHEDULE_MAX_DATA_PARSE_JOBS = 2
+        other_cluster = Cluster.objects.create(
+            protocol="https",
+            address="other",
+            port=8000,
+            access_token=encrypt_value("<PASSWORD>"),
+            verify_ssl=False)
+        for _ in range(2):
+            ClusterSyncData.objects.create(cluster=other_cluster, data={})
+        SyncJob.objects.filter(cluster=other_cluster).update(status=JobStatusChoices.RUNNING)
+        ClusterSyncData.objects.create(cluster=other_cluster, data={})
+        ClusterSyncData.objects.create(cluster=cluster, data={})
+
+        # Admission costs the same three queries however many jobs are waiting
+        with CaptureQueriesContext(connection) as queries:
+            system.automation_dashboard_job_parser_data_scheduler()
+        assert len([query for query in queries if "scheduler_syncjob" in query["sql"]]) == 3
+
+        job = SyncJob.objects.get(cluster=cluster)
+        assert job.type == JobTypeChoices.PARSE_JOB_DATA
+        assert job.status == JobStatusChoices.PENDING
+        # The other cluster already runs the maximum number of parse jobs
+        assert SyncJob.objects.filter(cluster=other_cluster, status=JobStatusChoices.NEW).count() == 1
+
+    @pytest.mark.django_db
+    def test_bulk_signal_start_skips_started_jobs(self, cluster):
+        new_job = cluster.create_sync_job(name="New")
+        running_job = cluster.create_sync_job(name="Running", status=JobStatusChoices.RUNNING)
+        assert SyncJob.bulk_signal_start([new_job.pk, running_job.pk]) == [new_job.pk]
+        new_job.refresh_from_db()
+        running_job.refresh_from_db()
+        assert new_job.status == JobStatusChoices.PENDING
+        assert running_job.status == JobStatusChoices.RUNNING
 
     @patch("backend.apps.tasks.system.settings")
     @patch("backend.apps.tasks.system.advisory_lock")
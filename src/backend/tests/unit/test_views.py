@@ -1,17 +1,24 @@
 import csv
+import gzip
 import io
 import json
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
 from unittest import mock
 
 import pytest
 import pytz
 import time_machine
+from django.db import connection
 from rest_framework.test import APIClient
 
 from backend.api.v1.ping.views import PingView
-from backend.apps.clusters.models import Project, JobTemplate, SubscriptionCost
-from backend.apps.common.models import FilterSet, Currency, Settings, SettingsChoices
+from backend.api.v1.report.views import ReportsView, render_pdf, run_queries
+from backend.apps.clusters.cache import report_cache
+from backend.apps.clusters.encryption import encrypt_value
+from backend.apps.clusters.models import Cluster, Label, Project, JobTemplate, SubscriptionCost, JobDailyHostSketch, Job, DateRangeChoices
+from backend.apps.common.models import FilterSet, Currency, Settings, SettingsChoices, PdfReport
+from backend.apps.tasks.reports import generate_pdf_report
 
 test_template_option_expected_data = {
     'clusters': [
@@ -369,6 +376,98 @@ class TestViews:
         data = response.json()
         assert data == expected
 
+    @pytest.mark.parametrize('url', [
+        "/api/v1/report/?page=1&page_size=10&date_range=year_to_date",
+        "/api/v1/report/?page=1&page_size=10&date_range=year_to_date&ordering=-runs",
+        "/api/v1/report/details/?date_range=year_to_date",
+        "/api/v1/report/details/?date_range=last_3_years&project=1",
+        "/api/v1/report/details/?date_range=year_to_date&unique_hosts=exact",
+    ])
+    @time_machine.travel(datetime(2025, 3, 21, 22, 1, 45, tzinfo=pytz.UTC))
+    def test_report_rollup_matches_jobs(self, mock_auth, settings, host_summaries, projects, url):
+        client = APIClient()
+        settings.REPORT_ROLLUP_ENABLED = False
+        expected = client.get(url).json()
+        settings.REPORT_ROLLUP_ENABLED = True
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.json() == expected
+
+    @time_machine.travel(datetime(2025, 3, 21, 22, 1, 45, tzinfo=pytz.UTC))
+    def test_report_details_unique_hosts_from_sketches(self, mock_auth, host_summaries, projects):
+        client = APIClient()
+        url = "/api/v1/report/details/?date_range=year_to_date"
+        assert client.get(url).json()['total_number_of_unique_hosts'] == {'value': 3}
+
+        JobDailyHostSketch.objects.all().delete()
+        assert client.get(url).json()['total_number_of_unique_hosts'] == {'value': 0}
+        assert client.get(f"{url}&unique_hosts=exact").json()['total_number_of_unique_hosts'] == {'value': 3}
+
+    @time_machine.travel(datetime(2025, 3, 21, 22, 1, 45, tzinfo=pytz.UTC))
+    def test_report_details_concurrent_queries(self, mock_auth, settings, host_summaries, projects):
+        client = APIClient()
+        url = "/api/v1/report/details/?date_range=year_to_date"
+        settings.REPORT_QUERY_WORKERS = 1
+        expected = client.get(url).json()
+
+        settings.REPORT_QUERY_WORKERS = 4
+        with mock.patch.object(DateRangeChoices, "get_date_range", wraps=DateRangeChoices.get_date_range) as get_date_range:
+            assert client.get(url).json() == expected
+        get_date_range.assert_called_once()
+
+    def test_run_queries_on_bounded_pool(self, settings, host_summaries):
+        settings.REPORT_QUERY_WORKERS = 2
+        queries = {
+            name: lambda: (threading.get_ident(), Job.objects.count(), connection.in_atomic_block)
+            for name in ("a", "b", "c")
+        }
+        threads = set()
+        for _ in range(2):
+            results = run_queries(queries)
+            assert sorted(results) == ["a", "b", "c"]
+            for ident, count, in_atomic_block in results.values():
+                assert count == Job.objects.count() > 0
+                assert not in_atomic_block
+                threads.add(ident)
+        assert threading.get_ident() not in threads
+        assert len(threads) <= 2
+
+    @pytest.mark.parametrize('url', [
+        "/api/v1/report/?date_range=year_to_date",
+        "/api/v1/report/details/?date_range=year_to_date",
+    ])
+    @time_machine.travel(datetime(2025, 3, 21, 22, 1, 45, tzinfo=pytz.UTC))
+    def test_report_cached_until_template_edit(self, mock_auth, report_cache_redis, host_summaries, projects, url):
+        client = APIClient()
+        response = client.get(url)
+        assert response.status_code == 200
+
+        with mock.patch.object(ReportsView, "get_base_queryset", side_effect=AssertionError("not cached")):
+            cached = client.get(url)
+        assert cached.status_code == 200
+        assert cached.content == response.content
+
+        job_template = JobTemplate.objects.get(name="Job Template A")
+        data = dict(time_taken_manually_execute_minutes=120, time_taken_create_automation_minutes=30)
+        client.put(f"/api/v1/templates/{job_template.id}/", content_type='application/json', data=json.dumps(data))
+        assert client.get(url).content != response.content
+
+    @pytest.mark.parametrize('rollup', [True, False])
+    @pytest.mark.parametrize('start_date, end_date, expected_range, expected_runs', [
+        ('2025-02-28', '2025-03-02', 'day', {'2025-02-28T00:00:00Z': 0, '2025-03-01T00:00:00Z': 1, '2025-03-02T00:00:00Z': 0}),
+        ('2025-03-01', '2025-03-01', 'hour', {f'2025-03-01T{hour:02}:00:00Z': int(hour == 10) for hour in range(24)}),
+    ])
+    def test_report_chart_series(self, mock_auth, settings, host_summaries, rollup, start_date, end_date, expected_range, expected_runs):
+        settings.REPORT_ROLLUP_ENABLED = rollup
+        client = APIClient()
+        response = client.get(f"/api/v1/report/details/?date_range=custom&start_date={start_date}&end_date={end_date}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data['job_chart']['range'] == expected_range
+        assert {item['x']: item['y'] for item in data['job_chart']['items']} == expected_runs
+        assert [item['x'] for item in data['job_chart']['items']] == list(expected_runs)
+        assert {item['x']: item['y'] for item in data['host_chart']['items']} == {x: runs * 2 for x, runs in expected_runs.items()}
+
     def test_update_template_manual_time(self, mock_auth, job_templates):
         client = APIClient()
         job_template = JobTemplate.objects.get(name="Job Template A")
@@ -475,7 +574,8 @@ class TestViews:
         client = APIClient()
         response = client.get("/api/v1/report/csv/?date_range=last_month")
         assert response.status_code == 200
-        content = response.content.decode('utf-8')
+        assert response.streaming
+        content = b"".join(response.streaming_content).decode('utf-8')
         cvs_reader = csv.reader(io.StringIO(content))
         body = list(cvs_reader)
         headers = body.pop(0)
@@ -498,12 +598,82 @@ class TestViews:
             assert headers[index] == data[0]
             assert body[0][index] == data[1]
 
+    @pytest.mark.parametrize('gzip_enabled', [True, False])
+    def test_export_csv_gzip(self, mock_auth, settings, host_summaries, projects, gzip_enabled):
+        settings.REPORT_CSV_GZIP = gzip_enabled
+        settings.REPORT_CSV_CHUNK_SIZE = 1
+        client = APIClient()
+        url = "/api/v1/report/csv/?date_range=last_month"
+        plain = b"".join(client.get(url).streaming_content)
+        response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        content = b"".join(response.streaming_content)
+        if gzip_enabled:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert gzip.decompress(content) == plain
+        else:
+            assert "Content-Encoding" not in response.headers
+            assert content == plain
+
     @time_machine.travel(datetime(2025, 3, 21, 22, 1, 45, tzinfo=pytz.UTC))
     def test_export_pdf(self, mock_auth, host_summaries, projects, currencies):
         client = APIClient()
         response = client.post("/api/v1/report/pdf/?date_range=last_month")
         assert response.status_code == 200
 
+    @time_machine.travel(datetime(2025, 3, 21, 22, 1, 45, tzinfo=pytz.UTC))
+    def test_export_pdf_in_background(self, mock_auth, settings, report_cache_redis, host_summaries, projects, currencies):
+        settings.REPORT_PDF_CHUNK_SIZE = 1
+        client = APIClient()
+        url = "/api/v1/report/pdf/export/?date_range=year_to_date"
+        with mock.patch("backend.api.v1.report.views.generate_pdf_report") as task:
+            response = client.post(url, data={"job_chart": "job", "host_chart": "host"})
+            assert response.status_code == 202
+            report_id = response.json()["id"]
+            assert response.json()["status"] == "pending"
+            task.apply_async.assert_called_once_with([report_id], queue=settings.DISPATCHER_REPORT_CHANNEL)
+
+            # The same report of the same data is reused.
+            assert client.post(url, data={"job_chart": "job", "host_chart": "host"}).json()["id"] == report_id
+            assert client.post(url, data={"job_chart": "other", "host_chart": "host"}).json()["id"] != report_id
+
+        assert client.get(f"/api/v1/report/pdf/export/{report_id}/download/").status_code == 409
+
+        contexts = []
+
+        def render(template, report_contexts):
+            contexts.extend(report_contexts)
+            return render_pdf(template, contexts)
+
+        with mock.patch("backend.api.v1.report.views.render_pdf", side_effect=render):
+            generate_pdf_report(report_id)
+        assert [len(context["table_data"]) for context in contexts] == [1, 1]
+        assert [context.get("table_only", False) for context in contexts] == [False, True]
+        assert contexts[0]["job_chart"] == "job"
+
+        assert client.get(f"/api/v1/report/pdf/export/{report_id}/").json()["status"] == "successful"
+        response = client.get(f"/api/v1/report/pdf/export/{report_id}/download/")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/pdf"
+        assert response.content.startswith(b"%PDF")
+
+        with mock.patch("backend.api.v1.report.views.generate_pdf_report") as task:
+            report_cache.bump_data_version()
+            assert client.post(url, data={"job_chart": "job", "host_chart": "host"}).json()["id"] != report_id
+
+    def test_export_pdf_in_background_does_not_reuse_stale_report(self, mock_auth, settings, report_cache_redis, currencies):
+        settings.REPORT_PDF_TIMEOUT_SECONDS = 600
+        url = "/api/v1/report/pdf/export/?date_range=year_to_date"
+        client = APIClient()
+        with mock.patch("backend.api.v1.report.views.generate_pdf_report"):
+            report_id = client.post(url).json()["id"]
+            PdfReport.objects.filter(pk=report_id).update(internal_created=datetime.now(pytz.UTC) - timedelta(hours=1))
+            assert client.post(url).json()["id"] != report_id
+
+    def test_export_pdf_in_background_requires_date_range(self, mock_auth):
+        response = APIClient().post("/api/v1/report/pdf/export/")
+        assert response.status_code == 400
+        assert PdfReport.objects.count() == 0
+
     @pytest.mark.parametrize(
         "endpoint, fixture_name, expected",
         [
@@ -521,6 +691,44 @@ class TestViews:
         data = response.json()
         assert data == expected
 
+    @pytest.mark.parametrize("endpoint, fixture_name", [
+        ("/api/v1/templates/", "job_templates"),
+        ("/api/v1/labels/", "labels"),
+        ("/api/v1/organizations/", "organizations"),
+        ("/api/v1/projects/", "projects"),
+    ])
+    def test_filters_list_endpoints_keyset(self, request, mock_auth, endpoint, fixture_name):
+        objects = request.getfixturevalue(fixture_name)
+        client = APIClient()
+        url = f"{endpoint}?page_size=2"
+        names = []
+        while url is not None:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert set(data) == {"next", "results"}
+            assert len(data["results"]) <= 2
+            names.extend(item["value"] for item in data["results"])
+            url = data["next"]
+        assert names == sorted(obj.name for obj in objects)
+
+    def test_labels_keyset_same_name(self, mock_auth, labels, cluster):
+        other_cluster = Cluster.objects.create(protocol="https", address="other", port=8000, access_token=encrypt_value("<PASSWORD>"), verify_ssl=False)
+        other = Label.objects.create(name="Label A", cluster=other_cluster, external_id=1)
+        client = APIClient()
+
+        url = "/api/v1/labels/?page_size=1&search=label"
+        keys = []
+        while url is not None:
+            data = client.get(url).json()
+            keys.extend(item["key"] for item in data["results"])
+            url = data["next"]
+        # Equal names are ordered by id.
+        assert keys == [labels[0].id, other.id, labels[1].id, labels[2].id]
+
+        response = client.get("/api/v1/labels/?page_size=1&cursor=invalid")
+        assert response.status_code == 404
+
     @pytest.mark.parametrize('expected', [test_projects_expected_data])
     def test_projects(self, mock_auth, projects, expected):
         client = APIClient()
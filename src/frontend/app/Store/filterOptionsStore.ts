@@ -17,9 +17,8 @@ const createActions: StateCreator<FilterOptionsState & FilterOptionActions> = (s
   options: [],
   currentPage: 1,
   pageSize: 10,
-  count: 0,
+  cursor: null,
   nextPage: null,
-  prevPage: null,
   searchString: null,
   error: false,
   loading: 'idle',
@@ -27,7 +26,7 @@ const createActions: StateCreator<FilterOptionsState & FilterOptionActions> = (s
     const currentState = get();
     return {
       'page_size': currentState.pageSize,
-      'page': currentState.currentPage,
+      'cursor': currentState.cursor,
       'search': currentState.searchString
     };
   },
@@ -40,9 +39,7 @@ const createActions: StateCreator<FilterOptionsState & FilterOptionActions> = (s
       const response = await RestService.fetchFilterOptions(state.endPoint, params);
       set({
         loading: 'succeeded',
-        count: response.count,
         nextPage: response.next,
-        prevPage: response.previous,
         options: state.currentPage == 1 ? response.results : [
           ...state.options,
           ...response.results
@@ -70,12 +67,14 @@ const createActions: StateCreator<FilterOptionsState & FilterOptionActions> = (s
     const state = get();
     if (state.nextPage) {
       set({ loading: 'pending', error: false });
-      set({ currentPage: state.currentPage + 1 });
+      // Pages are read by keyset, the next page link carries the cursor after the last option.
+      const cursor = new URL(state.nextPage, window.location.origin).searchParams.get('cursor');
+      set({ currentPage: state.currentPage + 1, cursor: cursor });
       await state.fetchData();
     }
   },
   search: async (searchString: string | null) => {
-    set({ loading: 'pending', error: false, searchString: searchString, currentPage: 1, options: [] });
+    set({ loading: 'pending', error: false, searchString: searchString, currentPage: 1, cursor: null, options: [] });
     const state = get();
     await state.fetchData();
   }
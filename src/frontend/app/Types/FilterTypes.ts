@@ -61,9 +61,8 @@ export interface FilterOptionsState {
   options: FilterOption[];
   currentPage: number,
   pageSize: number,
-  count: number,
+  cursor: string | null,
   nextPage: string | null,
-  prevPage: string | null,
   searchString: string | null,
   loading: 'idle' | 'pending' | 'succeeded' | 'failed';
   error: boolean;
@@ -129,8 +128,6 @@ export type OrderingParams = {
 export type UrlParams = RequestFilter & PaginationParams & OrderingParams;
 
 export type OptionsResponse = {
-  count: number,
   next: string | null,
-  previous: string | null,
   results: FilterOptionWithId[]
 }